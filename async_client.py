@@ -0,0 +1,265 @@
+"""
+Async Provider Client
+Fetches a whole ticker list concurrently over pooled keep-alive connections
+(httpx.AsyncClient), while respecting the per-provider rate limiters and
+caches defined in multi_provider.
+
+Sync callers use fetch_quotes(), which runs the event loop for them.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import multi_provider as mp
+from provider_health import get_health
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+DEFAULT_CONCURRENCY = 10   # tickers processed at once
+MAX_CONNECTIONS = 20       # pooled connections across all providers
+YAHOO_CONCURRENCY = 2      # Yahoo runs in threads and is throttled by data_sources anyway
+
+_API_KEYS = {
+    'finnhub': lambda: mp.FINNHUB_API_KEY,
+    'alphavantage': lambda: mp.ALPHA_VANTAGE_API_KEY,
+    'twelvedata': lambda: mp.TWELVE_DATA_API_KEY,
+    'marketstack': lambda: mp.MARKETSTACK_API_KEY,
+}
+
+
+class AsyncProviderClient:
+    """
+    Async counterpart of the multi_provider fetchers.
+
+    Usage:
+        async with AsyncProviderClient() as client:
+            quotes = await client.fetch_quotes(['AAPL', 'MSFT'])
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS, timeout: float = mp.HTTP_TIMEOUT,
+                 use_yahoo: bool = True):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx is required for the async client (pip install httpx)")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.use_yahoo = use_yahoo
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        self._yahoo_slots = asyncio.Semaphore(YAHOO_CONCURRENCY)
+
+    async def __aenter__(self):
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._client.aclose()
+        self._client = None
+
+    # ------------------------------------------------------------------
+    # Rate limiting without blocking the event loop
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _poll(limiter) -> tuple:
+        """(granted, wait) for one reservation attempt; runs in a worker thread."""
+        wait = limiter.wait_time()
+        return (wait <= 0 and limiter.try_acquire()), wait
+
+    async def _acquire(self, provider: str) -> bool:
+        # The limiter's persisted quotas are SQLite transactions that may wait
+        # on the database lock, so they run off the event loop
+        limiter = mp._rate_limiters[provider]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + mp.RATE_LIMIT_MAX_WAIT
+        while True:
+            granted, wait = await asyncio.to_thread(self._poll, limiter)
+            if granted:
+                return True
+            if loop.time() + wait > deadline:
+                return False
+            await asyncio.sleep(min(max(wait, 0.01), 1.0))
+
+    # ------------------------------------------------------------------
+    # Single provider
+    # ------------------------------------------------------------------
+
+    async def _request(self, provider: str, ticker: str) -> Optional[Dict]:
+        label, _, _, build_request, _ = mp.HTTP_PROVIDERS[provider]
+        health = get_health(provider)
+
+        if not health.allow_request():
+            print(f"⏭️ {label} circuit open, skipping {ticker}")
+            return None
+
+        if not await self._acquire(provider):
+            health.release_probe()
+            print(f"⚠️ {label} rate limit reached, skipping {ticker}")
+            return None
+
+        start = time.monotonic()
+        try:
+            url, params = build_request(ticker)
+            response = await self._client.get(url, params=params)
+            if response.status_code != 200:
+                health.record_failure(time.monotonic() - start, f"HTTP {response.status_code}",
+                                      retry_after=mp._retry_after(response.status_code, response.headers))
+                print(f"⚠️ {label} HTTP {response.status_code} for {ticker}")
+                return None
+            payload = response.json()
+        except Exception as e:
+            health.record_failure(time.monotonic() - start, type(e).__name__)
+            print(f"⚠️ {label} error for {ticker}: {e}")
+            return None
+
+        health.record_success(time.monotonic() - start)
+        return mp._handle_payload(provider, ticker, payload)
+
+    async def get_provider(self, provider: str, ticker: str) -> Optional[Dict]:
+        """Cached-or-fetched data for one (provider, ticker)."""
+        if not _API_KEYS[provider]():
+            return None
+
+        _, data_type, ttl, _, _ = mp.HTTP_PROVIDERS[provider]
+        cache_path = mp._get_cache_path(provider, ticker, data_type)
+        refresh = mp._coalesced(provider, ticker, lambda t: mp._fetch_http_provider(provider, t))
+        cached = mp._read_cache(cache_path, ttl, refresh=refresh)
+        if cached:
+            return cached
+
+        # Concurrent coroutines for the same key share one request
+        key = (provider, ticker)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(provider, ticker))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded: a cancelled waiter (e.g. a lost hedge) must not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def fetch_provider(self, provider: str, tickers: List[str]) -> Dict[str, Dict]:
+        """Fetch one provider for many tickers concurrently."""
+        results = await asyncio.gather(*(self.get_provider(provider, t) for t in tickers))
+        return {t: r for t, r in zip(tickers, results) if r}
+
+    # ------------------------------------------------------------------
+    # Cascade across providers
+    # ------------------------------------------------------------------
+
+    async def _get_yahoo(self, ticker: str) -> Optional[Dict]:
+        async with self._yahoo_slots:
+            return await asyncio.to_thread(mp.get_yfinance_data, ticker)
+
+    async def _try_quote(self, name: str, label: str, ticker: str) -> Optional[Dict]:
+        try:
+            if name == 'yfinance':
+                if not self.use_yahoo:
+                    return None
+                data = await self._get_yahoo(ticker)
+            else:
+                data = await self.get_provider(name, ticker)
+            if data and data.get('current_price'):
+                return data
+        except Exception as e:
+            print(f"⚠️ {label} exception for {ticker}: {e}")
+        return None
+
+    async def fetch_quote(self, ticker: str) -> Optional[Dict]:
+        """
+        Yahoo → Finnhub → MarketStack → Alpha Vantage, like
+        fetch_quote_multi_provider, including its hedging rules.
+        """
+        providers = [(name, label) for name, label, _ in mp._quote_providers()]
+        hedged = mp.HEDGED_REQUESTS and mp.HEDGE_AFTER_SECONDS > 0
+        queue = [p for p in providers if not hedged or p[0] not in mp.HEDGE_EXCLUDED_PROVIDERS]
+        reserves = [p for p in providers if p not in queue]
+        pending = {}  # task -> launched as a hedge?
+
+        def _launch(provider, hedge: bool):
+            queue.remove(provider)
+            pending[asyncio.ensure_future(self._try_quote(*provider, ticker))] = hedge
+            if hedge:
+                mp._record_hedge('hedges_fired')
+
+        if hedged:
+            mp._record_hedge('requests')
+        try:
+            while queue or pending:
+                if not pending:
+                    _launch(queue[0], hedge=False)
+
+                timeout = mp.HEDGE_AFTER_SECONDS if hedged and queue else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    hedge = pending.pop(task)
+                    data = task.result()
+                    if data:
+                        if hedge:
+                            mp._record_hedge('hedge_wins')
+                        return data
+
+                if not done:
+                    candidate = next((p for p in queue if mp._has_hedge_budget(p[0])), None)
+                    if candidate:
+                        _launch(candidate, hedge=True)
+                    else:
+                        mp._record_hedge('quota_skips')
+        finally:
+            # Losing HTTP calls can be dropped; a Yahoo thread keeps running and fills its cache
+            for task in pending:
+                task.cancel()
+
+        for name, label in reserves:
+            data = await self._try_quote(name, label, ticker)
+            if data:
+                return data
+
+        print(f"❌ All providers failed for {ticker}")
+        return None
+
+    async def fetch_quotes(self, tickers: List[str], concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Dict]:
+        """Run the cascade for every ticker, at most `concurrency` at a time."""
+        slots = asyncio.Semaphore(concurrency)
+
+        async def _one(ticker: str):
+            async with slots:
+                return ticker, await self.fetch_quote(ticker)
+
+        pairs = await asyncio.gather(*(_one(t) for t in tickers))
+        return {t: data for t, data in pairs if data}
+
+
+def _run(coro):
+    """Run a coroutine to completion from sync code, even inside a running loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def fetch_quotes(tickers: List[str], concurrency: int = DEFAULT_CONCURRENCY, use_yahoo: bool = True) -> Dict[str, Dict]:
+    """
+    Sync façade: cascade-fetch every ticker concurrently.
+    Returns dict mapping ticker -> unified quote data.
+    """
+    async def _main():
+        async with AsyncProviderClient(use_yahoo=use_yahoo) as client:
+            return await client.fetch_quotes(list(tickers), concurrency=concurrency)
+    return _run(_main())
+
+
+def fetch_provider_quotes(provider: str, tickers: List[str]) -> Dict[str, Dict]:
+    """Sync façade: fetch one provider for many tickers concurrently."""
+    async def _main():
+        async with AsyncProviderClient() as client:
+            return await client.fetch_provider(provider, list(tickers))
+    return _run(_main())
@@ -0,0 +1,236 @@
+"""
+Persistent cache of backtest results.
+
+A result is stored under a content hash of everything that determines it:
+tickers, date range, the engine's settings (capital, SMA windows,
+allocation, benchmarks, execution model), a fingerprint of the code that
+produces results (every module in RESULT_MODULES, the engine class and
+any custom strategy function) and the price store's data version for
+every ticker involved. Running the same backtest again, in this session or
+after a restart, loads the pickled result instead of simulating; changed
+prices or edited backtest code produce a new key (the data version only
+moves when stored values change, not on every refetch).
+
+Entries are files under .cache/backtests. A hit bumps the file's mtime,
+and writes evict the least recently used files until the directory fits
+in max_bytes.
+
+Usage:
+    from backtest_cache import cached_backtest
+    results = cached_backtest(BacktestEngine(initial_capital=50000), ['AAPL', 'MSFT'],
+                              '2023-01-01', '2024-01-01')
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks import EQUAL_WEIGHT
+from price_store import get_price_store
+
+CACHE_DIR = Path(__file__).parent / ".cache" / "backtests"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+FORMAT_VERSION = 1  # bump when the layout of cached results changes
+
+# Modules whose code shapes a backtest result; any edit invalidates cached runs
+RESULT_MODULES = (
+    'backtest_engine', 'backtest_kernel', 'backtest_stream', 'backtest_walkforward',
+    'benchmarks', 'bootstrap', 'execution', 'indicators', 'ledger',
+)
+
+
+def code_fingerprint(obj: Any) -> str:
+    """
+    Hash of a function's (or class's) source; falls back to its bytecode
+    and constants for code without source (lambdas in a REPL, builtins).
+    """
+    try:
+        text = inspect.getsource(obj)
+    except (OSError, TypeError):
+        code = getattr(obj, '__code__', None)
+        if code is None:
+            text = f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+        else:
+            text = code.co_code.hex() + repr(code.co_consts) + repr(code.co_names)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=1)
+def modules_fingerprint() -> Dict[str, str]:
+    """code_fingerprint of every module in RESULT_MODULES (the loaded code doesn't change in-process)."""
+    return {name: code_fingerprint(importlib.import_module(name)) for name in RESULT_MODULES}
+
+
+class BacktestCache:
+    """Pickled results on disk, keyed by content hash, LRU-evicted by total size."""
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def key(
+        self,
+        engine,
+        tickers: Sequence[str],
+        start_date: str,
+        end_date: str,
+        strategy_func: Optional[Callable] = None,
+    ) -> str:
+        """
+        Content hash for one run. Makes sure the price store covers the range
+        first, so the data versions in the key are the ones the run will see.
+        """
+        symbols = [t.upper() for t in tickers]
+        # SPY is always summarized as the headline benchmark
+        benchmark_symbols = sorted({'SPY'} | {b.upper() for b in engine.benchmarks} - {EQUAL_WEIGHT})
+        store = get_price_store()
+        store.ensure(symbols + benchmark_symbols, start_date, end_date)
+
+        strategy = {'modules': modules_fingerprint(), 'engine': code_fingerprint(type(engine))}
+        if strategy_func is not None:
+            strategy['name'] = f"{getattr(strategy_func, '__module__', '')}.{getattr(strategy_func, '__qualname__', '')}"
+            strategy['code'] = code_fingerprint(strategy_func)
+
+        payload = {
+            'format': FORMAT_VERSION,
+            'tickers': symbols,
+            'start_date': start_date,
+            'end_date': end_date,
+            'initial_capital': float(engine.initial_capital),
+            'fast_window': engine.fast_window,
+            'slow_window': engine.slow_window,
+            'allocation': float(engine.allocation),
+            'benchmarks': [b.upper() for b in engine.benchmarks],
+            'execution': engine.execution.to_dict() if engine.execution is not None else None,
+            'strategy': strategy,
+            'data_version': store.data_version(symbols + benchmark_symbols),
+        }
+        text = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result, or None on a miss (unreadable entries count as misses)."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"⚠️ Dropping unreadable backtest cache entry {key[:12]}: {e}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def set(self, key: str, result: Dict[str, Any]):
+        """Store a result atomically, then evict down to max_bytes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)  # readers see the old or the new file, never a partial one
+        except Exception as e:
+            print(f"⚠️ Backtest cache write failed: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.root.glob('*.pkl'):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue  # evicted by another process
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits; returns how many went."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+            total = sum(stat.st_size for _, stat in entries)
+            removed = 0
+            for path, stat in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= stat.st_size
+                removed += 1
+            return removed
+
+    def clear(self):
+        for path, _ in self._entries():
+            path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+
+_cache: Optional[BacktestCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_backtest_cache() -> BacktestCache:
+    """Process-wide result cache under .cache/backtests."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = BacktestCache()
+    return _cache
+
+
+def cached_backtest(
+    engine,
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    strategy_func: Optional[Callable] = None,
+    cache: Optional[BacktestCache] = None,
+) -> Dict[str, Any]:
+    """
+    engine.run_backtest(...) through the result cache. On a hit the engine
+    itself is not run (its trades and positions stay empty). Errors are not
+    cached, so a failed download is retried on the next call.
+    """
+    if cache is None:
+        cache = get_backtest_cache()
+    key = cache.key(engine, tickers, start_date, end_date, strategy_func)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    result = engine.run_backtest(tickers, start_date, end_date, strategy_func=strategy_func)
+    if 'error' not in result:
+        cache.set(key, result)
+    return result
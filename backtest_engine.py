@@ -5,9 +5,18 @@ Validates strategy performance with historical data
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Union, Callable
 from datetime import datetime, timedelta
-import yfinance as yf
+
+from backtest_kernel import run_momentum, summarize
+from bootstrap import bootstrap_distribution
+from backtest_stream import run_streaming
+from backtest_walkforward import run_walk_forward
+from benchmarks import EQUAL_WEIGHT, benchmark_summary, compare_benchmarks
+from execution import ExecutionModel, buy_fill
+from indicators import sma
+from ledger import EquityCurve, Position, TradeLedger
+from price_store import get_price_store
 
 
 class BacktestEngine:
@@ -16,12 +25,26 @@ class BacktestEngine:
     Provides Sharpe ratio, max drawdown, win rate, and benchmark comparisons
     """
     
-    def __init__(self, initial_capital: float = 100000):
+    def __init__(
+        self,
+        initial_capital: float = 100000,
+        fast_window: int = 20,
+        slow_window: int = 50,
+        allocation: float = 0.2,
+        benchmarks: List[str] = None,
+        execution: ExecutionModel = None
+    ):
         self.initial_capital = initial_capital
+        self.fast_window = fast_window
+        self.slow_window = slow_window
+        self.allocation = allocation
+        self.benchmarks = list(benchmarks) if benchmarks is not None else ['SPY', 'QQQ', EQUAL_WEIGHT]
+        self.execution = execution  # None = fill at the close with no costs
+        self.universe = []
         self.capital = initial_capital
-        self.positions = {}
-        self.trades = []
-        self.daily_values = []
+        self.positions: Dict[str, Position] = {}
+        self.trades = TradeLedger()
+        self.daily_values = EquityCurve()
         
     def run_backtest(
         self, 
@@ -42,6 +65,8 @@ class BacktestEngine:
         Returns:
             Dictionary with performance metrics
         """
+        self.universe = list(tickers)
+        
         # Download historical data
         try:
             data = self._fetch_historical_data(tickers, start_date, end_date)
@@ -51,12 +76,141 @@ class BacktestEngine:
         if data.empty:
             return {'error': 'No historical data available'}
         
-        # Run simulation
+        # Run simulation (vectorized kernel for the built-in strategy)
+        if strategy_func:
+            self._simulate_loop(data, strategy_func)
+        else:
+            self._simulate_vectorized(data)
+        
+        # Calculate metrics
+        metrics = self._calculate_metrics(start_date, end_date)
+        
+        return metrics
+    
+    def run_backtest_streaming(
+        self,
+        tickers: List[str],
+        start_date: str,
+        end_date: str,
+        strategy_func=None,
+        bar_func=None,
+        csv_dir: str = None,
+        output_dir: str = None,
+        benchmarks: List[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Bounded-memory backtest: bars are streamed per ticker in time order
+        instead of loaded into one DataFrame (see backtest_stream)
+        
+        Args:
+            tickers: List of stock symbols
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            strategy_func: Optional strategy_func(day_data, positions), as in run_backtest
+            bar_func: Optional bar_func(bar, indicators, positions) called per bar
+            csv_dir: Read <TICKER>.csv files from here instead of the price store
+            output_dir: Where the equity curve and trades CSVs are written
+            benchmarks: Benchmarks to compare with (default self.benchmarks, [] for none)
+            
+        Returns:
+            Same keys as run_backtest plus equity_path / trades_path, or {'error': ...}
+        """
+        self.universe = list(tickers)
+        return run_streaming(
+            self, tickers, start_date, end_date,
+            strategy_func=strategy_func,
+            bar_func=bar_func,
+            csv_dir=csv_dir,
+            output_dir=output_dir,
+            benchmarks=benchmarks
+        )
+    
+    def run_backtest_walk_forward(
+        self,
+        tickers: List[str],
+        start_date: str,
+        end_date: str,
+        train_days: int = 252,
+        test_days: int = 63,
+        fast_windows: List[int] = None,
+        slow_windows: List[int] = None,
+        allocations: List[float] = None,
+        max_workers: int = None
+    ) -> Dict[str, Any]:
+        """
+        Walk-forward backtest: parameters are re-chosen on each rolling
+        training window and traded on the following test window; metrics
+        cover the stitched out-of-sample period only (see backtest_walkforward)
+        
+        Args:
+            tickers: List of stock symbols
+            start_date: Start date (YYYY-MM-DD), training data included
+            end_date: End date (YYYY-MM-DD)
+            train_days: Trading days per training window
+            test_days: Trading days per test window
+            fast_windows / slow_windows / allocations: Grids searched per window
+                (default: this engine's own parameters)
+            max_workers: Worker processes for the windows
+            
+        The engine's execution model is applied to every window; it must
+        fill at the close without a participation cap (ValueError otherwise).
+            
+        Returns:
+            Dictionary with performance metrics plus 'windows' (per-window table)
+        """
+        self.universe = list(tickers)
+        result = run_walk_forward(
+            tickers, start_date, end_date,
+            train_days=train_days,
+            test_days=test_days,
+            fast_windows=fast_windows or [self.fast_window],
+            slow_windows=slow_windows or [self.slow_window],
+            allocations=allocations or [self.allocation],
+            initial_capital=self.initial_capital,
+            max_workers=max_workers,
+            execution=self.execution
+        )
+        if 'error' in result:
+            return result
+        
+        self.capital = result['values'][-1]
+        self.trades.extend(result['trades'])
+        self.daily_values.extend(result['dates'], result['values'])
+        
+        oos_start = str(result['dates'][0].date())
+        metrics = self._calculate_metrics(oos_start, end_date)
+        metrics['windows'] = result['windows']
+        return metrics
+    
+    def _simulate_vectorized(self, data: pd.DataFrame):
+        """Momentum strategy on dense dates × tickers arrays (see backtest_kernel)"""
+        result = run_momentum(
+            data,
+            self.initial_capital,
+            fast_col=f'sma_{self.fast_window}',
+            slow_col=f'sma_{self.slow_window}',
+            allocation=self.allocation,
+            execution=self.execution
+        )
+        
+        self.capital = result['cash']
+        self.positions = result['positions']
+        self.trades.extend(result['trades'])
+        self.daily_values.extend(result['dates'], result['values'])
+    
+    def _simulate_loop(self, data: pd.DataFrame, strategy_func=None):
+        """Per-date simulation; needed for custom strategies that see each day's rows"""
         dates = data.index.unique()
+        next_open = self.execution is not None and self.execution.next_open
+        pending = {}
         
         for date in dates:
             day_data = data.loc[date]
             
+            # Orders decided on the previous bar fill at this bar's open
+            if pending:
+                pending = self._execute_trades(pending, day_data, date, price_col='Open')
+            
             # Generate signals (simple momentum strategy if no custom strategy)
             if strategy_func:
                 signals = strategy_func(day_data, self.positions)
@@ -64,19 +218,14 @@ class BacktestEngine:
                 signals = self._simple_momentum_strategy(day_data)
             
             # Execute trades
-            self._execute_trades(signals, day_data, date)
+            if next_open:
+                pending.update(signals)
+            else:
+                self._execute_trades(signals, day_data, date)
             
             # Update portfolio value
             portfolio_value = self._calculate_portfolio_value(day_data)
-            self.daily_values.append({
-                'date': date,
-                'value': portfolio_value
-            })
-        
-        # Calculate metrics
-        metrics = self._calculate_metrics(start_date, end_date)
-        
-        return metrics
+            self.daily_values.append(date, portfolio_value)
     
     def _fetch_historical_data(
         self, 
@@ -84,19 +233,19 @@ class BacktestEngine:
         start_date: str, 
         end_date: str
     ) -> pd.DataFrame:
-        """Fetch historical price data from yfinance"""
+        """Fetch historical price data (local price store; only missing ranges are downloaded)"""
         data_frames = []
+        histories = get_price_store().get_histories(tickers, start_date, end_date)
         
         for ticker in tickers:
             try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(start=start_date, end=end_date)
+                hist = histories.get(ticker.upper(), pd.DataFrame()).copy()
                 
                 if not hist.empty:
                     hist['ticker'] = ticker
                     hist['returns'] = hist['Close'].pct_change()
-                    hist['sma_20'] = hist['Close'].rolling(20).mean()
-                    hist['sma_50'] = hist['Close'].rolling(50).mean()
+                    for window in sorted({20, 50, self.fast_window, self.slow_window}):
+                        hist[f'sma_{window}'] = sma(hist['Close'].to_numpy(), window)
                     data_frames.append(hist)
             except Exception as e:
                 print(f"⚠️ Failed to fetch {ticker}: {e}")
@@ -110,14 +259,15 @@ class BacktestEngine:
         Simple momentum strategy:
         - BUY if SMA20 > SMA50 (golden cross)
         - SELL if SMA20 < SMA50 (death cross)
+        (windows configurable via fast_window / slow_window)
         """
         signals = {}
         
         for ticker in day_data['ticker'].unique():
             ticker_data = day_data[day_data['ticker'] == ticker].iloc[0]
             
-            sma_20 = ticker_data.get('sma_20', 0)
-            sma_50 = ticker_data.get('sma_50', 0)
+            sma_20 = ticker_data.get(f'sma_{self.fast_window}', 0)
+            sma_50 = ticker_data.get(f'sma_{self.slow_window}', 0)
             
             if pd.notna(sma_20) and pd.notna(sma_50):
                 if sma_20 > sma_50 and ticker not in self.positions:
@@ -131,57 +281,55 @@ class BacktestEngine:
         self, 
         signals: Dict[str, str], 
         day_data: pd.DataFrame, 
-        date
-    ):
-        """Execute buy/sell orders"""
+        date,
+        price_col: str = 'Close'
+    ) -> Dict[str, str]:
+        """Execute buy/sell orders; returns the ones for tickers without a bar that day"""
+        unfilled = {}
         for ticker, action in signals.items():
             ticker_data = day_data[day_data['ticker'] == ticker]
             if ticker_data.empty:
+                unfilled[ticker] = action
                 continue
                 
-            price = ticker_data['Close'].iloc[0]
+            price = ticker_data[price_col].iloc[0]
+            volume = ticker_data['Volume'].iloc[0] if 'Volume' in ticker_data else None
+            self._fill_order(ticker, action, price, date, volume)
+        return unfilled
+    
+    def _fill_order(self, ticker: str, action: str, price: float, date, volume: float = None):
+        """Fill one BUY/SELL at price (shared by the per-date and streaming loops)"""
+        model = self.execution
+        commission = model.commission if model is not None else 0.0
+        
+        if action == 'BUY' and ticker not in self.positions:
+            # Buy with 20% (self.allocation) of available capital, less costs
+            if model is not None:
+                price = model.buy_price(price)
+            cap = model.share_cap(volume) if model is not None else np.inf
+            shares, allocation = buy_fill(self.capital * self.allocation, price, commission, cap)
+            if shares <= 0:
+                return
             
-            if action == 'BUY' and ticker not in self.positions:
-                # Buy with 20% of available capital
-                allocation = self.capital * 0.2
-                shares = allocation / price
-                
-                self.positions[ticker] = {
-                    'shares': shares,
-                    'buy_price': price,
-                    'buy_date': date
-                }
-                self.capital -= allocation
-                
-                self.trades.append({
-                    'date': date,
-                    'ticker': ticker,
-                    'action': 'BUY',
-                    'price': price,
-                    'shares': shares,
-                    'amount': allocation
-                })
+            self.positions[ticker] = Position(shares, price, date, allocation + commission)
+            self.capital -= allocation + commission
             
-            elif action == 'SELL' and ticker in self.positions:
-                position = self.positions[ticker]
-                shares = position['shares']
-                sell_value = shares * price
-                pnl = sell_value - (shares * position['buy_price'])
-                pnl_pct = (price / position['buy_price'] - 1) * 100
-                
-                self.capital += sell_value
-                del self.positions[ticker]
-                
-                self.trades.append({
-                    'date': date,
-                    'ticker': ticker,
-                    'action': 'SELL',
-                    'price': price,
-                    'shares': shares,
-                    'amount': sell_value,
-                    'pnl': pnl,
-                    'pnl_pct': pnl_pct
-                })
+            self.trades.record(date, ticker, 'BUY', price, shares, allocation,
+                               commission=commission if model is not None else np.nan)
+        
+        elif action == 'SELL' and ticker in self.positions:
+            if model is not None:
+                price = model.sell_price(price)
+            position = self.positions.pop(ticker)
+            shares = position.shares
+            sell_value = shares * price
+            pnl = sell_value - commission - position.cost_basis
+            pnl_pct = pnl / position.cost_basis * 100
+            
+            self.capital += sell_value - commission
+            
+            self.trades.record(date, ticker, 'SELL', price, shares, sell_value, pnl, pnl_pct,
+                               commission=commission if model is not None else np.nan)
     
     def _calculate_portfolio_value(self, day_data: pd.DataFrame) -> float:
         """Calculate current portfolio value"""
@@ -191,7 +339,7 @@ class BacktestEngine:
             ticker_data = day_data[day_data['ticker'] == ticker]
             if not ticker_data.empty:
                 current_price = ticker_data['Close'].iloc[0]
-                value += position['shares'] * current_price
+                value += position.shares * current_price
         
         return value
     
@@ -200,85 +348,28 @@ class BacktestEngine:
         if not self.daily_values:
             return {'error': 'No data to calculate metrics'}
         
-        df = pd.DataFrame(self.daily_values)
-        df.set_index('date', inplace=True)
-        
-        # Total return
-        final_value = df['value'].iloc[-1]
-        total_return = (final_value / self.initial_capital - 1) * 100
-        
-        # Calculate returns
-        df['returns'] = df['value'].pct_change()
-        
-        # Sharpe ratio (assuming 252 trading days, 2% risk-free rate)
-        excess_returns = df['returns'] - (0.02 / 252)
-        sharpe_ratio = np.sqrt(252) * excess_returns.mean() / df['returns'].std() if df['returns'].std() > 0 else 0
-        
-        # Max drawdown
-        df['cummax'] = df['value'].cummax()
-        df['drawdown'] = (df['value'] / df['cummax'] - 1) * 100
-        max_drawdown = df['drawdown'].min()
-        
-        # Win rate
-        winning_trades = [t for t in self.trades if t.get('pnl', 0) > 0]
-        total_trades = len([t for t in self.trades if 'pnl' in t])
-        win_rate = (len(winning_trades) / total_trades * 100) if total_trades > 0 else 0
-        
-        # Average win/loss
-        avg_win = np.mean([t['pnl_pct'] for t in winning_trades]) if winning_trades else 0
-        losing_trades = [t for t in self.trades if t.get('pnl', 0) < 0]
-        avg_loss = np.mean([t['pnl_pct'] for t in losing_trades]) if losing_trades else 0
-        
-        # Volatility
-        annual_volatility = df['returns'].std() * np.sqrt(252) * 100
+        # Equity and trade metrics in one pass over the arrays
+        # (252 trading days, 2% risk-free rate)
+        equity = self.daily_values.to_series()
+        metrics = summarize(equity.to_numpy(), self.trades, self.initial_capital)
         
         # Get benchmark (S&P 500) performance
         benchmark_metrics = self._calculate_benchmark(start_date, end_date)
+        benchmarks = compare_benchmarks(equity, start_date, end_date, self.benchmarks, self.universe)
         
         return {
-            'total_return': total_return,
-            'final_value': final_value,
-            'sharpe_ratio': sharpe_ratio,
-            'max_drawdown': max_drawdown,
-            'win_rate': win_rate,
-            'total_trades': total_trades,
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'avg_win': avg_win,
-            'avg_loss': avg_loss,
-            'annual_volatility': annual_volatility,
+            **metrics,
             'benchmark': benchmark_metrics,
-            'daily_values': df['value'].tolist(),
-            'dates': df.index.strftime('%Y-%m-%d').tolist(),
+            'benchmarks': benchmarks,
+            'daily_values': equity.tolist(),
+            'dates': equity.index.strftime('%Y-%m-%d').tolist(),
             'trades': self.trades
         }
     
     def _calculate_benchmark(self, start_date: str, end_date: str) -> Dict[str, float]:
-        """Calculate S&P 500 benchmark performance"""
+        """Calculate S&P 500 benchmark performance (memoized per date range, see benchmarks)"""
         try:
-            spy = yf.Ticker('SPY')
-            hist = spy.history(start=start_date, end=end_date)
-            
-            if hist.empty:
-                return {'return': 0, 'sharpe': 0, 'max_drawdown': 0}
-            
-            initial_price = hist['Close'].iloc[0]
-            final_price = hist['Close'].iloc[-1]
-            benchmark_return = (final_price / initial_price - 1) * 100
-            
-            hist['returns'] = hist['Close'].pct_change()
-            excess_returns = hist['returns'] - (0.02 / 252)
-            benchmark_sharpe = np.sqrt(252) * excess_returns.mean() / hist['returns'].std() if hist['returns'].std() > 0 else 0
-            
-            hist['cummax'] = hist['Close'].cummax()
-            hist['drawdown'] = (hist['Close'] / hist['cummax'] - 1) * 100
-            benchmark_drawdown = hist['drawdown'].min()
-            
-            return {
-                'return': benchmark_return,
-                'sharpe': benchmark_sharpe,
-                'max_drawdown': benchmark_drawdown
-            }
+            return benchmark_summary('SPY', start_date, end_date)
         except Exception as e:
             print(f"⚠️ Benchmark calculation failed: {e}")
             return {'return': 0, 'sharpe': 0, 'max_drawdown': 0}
@@ -305,7 +396,7 @@ class ConfidenceInterval:
         Returns:
             Dictionary with lower, upper bounds and confidence
         """
-        if not predictions or len(predictions) < 2:
+        if predictions is None or len(predictions) < 2:
             return {'lower': 0, 'upper': 0, 'confidence': 0}
         
         predictions = np.array(predictions)
@@ -334,29 +425,36 @@ class ConfidenceInterval:
     @staticmethod
     def bootstrap_confidence_interval(
         data: pd.DataFrame,
-        metric_func,
+        metric_func: Union[str, Callable],
         n_iterations: int = 1000,
-        confidence_level: float = 0.90
+        confidence_level: float = 0.90,
+        block_size: Optional[int] = None,
+        seed: Optional[int] = None,
+        n_jobs: int = 1,
+        column: Optional[str] = None
     ) -> Dict[str, float]:
         """
         Bootstrap confidence intervals for any metric
         
         Args:
             data: Input data
-            metric_func: Function to calculate metric
+            metric_func: Function to calculate metric, or the name of a
+                vectorized returns metric ('mean', 'sharpe', 'max_drawdown',
+                'win_rate', 'total_return', 'annual_volatility')
             n_iterations: Number of bootstrap iterations
             confidence_level: Confidence level
+            block_size: Block length for time series (moving-block bootstrap)
+            seed: Random seed for reproducible intervals
+            n_jobs: Worker processes for a Python metric_func
+            column: Returns column for a named metric on a multi-column DataFrame
             
         Returns:
             Confidence interval dictionary
         """
-        bootstrap_metrics = []
-        
-        for _ in range(n_iterations):
-            # Resample with replacement
-            sample = data.sample(frac=1.0, replace=True)
-            metric = metric_func(sample)
-            bootstrap_metrics.append(metric)
+        bootstrap_metrics = bootstrap_distribution(
+            data, metric_func, n_iterations,
+            block_size=block_size, seed=seed, n_jobs=n_jobs, column=column
+        )
         
         return ConfidenceInterval.calculate_prediction_ci(
             bootstrap_metrics, 
@@ -0,0 +1,340 @@
+"""
+Vectorized backtest kernel.
+
+Pivots the long (date, ticker) frame built by BacktestEngine into dense
+dates × tickers NumPy matrices, derives holdings for the momentum strategy
+as array operations, and only steps through the days on which a trade
+happens. Trades, cash and the equity curve match the per-date engine loop.
+"""
+
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from execution import ExecutionModel
+from indicators import sma
+from ledger import BUY, SELL, Position, TradeLedger
+
+
+class CellIndex:
+    """
+    Frame positions of (date row, ticker column) cells of a long frame,
+    found without pivoting. Cells of a ticker with a bar on every date
+    between its first and last are located arithmetically; gappy tickers
+    fall back to a binary search over the sorted cell codes.
+    """
+
+    def __init__(self, date_codes: np.ndarray, ticker_codes: np.ndarray, n_dates: int, n_tickers: int):
+        # The engine's frame is one ticker after another in date order, so
+        # ticker-major codes are usually sorted already and need no argsort
+        keys = ticker_codes * n_dates + date_codes
+        self.order = None
+        if len(keys) > 1 and (keys[1:] < keys[:-1]).any():
+            self.order = np.argsort(keys, kind='stable')
+            keys = keys[self.order]
+        self.keys = keys
+        self.n_dates = n_dates
+        self.start = np.searchsorted(keys, np.arange(n_tickers + 1) * n_dates)
+        counts = np.diff(self.start)
+        if len(keys):
+            self.first = keys[np.minimum(self.start[:-1], len(keys) - 1)] % n_dates
+            last = keys[np.maximum(self.start[1:] - 1, 0)] % n_dates
+        else:
+            self.first = last = np.zeros(n_tickers, dtype=np.int64)
+        self.contiguous = (counts > 0) & (last - self.first + 1 == counts)
+
+    def positions(self, rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(frame positions, found mask) for the cells; positions are only meaningful where found."""
+        rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+        if not len(self.keys):
+            return np.zeros(len(rows), dtype=np.int64), np.zeros(len(rows), dtype=bool)
+        offset = rows - self.first[cols]
+        slot = self.start[cols] + offset
+        found = self.contiguous[cols] & (offset >= 0) & (slot < self.start[cols + 1])
+        gappy = np.flatnonzero(~self.contiguous[cols])
+        if len(gappy):
+            wanted = cols[gappy] * self.n_dates + rows[gappy]
+            hit = np.minimum(np.searchsorted(self.keys, wanted), len(self.keys) - 1)
+            slot[gappy] = hit
+            found[gappy] = self.keys[hit] == wanted
+        slot = np.where(found, slot, 0)
+        return (slot if self.order is None else self.order[slot]), found
+
+
+class CellColumn:
+    """
+    One column of the long frame addressed like a dates × tickers matrix
+    without pivoting it: indexing with row and column arrays gathers just
+    those cells (NaN where the ticker has no row on that date). For columns
+    the kernel only reads at trade events, like Open and Volume.
+    """
+
+    def __init__(self, values: np.ndarray, index: CellIndex):
+        self.values = values
+        self.index = index
+
+    def __getitem__(self, cells: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        positions, found = self.index.positions(*cells)
+        out = np.full(len(found), np.nan)
+        out[found] = self.values[positions[found]]
+        return out
+
+
+def pivot_panel(
+    data: pd.DataFrame,
+    columns: Tuple[str, ...] = ('Close', 'sma_20', 'sma_50'),
+    cell_columns: Tuple[str, ...] = (),
+) -> Tuple[pd.DatetimeIndex, List[str], Dict[str, Any]]:
+    """
+    Long frame (Date index, 'ticker' column) -> (dates, tickers, {column: matrix}).
+    Tickers keep their order of appearance, like the engine's per-day rows;
+    a ticker with no row on a date is NaN there. cell_columns come back as
+    CellColumn lookups instead of dense matrices.
+    """
+    ticker_codes, tickers = pd.factorize(data['ticker'])
+    date_codes, date_values = pd.factorize(data.index)
+    order = np.argsort(date_values.values, kind='stable')
+    date_codes = np.argsort(order)[date_codes]  # codes in sorted-date order
+    dates = pd.DatetimeIndex(date_values.values[order], name=data.index.name)
+    flat = date_codes * len(tickers) + ticker_codes
+    matrices = {}
+    for col in columns:
+        matrix = np.full((len(dates), len(tickers)), np.nan)
+        matrix.ravel()[flat] = data[col].to_numpy(dtype=np.float64)
+        matrices[col] = matrix
+    if cell_columns:
+        index = CellIndex(date_codes, ticker_codes, len(dates), len(tickers))
+        for col in cell_columns:
+            matrices[col] = CellColumn(data[col].to_numpy(), index)
+    tickers = list(tickers)
+    return dates, tickers, matrices
+
+
+def ffill_rows(matrix: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column (leading NaNs stay NaN)."""
+    rows = np.arange(matrix.shape[0])[:, None]
+    last_valid = np.where(np.isnan(matrix), 0, rows)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return matrix[last_valid, np.arange(matrix.shape[1])]
+
+
+def rolling_mean_valid(matrix: np.ndarray, window: int) -> np.ndarray:
+    """
+    Per-column rolling mean over each ticker's own bars, like
+    indicators.sma on each history before pivoting: NaN gaps (dates a
+    ticker did not trade) are skipped rather than counted in the window.
+    """
+    out = np.full_like(matrix, np.nan)
+    valid = ~np.isnan(matrix)
+    dense = valid.all(axis=0)
+    if dense.any():
+        out[:, dense] = sma(matrix[:, dense], window)
+    for j in np.flatnonzero(~dense):
+        rows = valid[:, j]
+        out[rows, j] = sma(matrix[rows, j], window)
+    return out
+
+
+def momentum_holdings(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """
+    Holding state per (date, ticker): enter when fast > slow, exit when
+    fast < slow, otherwise keep the previous state. Because every buy
+    signal is filled, the state does not depend on cash, so it is just the
+    forward-filled sign of the crossover.
+    """
+    with np.errstate(invalid='ignore'):
+        sign = np.where(fast > slow, 1.0, np.where(fast < slow, -1.0, np.nan))
+    return ffill_rows(sign) > 0
+
+
+def delay_to_next_bar(held: np.ndarray, has_bar: np.ndarray) -> np.ndarray:
+    """
+    Holding state when each change decided on a bar is filled on the
+    ticker's next bar (the next row where has_bar is set).
+    """
+    gaps = ~has_bar[1:]
+    if not gaps.any():
+        delayed = np.zeros_like(held)
+        delayed[1:] = held[:-1]
+        return delayed
+    delayed = np.full(held.shape, np.nan)
+    delayed[1:] = held[:-1]
+    delayed[0] = 0.0
+    delayed[1:][gaps] = np.nan  # no bar: the order waits
+    return ffill_rows(delayed) > 0
+
+
+def simulate(
+    dates: pd.DatetimeIndex,
+    tickers: List[str],
+    close: np.ndarray,
+    held: np.ndarray,
+    initial_capital: float,
+    allocation: float = 0.2,
+    execution: Optional[ExecutionModel] = None,
+    open_: Optional[Any] = None,
+    volume: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Fill the holding changes in `held` at the close, visiting only event days.
+
+    Within a day, orders run in ticker order; each buy spends `allocation`
+    of the cash left at that point and each sell returns the full position,
+    exactly like BacktestEngine._execute_trades. Portfolio value is cash
+    plus the held shares at that day's close (a ticker without a bar that
+    day contributes nothing, as before).
+
+    With an ExecutionModel, fill prices, slippage and volume caps are
+    gathered for the event cells only, up front (open_ is needed for
+    next-bar-open fills, volume for participation caps; either may be a
+    matrix or a CellColumn); the event loop only adds the commission and
+    the cap check per trade. An entry that cannot be filled is skipped
+    until the next crossover. Next-bar fills wait for the ticker's next
+    row with a close.
+
+    Returns dict with 'values' (equity per date), 'trades' (TradeLedger),
+    'cash' and 'positions' (final open positions in the engine's format).
+    """
+    n_dates, n_tickers = close.shape
+    fill = close
+    commission = 0.0
+    if execution is not None:
+        commission = execution.commission
+        if execution.next_open:
+            held = delay_to_next_bar(held, ~np.isnan(close))
+            fill = open_
+
+    previous = np.zeros_like(held)
+    previous[1:] = held[:-1]
+    buys = held & ~previous
+    sells = previous & ~held
+    events = buys | sells
+    event_rows = np.flatnonzero(events.any(axis=1))
+
+    # Per-event inputs gathered in loop order (row by row, tickers in order)
+    # as Python floats, so the sequential cash walk does no array indexing
+    ev_rows, ev_cols = np.nonzero(events)
+    ev_buy = buys[ev_rows, ev_cols]
+    ev_price = fill[ev_rows, ev_cols]
+    ev_cap = itertools.repeat(np.inf)
+    if execution is not None:
+        ev_price = np.where(ev_buy, execution.buy_price(ev_price), execution.sell_price(ev_price))
+        if execution.max_participation is not None:
+            ev_cap = np.nan_to_num(execution.share_cap(volume[ev_rows, ev_cols]), nan=0.0).tolist()
+    ev_price = ev_price.tolist()
+
+    cash = float(initial_capital)
+    shares = [0.0] * n_tickers
+    buy_price = [0.0] * n_tickers
+    buy_row = [0] * n_tickers
+    cost_basis = [0.0] * n_tickers
+    cash_after = np.empty(len(event_rows))
+    filled = []  # (row, column, action, price, shares, amount, pnl, pnl_pct, shares held after) per trade
+
+    k, last_row = -1, -1
+    for row, j, is_buy, price, limit in zip(ev_rows.tolist(), ev_cols.tolist(), ev_buy.tolist(), ev_price, ev_cap):
+        if row != last_row:
+            if k >= 0:
+                cash_after[k] = cash
+            k, last_row = k + 1, row
+        if is_buy:
+            # Inline buy_fill: this loop is the only sequential part of the kernel
+            amount = cash * allocation - commission
+            qty = amount / price
+            if qty > limit:
+                qty = limit
+                amount = qty * price
+            if qty <= 0:
+                continue
+            cash -= amount + commission
+            shares[j], buy_price[j], buy_row[j] = qty, price, row
+            cost_basis[j] = amount + commission
+            filled.append((row, j, BUY, price, qty, amount, np.nan, np.nan, qty))
+        elif shares[j] > 0:
+            qty = shares[j]
+            amount = qty * price
+            cash += amount - commission
+            pnl = amount - commission - cost_basis[j]
+            filled.append((row, j, SELL, price, qty, amount, pnl, pnl / cost_basis[j] * 100, 0.0))
+            shares[j] = 0.0
+    if k >= 0:
+        cash_after[k] = cash
+
+    # State in force on each date = state after the latest event on or before it
+    slot = np.searchsorted(event_rows, np.arange(n_dates), side='right') - 1
+    has_state = slot >= 0
+    cash_path = np.full(n_dates, float(initial_capital))
+    cash_path[has_state] = cash_after[slot[has_state]]
+    share_path = np.full((n_dates, n_tickers), np.nan)
+    share_path[0] = 0.0
+
+    trades = TradeLedger(tickers)
+    if filled:
+        cols = np.array(filled, dtype=np.float64).T
+        fill_rows, fill_cols = cols[0].astype(np.int64), cols[1].astype(np.int64)
+        share_path[fill_rows, fill_cols] = cols[8]
+        trades.append_columns({
+            'date': dates.values[fill_rows],
+            'ticker': fill_cols,
+            'action': cols[2],
+            'price': cols[3],
+            'shares': cols[4],
+            'amount': cols[5],
+            'pnl': cols[6],
+            'pnl_pct': cols[7],
+            'commission': commission if execution is not None else np.nan,
+        }, tickers)
+    share_path = ffill_rows(share_path)
+    values = cash_path + np.nansum(share_path * close, axis=1)
+
+    positions = {
+        tickers[j]: Position(shares[j], buy_price[j], dates[buy_row[j]], cost_basis[j])
+        for j in range(n_tickers) if shares[j] > 0
+    } if n_dates else {}
+
+    return {'values': values, 'trades': trades, 'cash': cash, 'positions': positions}
+
+
+def run_momentum(
+    data: pd.DataFrame,
+    initial_capital: float,
+    fast_col: str = 'sma_20',
+    slow_col: str = 'sma_50',
+    allocation: float = 0.2,
+    execution: Optional[ExecutionModel] = None,
+) -> Dict[str, Any]:
+    """Momentum crossover backtest on the engine's long frame; see simulate()."""
+    # Open and Volume are only read at trade events: look those cells up
+    # instead of pivoting two more full matrices
+    cell_columns = []
+    if execution is not None and execution.next_open:
+        cell_columns.append('Open')
+    if execution is not None and execution.max_participation is not None:
+        cell_columns.append('Volume')
+    dates, tickers, m = pivot_panel(data, ('Close', fast_col, slow_col), tuple(cell_columns))
+    held = momentum_holdings(m[fast_col], m[slow_col])
+    result = simulate(dates, tickers, m['Close'], held, initial_capital, allocation,
+                      execution, m.get('Open'), m.get('Volume'))
+    result['dates'] = dates
+    return result
+
+
+def summarize(values: np.ndarray, trades: TradeLedger, initial_capital: float) -> Dict[str, float]:
+    """
+    Headline metrics from an equity curve and its trades, using the same
+    formulas as BacktestEngine._calculate_metrics (252 days, 2% risk-free).
+    """
+    returns = values[1:] / values[:-1] - 1 if len(values) > 1 else np.empty(0)
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    sharpe = np.sqrt(252) * (returns - 0.02 / 252).mean() / std if std > 0 else 0
+    drawdown = (values / np.maximum.accumulate(values) - 1) * 100 if len(values) else np.zeros(1)
+    return {
+        'total_return': (values[-1] / initial_capital - 1) * 100 if len(values) else 0.0,
+        'final_value': values[-1] if len(values) else initial_capital,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': drawdown.min(),
+        'annual_volatility': std * np.sqrt(252) * 100,
+        **trades.closed_stats(),
+    }
@@ -0,0 +1,365 @@
+"""
+Event-driven streaming backtester.
+
+Instead of concatenating every ticker's history into one DataFrame, each
+ticker is read as an iterator of bars (from the local price store or a CSV
+file) and the iterators are merged in time order with heapq.merge. Only
+per-ticker indicator windows, open positions and a small output buffer are
+held in memory; the equity curve and the trades are appended to CSV files
+as the simulation runs, and metrics are accumulated in a single pass. The
+result also carries the equity curve and trades as compact arrays
+(EquityCurve, TradeLedger: memory grows with dates and trades, not bars),
+so it has the same keys as BacktestEngine.run_backtest.
+
+Benchmarks never load the universe: the equal-weight benchmark is
+accumulated from the streamed bars, and other symbols are one series
+each, read from csv_dir/<SYMBOL>.csv in CSV mode (skipped without one, so
+a CSV run stays offline) or from the price store.
+
+Strategies can be either:
+    strategy_func(day_data, positions) -> {ticker: 'BUY'|'SELL'}
+        the BacktestEngine contract, called once per timestamp with that
+        timestamp's rows (same columns as the in-memory engine), or
+    bar_func(bar, indicators, positions) -> 'BUY' | 'SELL' | None
+        called for every bar as it arrives; the order is filled at once.
+"""
+
+import csv
+import heapq
+import itertools
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import EQUAL_WEIGHT, benchmark_returns, compare_return_series
+from indicators import SMA
+from ledger import EquityCurve, TradeLedger
+from price_store import get_price_store
+
+OUTPUT_DIR = Path(__file__).parent / ".cache" / "streams"  # .cache/backtests belongs to backtest_cache
+FLUSH_EVERY = 256  # rows buffered before the CSV writers flush
+TRADE_FIELDS = ['date', 'ticker', 'action', 'price', 'shares', 'amount', 'pnl', 'pnl_pct', 'commission']
+
+
+class Bar(NamedTuple):
+    date: pd.Timestamp
+    ticker: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+# ============================================================================
+# BAR SOURCES
+# ============================================================================
+
+def store_bars(ticker: str, start_date: str, end_date: str, store=None) -> Iterator[Bar]:
+    """Bars for one ticker from the local price store (range must be covered; see PriceStore.ensure)."""
+    store = store or get_price_store()
+    for row in store.iter_bars(ticker, start_date, end_date):
+        yield Bar(row[0], ticker, *row[1:])
+
+
+def csv_bars(path, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Bar]:
+    """
+    Bars from a CSV with a Date (or Datetime) column and Open/High/Low/Close/Volume,
+    e.g. a Yahoo Finance export. Rows must be in time order; intraday timestamps work.
+    """
+    start = pd.Timestamp(start_date) if start_date else None
+    end = pd.Timestamp(end_date) if end_date else None
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            date = pd.Timestamp(row.get('Date') or row.get('Datetime'))
+            if date.tzinfo is not None:
+                date = date.tz_localize(None)
+            if start is not None and date < start:
+                continue
+            if end is not None and date >= end:
+                break
+            yield Bar(date, ticker, float(row['Open']), float(row['High']), float(row['Low']),
+                      float(row['Close']), float(row.get('Volume') or 0))
+
+
+def merge_bars(sources: List[Iterator[Bar]], tickers: List[str]) -> Iterator[Bar]:
+    """Time-ordered merge; bars with the same timestamp come in tickers order."""
+    order = {t: i for i, t in enumerate(tickers)}
+    return heapq.merge(*sources, key=lambda bar: (bar.date, order.get(bar.ticker, len(order))))
+
+
+# ============================================================================
+# STREAMING STATE
+# ============================================================================
+
+class IndicatorState:
+    """Streaming SMAs (O(1) per bar) and the last close for one ticker."""
+
+    __slots__ = ('smas', 'prev_close')
+
+    def __init__(self, sma_windows: List[int]):
+        self.smas = {w: SMA(w) for w in sma_windows}
+        self.prev_close = None
+
+    def update(self, close: float) -> Dict[str, float]:
+        values = {'returns': close / self.prev_close - 1 if self.prev_close else np.nan}
+        for w, sma in self.smas.items():
+            values[f'sma_{w}'] = sma.update(close)
+        self.prev_close = close
+        return values
+
+
+class StreamingMetrics:
+    """Single-pass version of BacktestEngine._calculate_metrics (Welford for the return variance)."""
+
+    def __init__(self, initial_capital: float):
+        self.initial_capital = initial_capital
+        self.n_returns = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last_value = None
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+        self.closed = 0
+        self.wins = 0
+        self.losses = 0
+        self.win_pct_sum = 0.0
+        self.loss_pct_sum = 0.0
+
+    def add_value(self, value: float):
+        if self.last_value is not None:
+            r = value / self.last_value - 1
+            self.n_returns += 1
+            delta = r - self.mean
+            self.mean += delta / self.n_returns
+            self.m2 += delta * (r - self.mean)
+        self.peak = max(self.peak, value)
+        self.max_drawdown = min(self.max_drawdown, (value / self.peak - 1) * 100)
+        self.last_value = value
+
+    def add_trade(self, trade: Dict[str, Any]):
+        if 'pnl' not in trade:
+            return
+        self.closed += 1
+        if trade['pnl'] > 0:
+            self.wins += 1
+            self.win_pct_sum += trade['pnl_pct']
+        elif trade['pnl'] < 0:
+            self.losses += 1
+            self.loss_pct_sum += trade['pnl_pct']
+
+    def result(self) -> Dict[str, Any]:
+        std = math.sqrt(self.m2 / (self.n_returns - 1)) if self.n_returns > 1 else 0.0
+        final_value = self.last_value if self.last_value is not None else self.initial_capital
+        return {
+            'total_return': (final_value / self.initial_capital - 1) * 100,
+            'final_value': final_value,
+            'sharpe_ratio': np.sqrt(252) * (self.mean - 0.02 / 252) / std if std > 0 else 0,
+            'max_drawdown': self.max_drawdown,
+            'win_rate': self.wins / self.closed * 100 if self.closed else 0,
+            'total_trades': self.closed,
+            'winning_trades': self.wins,
+            'losing_trades': self.losses,
+            'avg_win': self.win_pct_sum / self.wins if self.wins else 0,
+            'avg_loss': self.loss_pct_sum / self.losses if self.losses else 0,
+            'annual_volatility': std * np.sqrt(252) * 100,
+        }
+
+
+def momentum_bar_func(fast_window: int = 20, slow_window: int = 50) -> Callable:
+    """Per-bar version of BacktestEngine._simple_momentum_strategy."""
+    fast_col, slow_col = f'sma_{fast_window}', f'sma_{slow_window}'
+
+    def _signal(bar: Bar, indicators: Dict[str, float], positions: Dict) -> Optional[str]:
+        fast, slow = indicators[fast_col], indicators[slow_col]
+        if np.isnan(fast) or np.isnan(slow):
+            return None
+        if fast > slow and bar.ticker not in positions:
+            return 'BUY'
+        if fast < slow and bar.ticker in positions:
+            return 'SELL'
+        return None
+
+    return _signal
+
+
+def _benchmark_series(symbol: str, start_date: str, end_date: str, csv_dir: Optional[str]) -> pd.Series:
+    """Returns of one benchmark symbol from csv_dir/<SYMBOL>.csv (empty without one) or the price store."""
+    if not csv_dir:
+        return benchmark_returns(symbol, start_date, end_date)
+    path = Path(csv_dir) / f"{symbol}.csv"
+    if not path.exists():
+        return pd.Series(dtype=np.float64)
+    closes = EquityCurve()
+    for bar in csv_bars(path, symbol, start_date, end_date):
+        closes.append(bar.date, bar.close)
+    return closes.to_series().pct_change().iloc[1:]
+
+
+def _format_dates(dates: pd.DatetimeIndex) -> List[str]:
+    """YYYY-MM-DD for daily bars; intraday bars keep their time of day."""
+    if (dates == dates.normalize()).all():
+        return dates.strftime('%Y-%m-%d').tolist()
+    return dates.strftime('%Y-%m-%d %H:%M:%S').tolist()
+
+
+def _day_frame(date: pd.Timestamp, rows: List[tuple], sma_windows: List[int]) -> pd.DataFrame:
+    """One timestamp's rows in the in-memory engine's layout."""
+    columns = ['Open', 'High', 'Low', 'Close', 'Volume', 'ticker', 'returns'] + [f'sma_{w}' for w in sma_windows]
+    records = [
+        (bar.open, bar.high, bar.low, bar.close, bar.volume, bar.ticker, ind['returns'],
+         *(ind[f'sma_{w}'] for w in sma_windows))
+        for bar, ind in rows
+    ]
+    return pd.DataFrame.from_records(records, columns=columns,
+                                     index=pd.DatetimeIndex([date] * len(records), name='Date'))
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def run_streaming(
+    engine,
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    strategy_func: Optional[Callable] = None,
+    bar_func: Optional[Callable] = None,
+    csv_dir: Optional[str] = None,
+    output_dir: Optional[Path] = None,
+    benchmarks: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Stream bars through engine's order filling and return its metrics.
+
+    Bars come from csv_dir/<TICKER>.csv when csv_dir is given, otherwise
+    from the local price store. Without strategy_func or bar_func the
+    engine's momentum rule runs per bar. The equity curve and trades are
+    written to output_dir (default .cache/streams); engine.trades is
+    emptied after every step so memory stays bounded.
+
+    benchmarks defaults to engine.benchmarks; pass [] to skip them. The
+    'benchmark' summary is SPY's when SPY is among them, zeros otherwise.
+
+    Returns the same keys as run_backtest ('dates', 'daily_values',
+    'trades', 'benchmark', 'benchmarks' and the metrics) plus
+    'equity_path', 'trades_path' and 'bars', or {'error': ...}.
+    """
+    sma_windows = sorted({20, 50, engine.fast_window, engine.slow_window})
+    if strategy_func is None and bar_func is None:
+        bar_func = momentum_bar_func(engine.fast_window, engine.slow_window)
+
+    if csv_dir:
+        missing = [t for t in tickers if not (Path(csv_dir) / f"{t}.csv").exists()]
+        if missing:
+            return {'error': f"No CSV file in {csv_dir} for {', '.join(missing)}"}
+        sources = [csv_bars(Path(csv_dir) / f"{t}.csv", t, start_date, end_date) for t in tickers]
+    else:
+        store = get_price_store()
+        store.ensure(tickers, start_date, end_date)
+        sources = [store_bars(t, start_date, end_date, store) for t in tickers]
+
+    output_dir = Path(output_dir or OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    equity_path = output_dir / f"equity_{stamp}.csv"
+    trades_path = output_dir / f"trades_{stamp}.csv"
+
+    states = {t: IndicatorState(sma_windows) for t in tickers}
+    metrics = StreamingMetrics(engine.initial_capital)
+    equity = EquityCurve()
+    equal_weight = EquityCurve()  # mean return of the tickers with a bar, per timestamp
+    trades = TradeLedger()
+    next_open = engine.execution is not None and engine.execution.next_open
+    pending: Dict[str, str] = {}  # next-open orders waiting for the ticker's next bar
+    n_bars = n_steps = 0
+
+    with open(equity_path, 'w', newline='') as equity_file, open(trades_path, 'w', newline='') as trades_file:
+        equity_writer = csv.writer(equity_file)
+        equity_writer.writerow(['date', 'value', 'cash', 'positions'])
+        trades_writer = csv.DictWriter(trades_file, fieldnames=TRADE_FIELDS)
+        trades_writer.writeheader()
+
+        for date, group in itertools.groupby(merge_bars(sources, tickers), key=lambda bar: bar.date):
+            prices = {}
+            volumes = {}
+            rows = []
+            step_returns = []
+            for bar in group:
+                n_bars += 1
+                if bar.ticker in pending:
+                    engine._fill_order(bar.ticker, pending.pop(bar.ticker), bar.open, date, bar.volume)
+                indicators = states[bar.ticker].update(bar.close)
+                if not np.isnan(indicators['returns']):
+                    step_returns.append(indicators['returns'])
+                prices[bar.ticker] = bar.close
+                volumes[bar.ticker] = bar.volume
+                if bar_func is not None:
+                    action = bar_func(bar, indicators, engine.positions)
+                    if action and next_open:
+                        pending[bar.ticker] = action
+                    elif action:
+                        engine._fill_order(bar.ticker, action, bar.close, date, bar.volume)
+                else:
+                    rows.append((bar, indicators))
+
+            if strategy_func is not None:
+                signals = strategy_func(_day_frame(date, rows, sma_windows), engine.positions)
+                for ticker, action in signals.items():
+                    if next_open:
+                        pending[ticker] = action
+                    elif ticker in prices:
+                        engine._fill_order(ticker, action, prices[ticker], date, volumes[ticker])
+
+            # Same valuation as _calculate_portfolio_value: held tickers without a bar count 0
+            value = engine.capital + sum(
+                pos.shares * prices[t] for t, pos in engine.positions.items() if t in prices
+            )
+            metrics.add_value(value)
+            equity.append(date, value)
+            if n_steps:
+                equal_weight.append(date, sum(step_returns) / len(step_returns) if step_returns else np.nan)
+            equity_writer.writerow([date.isoformat(), value, engine.capital, len(engine.positions)])
+
+            for trade in engine.trades:
+                metrics.add_trade(trade)
+                trades_writer.writerow({**trade, 'date': trade['date'].isoformat()})
+            trades.extend(engine.trades)
+            engine.trades.clear()
+
+            n_steps += 1
+            if n_steps % FLUSH_EVERY == 0:
+                equity_file.flush()
+                trades_file.flush()
+
+    if n_steps == 0:
+        return {'error': 'No historical data available'}
+
+    result = metrics.result()
+    series = equity.to_series()
+    returns = {}
+    for symbol in (engine.benchmarks if benchmarks is None else benchmarks):
+        symbol = symbol.upper()
+        try:
+            if symbol == EQUAL_WEIGHT:
+                returns[symbol] = equal_weight.to_series().dropna()
+            else:
+                returns[symbol] = _benchmark_series(symbol, start_date, end_date, csv_dir)
+        except Exception as e:
+            print(f"⚠️ Benchmark {symbol} unavailable: {e}")
+    result['benchmarks'] = compare_return_series(series, returns)
+    spy = result['benchmarks'].get('SPY')
+    result['benchmark'] = {key: spy[key] for key in ('return', 'sharpe', 'max_drawdown')} if spy \
+        else {'return': 0, 'sharpe': 0, 'max_drawdown': 0}
+    result['daily_values'] = series.tolist()
+    result['dates'] = _format_dates(series.index)
+    result['trades'] = trades
+    result['equity_path'] = str(equity_path)
+    result['trades_path'] = str(trades_path)
+    result['bars'] = n_bars
+    return result
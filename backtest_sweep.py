@@ -0,0 +1,237 @@
+"""
+Parameter sweeps over the momentum backtest.
+
+Prices for every ticker and period in the sweep are loaded once (through
+the local price store) into a dates × tickers close matrix placed in shared
+memory. Worker processes attach to it by name instead of unpickling
+DataFrames, run the vectorized kernel for their share of the grid, and the
+results come back as one table ranked by the chosen metric.
+
+Usage:
+    from backtest_sweep import run_sweep
+    table = run_sweep(
+        ['AAPL', 'MSFT', 'NVDA'], '2015-01-01', '2025-01-01',
+        fast_windows=[10, 20, 30], slow_windows=[50, 100, 200],
+        allocations=[0.1, 0.2, 0.3],
+    )
+"""
+
+import itertools
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest_kernel import momentum_holdings, rolling_mean_valid, simulate, summarize
+from price_store import get_price_store
+
+SMA_CACHE_SIZE = 16  # SMA matrices kept per worker (each is dates × tickers floats)
+
+Period = Tuple[str, str]
+
+# Worker-side state, set by _init_worker (or directly when running in-process)
+_shm: Optional[shared_memory.SharedMemory] = None
+_close: Optional[np.ndarray] = None
+_dates: Optional[pd.DatetimeIndex] = None
+_tickers: List[str] = []
+_sma_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], dates: np.ndarray, tickers: List[str]):
+    """Attach to the parent's close matrix (no copy)."""
+    global _shm, _close, _dates, _tickers
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _close = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    _dates = pd.DatetimeIndex(dates)
+    _tickers = tickers
+    _sma_cache.clear()
+
+
+def _detach_worker():
+    """Drop the in-process view so the shared block can be released."""
+    global _shm, _close
+    _close = None
+    _sma_cache.clear()
+    if _shm is not None:
+        _shm.close()
+        _shm = None
+
+
+def _period_rows(period: Optional[Period]) -> slice:
+    if period is None:
+        return slice(0, len(_dates))
+    start, end = _dates.searchsorted(pd.Timestamp(period[0])), _dates.searchsorted(pd.Timestamp(period[1]))
+    return slice(start, end)
+
+
+def _sma(period: Optional[Period], window: int) -> np.ndarray:
+    """
+    SMA matrix for all tickers over one period (warm-up starts at the period
+    start, like the engine), or over the whole matrix when period is None.
+    """
+    key = (period, window)
+    if key in _sma_cache:
+        _sma_cache.move_to_end(key)
+        return _sma_cache[key]
+    sma = rolling_mean_valid(_close[_period_rows(period)], window)
+    _sma_cache[key] = sma
+    if len(_sma_cache) > SMA_CACHE_SIZE:
+        _sma_cache.popitem(last=False)
+    return sma
+
+
+def _run_variant(variant: Dict) -> Dict:
+    """Backtest one parameter combination against the shared matrix."""
+    period = (variant['start'], variant['end'])
+    rows = _period_rows(period)
+    cols = [_tickers.index(t) for t in variant['tickers']]
+
+    close = _close[rows][:, cols]
+    keep = ~np.isnan(close).all(axis=1)  # dates on which none of these tickers traded
+    close = close[keep]
+    fast = _sma(period, variant['fast'])[:, cols][keep]
+    slow = _sma(period, variant['slow'])[:, cols][keep]
+
+    result = simulate(_dates[rows][keep], variant['tickers'], close, momentum_holdings(fast, slow),
+                      variant['initial_capital'], variant['allocation'])
+    return {**variant, **summarize(result['values'], result['trades'], variant['initial_capital'])}
+
+
+def _run_chunk(variants: List[Dict]) -> List[Dict]:
+    return [_run_variant(v) for v in variants]
+
+
+def map_shared(
+    func: Callable,
+    items: Sequence,
+    close_data: Tuple[pd.DatetimeIndex, List[str], np.ndarray],
+    workers: int,
+) -> List:
+    """
+    func over items with the close matrix in shared memory; func runs in
+    worker processes attached via _init_worker (in-process when workers == 1).
+    """
+    dates, matrix_tickers, close = close_data
+    shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+    try:
+        np.ndarray(close.shape, dtype=np.float64, buffer=shm.buf)[:] = close
+        init_args = (shm.name, close.shape, dates.values, matrix_tickers)
+
+        if workers == 1:
+            _init_worker(*init_args)
+            return [func(item) for item in items]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as executor:
+            return list(executor.map(func, items))
+    finally:
+        if workers == 1:
+            _detach_worker()
+        shm.close()
+        shm.unlink()
+
+
+def build_grid(
+    tickers: Sequence[str],
+    start_date: str,
+    end_date: str,
+    fast_windows: Sequence[int] = (20,),
+    slow_windows: Sequence[int] = (50,),
+    allocations: Sequence[float] = (0.2,),
+    ticker_sets: Optional[Sequence[Sequence[str]]] = None,
+    periods: Optional[Sequence[Period]] = None,
+    initial_capital: float = 100000,
+) -> List[Dict]:
+    """Every valid combination (fast < slow), ordered so neighbours reuse SMAs."""
+    ticker_sets = [list(s) for s in ticker_sets] if ticker_sets else [list(tickers)]
+    periods = list(periods) if periods else [(start_date, end_date)]
+    grid = []
+    for (start, end), universe, fast, slow, allocation in itertools.product(
+        periods, ticker_sets, fast_windows, slow_windows, allocations
+    ):
+        if fast >= slow:
+            continue
+        grid.append({
+            'start': start,
+            'end': end,
+            'tickers': [t.upper() for t in universe],
+            'fast': fast,
+            'slow': slow,
+            'allocation': allocation,
+            'initial_capital': initial_capital,
+        })
+    return grid
+
+
+def load_close_matrix(tickers: Sequence[str], start_date: str, end_date: str) -> Tuple[pd.DatetimeIndex, List[str], np.ndarray]:
+    """Dates × tickers close prices from the price store (NaN where a ticker has no bar)."""
+    histories = get_price_store().get_histories(list(tickers), start_date, end_date)
+    if not histories:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+    closes = pd.DataFrame({t: h['Close'] for t, h in histories.items()}).sort_index()
+    return pd.DatetimeIndex(closes.index), list(closes.columns), closes.to_numpy(dtype=np.float64)
+
+
+def run_sweep(
+    tickers: Sequence[str],
+    start_date: str,
+    end_date: str,
+    fast_windows: Sequence[int] = (10, 20, 30),
+    slow_windows: Sequence[int] = (50, 100, 200),
+    allocations: Sequence[float] = (0.1, 0.2, 0.3),
+    ticker_sets: Optional[Sequence[Sequence[str]]] = None,
+    periods: Optional[Sequence[Period]] = None,
+    initial_capital: float = 100000,
+    rank_by: str = 'sharpe_ratio',
+    max_workers: Optional[int] = None,
+    close_data: Optional[Tuple[pd.DatetimeIndex, List[str], np.ndarray]] = None,
+) -> pd.DataFrame:
+    """
+    Backtest every combination of the parameter grids and rank them.
+
+    Args:
+        tickers: Universe (used when ticker_sets is not given)
+        start_date / end_date: Period (used when periods is not given)
+        fast_windows / slow_windows: SMA windows to cross (pairs with fast >= slow are skipped)
+        allocations: Fraction of cash spent per buy
+        ticker_sets: Optional list of universes to compare
+        periods: Optional list of (start, end) periods to compare
+        rank_by: Metric column to sort by (descending; max_drawdown is least negative first)
+        max_workers: Worker processes (default: CPU count; 1 runs in-process)
+        close_data: Preloaded (dates, tickers, close matrix) instead of the price store
+
+    Returns:
+        DataFrame with one row per variant, best first, with a 'rank' column
+    """
+    grid = build_grid(tickers, start_date, end_date, fast_windows, slow_windows, allocations,
+                      ticker_sets, periods, initial_capital)
+    if not grid:
+        return pd.DataFrame()
+
+    if close_data is None:
+        universe = sorted({t for v in grid for t in v['tickers']})
+        span = (min(v['start'] for v in grid), max(v['end'] for v in grid))
+        close_data = load_close_matrix(universe, *span)
+    dates, matrix_tickers, close = close_data
+
+    # Variants can only use tickers that have data
+    available = set(matrix_tickers)
+    for variant in grid:
+        variant['tickers'] = [t for t in variant['tickers'] if t in available]
+    grid = [v for v in grid if v['tickers']]
+    if not grid:
+        return pd.DataFrame()
+
+    workers = max_workers or os.cpu_count() or 1
+    # Contiguous chunks keep variants that share SMAs on the same worker
+    chunk_size = len(grid) if workers == 1 else max(1, len(grid) // (workers * 4))
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+    rows = [row for chunk in map_shared(_run_chunk, chunks, close_data, workers) for row in chunk]
+
+    table = pd.DataFrame(rows)
+    table['tickers'] = table['tickers'].map(lambda ts: ','.join(ts))
+    table = table.sort_values(rank_by, ascending=False, kind='stable').reset_index(drop=True)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table
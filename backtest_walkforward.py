@@ -0,0 +1,212 @@
+"""
+Walk-forward backtests of the momentum strategy.
+
+The close matrix is cut into rolling windows: each one picks the best
+parameters (fast/slow SMA, allocation) on its training rows and then trades
+them, untouched, on the test rows that follow. Windows run in parallel on
+the shared-memory matrix from backtest_sweep, and SMAs are computed once
+over the whole history per worker and sliced for every window, so
+overlapping windows never recompute them (test windows also start with
+warm indicators instead of a fresh warm-up).
+
+The test equity curves are chained into one out-of-sample curve. Each test
+window starts in cash with the capital the previous one ended with;
+positions still open at its end are sold at the ticker's last close in the
+window, so every window's exits are recorded trades.
+
+An ExecutionModel applies to training and test runs alike. Only close
+fills are supported (the shared matrix holds closes only), so models with
+next-open fills or a participation cap are rejected. A flat commission is
+not proportional to capital, so with one the test windows are traded again
+in order, each with the capital the previous one actually ended with,
+instead of being rescaled.
+
+Usage:
+    from backtest_walkforward import run_walk_forward
+    result = run_walk_forward(
+        ['AAPL', 'MSFT', 'NVDA'], '2015-01-01', '2025-01-01',
+        train_days=504, test_days=126,
+        fast_windows=[10, 20, 30], slow_windows=[50, 100, 200],
+    )
+"""
+
+import itertools
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import backtest_sweep as sweep
+from backtest_kernel import momentum_holdings, simulate, summarize
+from execution import ExecutionModel
+from ledger import TradeLedger
+
+
+def build_windows(n_dates: int, train_days: int, test_days: int, step_days: Optional[int] = None) -> List[Tuple[slice, slice]]:
+    """(train rows, test rows) pairs; the test rows follow their training rows directly."""
+    step_days = step_days or test_days
+    windows = []
+    start = 0
+    while start + train_days < n_dates:
+        train = slice(start, start + train_days)
+        test = slice(start + train_days, min(start + train_days + test_days, n_dates))
+        windows.append((train, test))
+        start += step_days
+    return windows
+
+
+def _simulate_rows(rows: slice, fast: int, slow: int, allocation: float, initial_capital: float,
+                   execution: Optional[ExecutionModel] = None, close_out: bool = False) -> Dict:
+    """Momentum backtest on a row range; close_out sells what is still held at each ticker's last bar."""
+    close = sweep._close[rows]
+    keep = ~np.isnan(close).all(axis=1)  # dates on which no ticker traded
+    close = close[keep]
+    held = momentum_holdings(sweep._sma(None, fast)[rows][keep], sweep._sma(None, slow)[rows][keep])
+    if close_out and len(close):
+        # Flat from each ticker's last priced row on, so the exit fills at a real close
+        priced = ~np.isnan(close)
+        last = len(close) - 1 - priced[::-1].argmax(axis=0)
+        held[np.arange(len(close))[:, None] >= last[None, :]] = False
+    result = simulate(sweep._dates[rows][keep], sweep._tickers, close, held, initial_capital, allocation, execution)
+    result['dates'] = sweep._dates[rows][keep]
+    result['capital'] = initial_capital
+    return result
+
+
+def _run_window(task: Dict) -> Dict:
+    """Pick parameters on the training rows, then trade them on the test rows."""
+    best, best_score = None, -np.inf
+    for fast, slow, allocation in task['grid']:
+        result = _simulate_rows(task['train'], fast, slow, allocation, task['initial_capital'], task['execution'])
+        score = summarize(result['values'], result['trades'], task['initial_capital'])[task['rank_by']]
+        if best is None or score > best_score:
+            best, best_score = (fast, slow, allocation), score
+
+    test = _simulate_rows(task['test'], *best, task['initial_capital'], task['execution'], close_out=True)
+    return {
+        'fast': best[0],
+        'slow': best[1],
+        'allocation': best[2],
+        f"train_{task['rank_by']}": best_score,
+        'dates': test['dates'],
+        'values': test['values'],
+        'trades': test['trades'],
+        'capital': test['capital'],
+    }
+
+
+def _run_tests_chained(windows: List[Dict]) -> List[Dict]:
+    """Trade the chosen parameters on each test window in order, starting with the previous window's final capital."""
+    capital = windows[0]['initial_capital']
+    results = []
+    for window in windows:
+        test = _simulate_rows(window['test'], window['fast'], window['slow'], window['allocation'],
+                              capital, window['execution'], close_out=True)
+        results.append(test)
+        if len(test['values']):
+            capital = float(test['values'][-1])
+    return results
+
+
+def run_walk_forward(
+    tickers: Sequence[str],
+    start_date: str,
+    end_date: str,
+    train_days: int = 252,
+    test_days: int = 63,
+    step_days: Optional[int] = None,
+    fast_windows: Sequence[int] = (10, 20, 30),
+    slow_windows: Sequence[int] = (50, 100, 200),
+    allocations: Sequence[float] = (0.2,),
+    initial_capital: float = 100000,
+    rank_by: str = 'sharpe_ratio',
+    max_workers: Optional[int] = None,
+    close_data: Optional[Tuple[pd.DatetimeIndex, List[str], np.ndarray]] = None,
+    execution: Optional[ExecutionModel] = None,
+) -> Dict:
+    """
+    Rolling train/test backtest with stitched out-of-sample results.
+
+    Args:
+        tickers: Universe
+        start_date / end_date: Full period (training data included)
+        train_days / test_days: Window lengths in trading days
+        step_days: Distance between window starts (default test_days, so
+            test windows tile the period without overlap)
+        fast_windows / slow_windows / allocations: Parameter grid searched
+            on each training window (pairs with fast >= slow are skipped)
+        rank_by: summarize() metric maximized on the training rows
+        max_workers: Worker processes (default: CPU count; 1 runs in-process)
+        close_data: Preloaded (dates, tickers, close matrix) instead of the price store
+        execution: Optional ExecutionModel with close fills (commission, slippage)
+
+    Returns:
+        Dict with 'windows' (DataFrame of chosen parameters and test metrics
+        per window), 'dates', 'values' (stitched out-of-sample equity),
+        'trades' (scaled to the stitched capital) and the summarize()
+        metrics of the stitched curve
+    """
+    if execution is not None and (execution.next_open or execution.max_participation is not None):
+        raise ValueError("Walk-forward runs on close prices only: next_open fills and "
+                         "max_participation are not supported")
+    grid = [(f, s, a) for f, s, a in itertools.product(fast_windows, slow_windows, allocations) if f < s]
+    if not grid:
+        return {'error': 'Empty parameter grid'}
+
+    if close_data is None:
+        close_data = sweep.load_close_matrix([t.upper() for t in tickers], start_date, end_date)
+    dates = close_data[0]
+    windows = build_windows(len(dates), train_days, test_days, step_days)
+    if not windows:
+        return {'error': f'Need more than {train_days} trading days of data for one window'}
+
+    tasks = [
+        {'train': train, 'test': test, 'grid': grid, 'initial_capital': initial_capital, 'rank_by': rank_by,
+         'execution': execution}
+        for train, test in windows
+    ]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    results = sweep.map_shared(_run_window, tasks, close_data, workers)
+
+    if execution is not None and execution.commission:
+        chained = [{**task, **result} for task, result in zip(tasks, results)]
+        tests = sweep.map_shared(_run_tests_chained, [chained], close_data, 1)[0]
+        results = [{**result, **test} for result, test in zip(results, tests)]
+
+    # Chain the test windows: without a flat fee simulate() is linear in
+    # capital, so each window is rescaled to the capital the previous one
+    # ended with (windows already traded with that capital keep scale 1)
+    capital = float(initial_capital)
+    stitched_dates, stitched_values, rows = [], [], []
+    trades = TradeLedger()
+    for (train, test), result in zip(windows, results):
+        scale = capital / result['capital']
+        values = result['values'] * scale
+        trades.extend(result['trades'].scaled(scale))
+        # Per-window metrics as if the window had started with initial_capital
+        unit = initial_capital / result['capital']
+        window_summary = summarize(result['values'] * unit, result['trades'].scaled(unit), initial_capital)
+        rows.append({
+            'train_start': dates[train.start],
+            'test_start': dates[test.start],
+            'test_end': dates[test.stop - 1],
+            'fast': result['fast'],
+            'slow': result['slow'],
+            'allocation': result['allocation'],
+            f'train_{rank_by}': result[f'train_{rank_by}'],
+            **{f'test_{key}': value for key, value in window_summary.items()},
+        })
+        stitched_dates.append(result['dates'])
+        stitched_values.append(values)
+        if len(values):
+            capital = float(values[-1])
+
+    values = np.concatenate(stitched_values)
+    return {
+        'windows': pd.DataFrame(rows),
+        'dates': pd.DatetimeIndex(np.concatenate([d.values for d in stitched_dates])),
+        'values': values,
+        'trades': trades,
+        **summarize(values, trades, initial_capital),
+    }
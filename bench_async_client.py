@@ -0,0 +1,124 @@
+"""
+Async Client Benchmark
+Wall-clock time to fetch N tickers from a local stub Finnhub server:
+  before: small thread pool, bare requests.get (new connection per call)
+  after:  async_client over pooled keep-alive connections
+
+The stub adds a per-request latency and a per-connection setup cost to
+stand in for network RTT and the TCP+TLS handshake.
+
+Usage:
+    python bench_async_client.py [--tickers 50] [--latency 0.05] [--handshake 0.03]
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import multi_provider as mp
+from async_client import fetch_provider_quotes
+from memory_cache import get_memory_cache
+from rate_limiter import MINUTE, RateLimiter
+
+
+def _make_handler(latency: float, handshake: float):
+    class StubFinnhubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # allow keep-alive
+
+        def setup(self):
+            super().setup()
+            time.sleep(handshake)  # simulated connection setup
+
+        def do_GET(self):
+            time.sleep(latency)
+            symbol = parse_qs(urlparse(self.path).query).get("symbol", ["X"])[0]
+            body = json.dumps({"c": 100.0, "d": 1.0, "dp": 1.0, "h": 101.0, "l": 99.0,
+                               "o": 99.5, "pc": 99.0, "symbol": symbol}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubFinnhubHandler
+
+
+class _StubServer(ThreadingHTTPServer):
+    request_queue_size = 128  # default backlog of 5 drops concurrent connects
+    daemon_threads = True
+
+
+def _legacy_fetch(base_url: str, ticker: str, lock: threading.Lock, delay: float):
+    """Previous pattern: bare requests.get inside a provider lock, then sleep."""
+    with lock:
+        response = requests.get(f"{base_url}/api/v1/quote?symbol={ticker}&token=bench", timeout=10)
+        data = response.json()
+        time.sleep(delay)
+        return data
+
+
+def run(n_tickers: int, latency: float, handshake: float, legacy_delay: float, workers: int):
+    server = _StubServer(("127.0.0.1", 0), _make_handler(latency, handshake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_async_"))
+    mp.CACHE_DIR = workdir
+    mp.FINNHUB_API_KEY = "bench"
+    mp.FINNHUB_BASE_URL = base_url
+    mp._rate_limiters["finnhub"] = RateLimiter("bench_finnhub", [(1_000_000, MINUTE)], persist=False)
+    get_memory_cache().clear()
+
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+
+    try:
+        lock = threading.Lock()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda t: _legacy_fetch(base_url, t, lock, legacy_delay), tickers))
+        before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = fetch_provider_quotes("finnhub", tickers)
+        after = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print(f"📊 ASYNC CLIENT BENCHMARK ({n_tickers} tickers)")
+    print("=" * 60)
+    print(f"   Stub latency:        {latency * 1000:.0f} ms/request, {handshake * 1000:.0f} ms/connection")
+    print(f"   Before (threads={workers}, lock + {legacy_delay:.2f}s sleep): {before:.2f} s")
+    print(f"   After  (async, pooled):            {after:.2f} s")
+    print(f"   Fetched:  {len(results)}/{n_tickers}")
+    print(f"   Speedup:  {before / max(after, 1e-9):.1f}x")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request")
+    parser.add_argument("--handshake", type=float, default=0.03, help="Seconds per new connection")
+    parser.add_argument("--legacy-delay", type=float, default=0.0,
+                        help="Sleep inside the lock in the 'before' run (old FINNHUB_DELAY was 1.0)")
+    parser.add_argument("--workers", type=int, default=3, help="Thread pool size in the 'before' run")
+    args = parser.parse_args()
+    run(args.tickers, args.latency, args.handshake, args.legacy_delay, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Backtest Kernel Benchmark
+Per-date pandas loop (BacktestEngine._simulate_loop) vs the vectorized
+kernel (backtest_kernel) on synthetic random-walk prices.
+
+1. Equivalence: both engines on a small universe must produce the same
+   trades and the same metrics.
+2. Speed: the full universe (default 500 tickers × 10 years). The legacy
+   loop's cost per day is constant, so by default it runs on the first
+   --legacy-days days and is extrapolated; pass --legacy-days 0 to run it
+   in full (tens of minutes). The first days fall in the SMA warm-up with
+   no trades or positions, so the extrapolation understates the loop.
+3. Cost model overhead: the kernel again with commission and slippage,
+   then also with a volume-participation cap and next-bar-open fills.
+   Open and Volume are only looked up at trade cells, so the full model
+   should stay within 10% of the plain kernel.
+
+Usage:
+    python bench_backtest.py [--tickers 500] [--years 10] [--legacy-days 60]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BacktestEngine
+from execution import ExecutionModel
+
+TRADING_DAYS = 252
+
+
+def make_data(n_tickers: int, years: float, seed: int = 7) -> pd.DataFrame:
+    """Long frame shaped like BacktestEngine._fetch_historical_data output."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2010-01-04", periods=int(years * TRADING_DAYS), name="Date")
+    frames = []
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates))))
+        opens = close * (1 + rng.normal(0, 0.004, len(dates)))
+        hist = pd.DataFrame({"Open": opens, "Close": close, "Volume": 1_000_000}, index=dates)
+        hist["ticker"] = f"T{i:03d}"
+        hist["returns"] = hist["Close"].pct_change()
+        hist["sma_20"] = hist["Close"].rolling(20).mean()
+        hist["sma_50"] = hist["Close"].rolling(50).mean()
+        frames.append(hist)
+    return pd.concat(frames)
+
+
+def _metrics(engine: BacktestEngine, data: pd.DataFrame) -> dict:
+    engine._calculate_benchmark = lambda start, end: {"return": 0, "sharpe": 0, "max_drawdown": 0}
+    engine.benchmarks = []
+    return engine._calculate_metrics(str(data.index.min().date()), str(data.index.max().date()))
+
+
+def check_equivalence(n_tickers: int, years: float):
+    data = make_data(n_tickers, years, seed=11)
+
+    legacy = BacktestEngine()
+    legacy._simulate_loop(data)
+    fast = BacktestEngine()
+    fast._simulate_vectorized(data)
+
+    assert len(legacy.trades) == len(fast.trades), (len(legacy.trades), len(fast.trades))
+    for a, b in zip(legacy.trades, fast.trades):
+        assert a.keys() == b.keys() and a["date"] == b["date"] and a["ticker"] == b["ticker"] and a["action"] == b["action"]
+        for key in ("price", "shares", "amount", "pnl", "pnl_pct"):
+            if key in a:
+                assert np.isclose(a[key], b[key], rtol=1e-9), (key, a, b)
+
+    m_legacy, m_fast = _metrics(legacy, data), _metrics(fast, data)
+    for key, value in m_legacy.items():
+        if isinstance(value, (int, float, np.floating)):
+            assert np.isclose(value, m_fast[key], rtol=1e-9), (key, value, m_fast[key])
+    assert np.allclose(m_legacy["daily_values"], m_fast["daily_values"], rtol=1e-9)
+    print(f"   Equivalence ({n_tickers} tickers × {years:g}y): {len(fast.trades)} identical trades, metrics match")
+
+
+def _best_time(func, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _overhead(data: pd.DataFrame, model: ExecutionModel, repeat: int = 15) -> float:
+    """
+    Runtime added by an execution model, in percent. Runs with and without
+    it alternate so machine noise hits both sides alike; the median ratio
+    of each pair is reported.
+    """
+    ratios = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        BacktestEngine()._simulate_vectorized(data)
+        plain = time.perf_counter() - start
+        start = time.perf_counter()
+        BacktestEngine(execution=model)._simulate_vectorized(data)
+        ratios.append((time.perf_counter() - start) / plain)
+    return (float(np.median(ratios)) - 1) * 100
+
+
+def run(n_tickers: int, years: float, legacy_days: int):
+    print("\n" + "=" * 60)
+    print(f"📊 BACKTEST KERNEL BENCHMARK ({n_tickers} tickers × {years:g} years)")
+    print("=" * 60)
+    check_equivalence(20, 3)
+
+    data = make_data(n_tickers, years)
+    n_dates = data.index.nunique()
+
+    vectorized = _best_time(lambda: BacktestEngine()._simulate_vectorized(data))
+    fees = ExecutionModel(commission=1.0, slippage_bps=5)
+    full = ExecutionModel(commission=1.0, slippage_bps=5, max_participation=0.05, fill_at="next_open")
+    overhead = {name: _overhead(data, model) for name, model in (("fees", fees), ("full", full))}
+
+    legacy_data = data
+    if legacy_days:
+        legacy_dates = data.index.unique()[:legacy_days]
+        legacy_data = data[data.index.isin(legacy_dates)]
+    start = time.perf_counter()
+    BacktestEngine()._simulate_loop(legacy_data)
+    legacy = time.perf_counter() - start
+    measured_days = legacy_data.index.nunique()
+    legacy_full = legacy * n_dates / measured_days
+
+    note = "" if measured_days == n_dates else f"  (extrapolated from {measured_days} days: {legacy:.2f} s)"
+    print(f"   Dates × tickers:   {n_dates} × {n_tickers}")
+    print(f"   Legacy loop:       {legacy_full:.1f} s{note}")
+    print(f"   Vectorized kernel: {vectorized:.3f} s")
+    print(f"   Speedup:           {legacy_full / vectorized:.0f}x")
+    print(f"   + fees/slippage:   {overhead['fees']:+.1f}% (median of interleaved runs)")
+    print(f"   + cap, next open:  {overhead['full']:+.1f}%")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=float, default=10)
+    parser.add_argument("--legacy-days", type=int, default=60,
+                        help="Days of the legacy loop to time before extrapolating (0 = all)")
+    args = parser.parse_args()
+    run(args.tickers, args.years, args.legacy_days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Cache Storage Benchmark
+Compares the legacy single-JSON cache against the SQLite-backed CacheStore.
+
+Usage:
+    python bench_cache.py [--sizes 100 1000 10000] [--ops 200]
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from cache_store import CacheStore
+
+
+def _sample_record(ticker: str) -> dict:
+    """Stock record shaped like data_sources.get_stock_data output."""
+    return {
+        "success": True,
+        "ticker": ticker,
+        "name": f"{ticker} Corporation",
+        "price": 123.45,
+        "change": 1.23,
+        "pe": 21.5,
+        "marketCap": 250.0,
+        "dividend": 0.8,
+        "rsi": 55.2,
+        "volume": 12_000_000,
+        "sector": "Technology",
+    }
+
+
+class LegacyJSONCache:
+    """The previous cache_manager behaviour: whole-file read-modify-write."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        with self.path.open("r") as f:
+            return json.load(f)
+
+    def _save(self, cache: dict):
+        with self.path.open("w") as f:
+            json.dump(cache, f, indent=2)
+
+    def get(self, key: str):
+        entry = self._load().get(key)
+        if not entry or time.time() - entry.get("cached_at", 0) > 300:
+            return None
+        return entry.get("data")
+
+    def set(self, key: str, value: dict):
+        cache = self._load()
+        cache[key] = {"cached_at": time.time(), "data": value}
+        self._save(cache)
+
+    def bulk_load(self, tickers):
+        now = time.time()
+        self._save({t: {"cached_at": now, "data": _sample_record(t)} for t in tickers})
+
+
+def _time_ops(func, keys) -> float:
+    """Return mean milliseconds per call."""
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) * 1000 / len(keys)
+
+
+def run(sizes, n_ops: int):
+    workdir = Path(tempfile.mkdtemp(prefix="bench_cache_"))
+    rng = random.Random(42)
+
+    print("\n" + "=" * 72)
+    print("📊 CACHE STORAGE BENCHMARK (mean ms per operation)")
+    print("=" * 72)
+    print(f"{'tickers':>8} | {'json get':>10} {'json set':>10} | {'sqlite get':>10} {'sqlite set':>10} | {'speedup':>8}")
+    print("-" * 72)
+
+    try:
+        for size in sizes:
+            tickers = [f"T{i:05d}" for i in range(size)]
+            read_keys = [rng.choice(tickers) for _ in range(n_ops)]
+            write_keys = [rng.choice(tickers) for _ in range(n_ops)]
+
+            legacy = LegacyJSONCache(workdir / f"legacy_{size}.json")
+            legacy.bulk_load(tickers)
+            json_get = _time_ops(legacy.get, read_keys)
+            json_set = _time_ops(lambda k: legacy.set(k, _sample_record(k)), write_keys)
+
+            store = CacheStore(workdir / f"store_{size}.sqlite3")
+            store.set_many((t, _sample_record(t)) for t in tickers)
+            sql_get = _time_ops(store.get, read_keys)
+            sql_set = _time_ops(lambda k: store.set(k, _sample_record(k)), write_keys)
+            store.close()
+
+            speedup = (json_get + json_set) / max(sql_get + sql_set, 1e-9)
+            print(f"{size:>8} | {json_get:>10.3f} {json_set:>10.3f} | {sql_get:>10.3f} {sql_set:>10.3f} | {speedup:>7.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 72)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--ops", type=int, default=200, help="Random gets/sets timed per size")
+    args = parser.parse_args()
+    run(args.sizes, args.ops)
+
+
+if __name__ == "__main__":
+    main()
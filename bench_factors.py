@@ -0,0 +1,109 @@
+"""
+Factor Analysis Benchmark
+Tests 200 candidate factors against the score of 5,000 synthetic stocks
+with quant_engine.factor_statistics (one vectorized pass) and compares it
+with the old per-factor loop (stats.pearsonr plus boolean-indexed medians
+and group statistics for every factor).
+
+A handful of factors carry real signal; the rest are noise, so the
+Benjamini–Hochberg line shows how many noise factors a raw p < 0.05 cut
+would have let through.
+
+Usage:
+    python bench_factors.py [--stocks 5000] [--factors 200] [--signal 10]
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from quant_engine import FactorAnalysisEngine, benjamini_hochberg, factor_statistics
+
+
+def make_factors(n_stocks: int, n_factors: int, n_signal: int, seed: int = 7) -> pd.DataFrame:
+    """Stocks × factors with ~5% missing values; the first n_signal factors drive the score."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_stocks, n_factors))
+    score = 5 + X[:, :n_signal] @ rng.uniform(0.05, 0.2, n_signal) + rng.normal(size=n_stocks)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    data = pd.DataFrame(X, columns=[f"factor_{i:03d}" for i in range(n_factors)])
+    data['score'] = score
+    return data
+
+
+def legacy_factor_loop(data: pd.DataFrame, columns) -> list:
+    """The per-factor loop analyze_factors used before (correlation, p-value, Cohen's d)."""
+    target = data['score']
+    results = []
+    for col in columns:
+        factor_data = pd.to_numeric(data[col], errors='coerce')
+        valid_mask = ~(factor_data.isna() | target.isna())
+        if valid_mask.sum() < 3:
+            continue
+        correlation, p_value = stats.pearsonr(factor_data[valid_mask], target[valid_mask])
+        high_score = target[valid_mask] > target[valid_mask].median()
+        low_score = ~high_score
+        mean_diff = factor_data[valid_mask][high_score].mean() - factor_data[valid_mask][low_score].mean()
+        pooled_std = np.sqrt((factor_data[valid_mask][high_score].std()**2 +
+                             factor_data[valid_mask][low_score].std()**2) / 2)
+        results.append((correlation, p_value, mean_diff / pooled_std if pooled_std > 0 else 0))
+    return results
+
+
+def best_time(func, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def run(n_stocks: int, n_factors: int, n_signal: int):
+    data = make_factors(n_stocks, n_factors, n_signal)
+    columns = [c for c in data.columns if c != 'score']
+    X = data[columns].to_numpy()
+    y = data['score'].to_numpy()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        legacy = best_time(lambda: legacy_factor_loop(data, columns), repeat=1)
+        reference = legacy_factor_loop(data, columns)
+    vectorized = best_time(lambda: factor_statistics(X, y))
+    engine = best_time(lambda: FactorAnalysisEngine(data, {c: c for c in columns}).analyze_factors())
+
+    result = factor_statistics(X, y)
+    max_diff = max(
+        np.nanmax(np.abs(result['correlation'] - np.array([r[0] for r in reference]))),
+        np.nanmax(np.abs(result['effect_size'] - np.array([r[2] for r in reference]))),
+    )
+    raw = result['p_value'] < 0.05
+    adjusted = benjamini_hochberg(result['p_value']) < 0.05
+
+    print("\n" + "=" * 60)
+    print(f"📊 FACTOR ANALYSIS BENCHMARK ({n_stocks} stocks × {n_factors} factors)")
+    print("=" * 60)
+    print(f"   Legacy loop:       {legacy:.3f} s")
+    print(f"   factor_statistics: {vectorized:.3f} s  ({legacy / vectorized:.0f}x)")
+    print(f"   analyze_factors:   {engine:.3f} s  (incl. DataFrame coercion and BH)")
+    print(f"   Max |diff|:        {max_diff:.2e}  (correlation / Cohen's d vs legacy)")
+    print(f"   Significant:       raw p<0.05: {raw.sum()} ({raw[n_signal:].sum()} noise)  "
+          f"BH q<0.05: {adjusted.sum()} ({adjusted[n_signal:].sum()} noise)")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=5000)
+    parser.add_argument("--factors", type=int, default=200)
+    parser.add_argument("--signal", type=int, default=10, help="Factors that actually drive the score")
+    args = parser.parse_args()
+    run(args.stocks, args.factors, args.signal)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Universe Screener Benchmark
+Screens a synthetic universe of 5,000 tickers with screener.screen_universe
+and compares it with the per-stock path the app uses for its 15 tickers
+(calculate_health_score + calculate_ai_score per record, then fresh
+IsolationForest and MiniBatchKMeans fits on every run).
+
+Two sources are timed:
+- records: stock records in memory (the local snapshot / static CSV path)
+- price store: 60 days of daily bars per ticker read from a temporary
+  price store (RSI, change and volume computed from the bars)
+
+Models are saved to a temporary directory, so the first screen is cold
+(fits) and the second warm (scores with the saved models).
+
+Usage:
+    python bench_screener.py [--tickers 5000] [--top-k 25] [--chunk-size 1000]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import price_store
+import quant_engine
+from health_scoring import calculate_health_score
+from price_store import PriceStore
+from quant_engine import AnomalyDetector, MarketSegmentation
+from scoring import calculate_ai_score
+from screener import screen_universe
+
+
+def make_records(n_tickers: int, seed: int = 11) -> dict:
+    """Synthetic stock records shaped like data_sources output."""
+    rng = np.random.default_rng(seed)
+    pe = rng.lognormal(3, 0.6, n_tickers).round(1).astype(object)
+    pe[rng.random(n_tickers) < 0.1] = 'N/A'
+    records = {}
+    for i in range(n_tickers):
+        ticker = f"S{i:05d}"
+        records[ticker] = {
+            'success': True,
+            'ticker': ticker,
+            'name': f"Synthetic {i}",
+            'price': float(rng.lognormal(4, 1)),
+            'change': float(rng.normal(0, 3)),
+            'pe': pe[i],
+            'marketCap': float(rng.lognormal(2, 1.5)),
+            'dividend': float(max(rng.normal(1.5, 1.5), 0)),
+            'rsi': float(rng.uniform(10, 90)),
+            'volume': float(rng.lognormal(14, 1.5)),
+            'sector': 'Synthetic',
+        }
+    return records
+
+
+def make_downloader(n_days: int, seed: int = 12):
+    """Downloader for PriceStore that returns random-walk bars instead of Yahoo data."""
+    def download(tickers, start, end):
+        dates = pd.bdate_range(start, end - pd.Timedelta(days=1))[-n_days:]
+        frames = {}
+        for ticker in tickers:
+            rng = np.random.default_rng(seed + int(ticker[1:]))
+            close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+            frames[ticker] = pd.DataFrame({
+                'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                'Volume': rng.lognormal(14, 1, len(dates)),
+            }, index=pd.DatetimeIndex(dates, name='Date'))
+        return frames
+    return download
+
+
+def legacy_screen(records: dict, top_k: int) -> list:
+    """Per-record scoring and fresh model fits (the app's per-ticker path)."""
+    enriched = []
+    for record in records.values():
+        health = calculate_health_score(record)
+        enriched.append({**record, 'health_score': health['score'], 'health_grade': health['grade'],
+                         'score': calculate_ai_score(record, health_score=health['score'], sentiment_score=0.0)})
+    frame = pd.DataFrame(enriched)
+    AnomalyDetector(frame, persist=False).detect_anomalies()
+    MarketSegmentation(frame, persist=False).perform_clustering()
+    enriched.sort(key=lambda r: r['score'], reverse=True)
+    return enriched[:top_k]
+
+
+def run(n_tickers: int, top_k: int, chunk_size: int, days: int):
+    tmp = Path(tempfile.mkdtemp())
+    quant_engine.MODEL_DIR = tmp / "models"
+    records = make_records(n_tickers)
+
+    t0 = time.perf_counter()
+    legacy = legacy_screen(records, top_k)
+    legacy_time = time.perf_counter() - t0
+
+    cold = screen_universe(records=records, top_k=top_k, chunk_size=chunk_size)
+    warm = screen_universe(records=records, top_k=top_k, chunk_size=chunk_size)
+    same_top = [r['ticker'] for r in legacy] == list(warm['top']['ticker'])
+
+    price_store._store = PriceStore(tmp / "prices", downloader=make_downloader(days))
+    start = (pd.Timestamp.now() - pd.Timedelta(days=days * 2)).strftime('%Y-%m-%d')
+    t0 = time.perf_counter()
+    price_store.get_price_store().ensure(list(records), start, (pd.Timestamp.now() + pd.Timedelta(days=1)).strftime('%Y-%m-%d'))
+    store_setup = time.perf_counter() - t0
+    store_cold = screen_universe(list(records), source='price_store', start_date=start, top_k=top_k,
+                                 chunk_size=chunk_size, records=records)
+    store_warm = screen_universe(list(records), source='price_store', start_date=start, top_k=top_k,
+                                 chunk_size=chunk_size, records=records)
+
+    def line(label, result):
+        t = result['timings']
+        return (f"   {label:<22}{t['total']:.2f} s  (load+score {t['load_and_score']:.2f} s, "
+                f"models {t['models']:.2f} s)")
+
+    print("\n" + "=" * 70)
+    print(f"📊 UNIVERSE SCREENER BENCHMARK ({n_tickers} tickers, top {top_k}, chunks of {chunk_size})")
+    print("=" * 70)
+    print(f"   Per-stock loop:       {legacy_time:.2f} s")
+    print(line("Records, cold:", cold))
+    print(line("Records, warm:", warm))
+    print(f"   Same top {top_k}:          {same_top}")
+    print(f"   Price store setup:    {store_setup:.1f} s  (writing {n_tickers} synthetic histories, not timed below)")
+    print(line("Price store, run 1:", store_cold))
+    print(line("Price store, run 2:", store_warm))
+    print(f"   Segments:             {warm['segments']}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=25)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=60, help="Bars per ticker in the price store")
+    args = parser.parse_args()
+    run(args.tickers, args.top_k, args.chunk_size, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Parameter Sweep Benchmark
+Runs a 1,000-variant momentum grid (10 fast × 10 slow windows × 10
+allocations) over synthetic prices with backtest_sweep, and compares it
+with the old way: one full BacktestEngine per-date loop per variant.
+
+The legacy figure is extrapolated from timing one variant on the first
+--legacy-days days (a conservative estimate: no positions during warm-up).
+
+Usage:
+    python bench_sweep.py [--tickers 100] [--years 10] [--workers 0]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from backtest_engine import BacktestEngine
+from backtest_sweep import run_sweep
+from bench_backtest import make_data
+
+FAST = [5, 10, 15, 20, 25, 30, 35, 40, 45, 50]
+SLOW = [60, 80, 100, 120, 140, 160, 180, 200, 220, 250]
+ALLOCATIONS = [round(a, 2) for a in np.linspace(0.05, 0.5, 10)]
+
+
+def run(n_tickers: int, years: float, workers: int, legacy_days: int):
+    data = make_data(n_tickers, years)
+    closes = data.pivot_table(index=data.index, columns="ticker", values="Close")
+    dates, tickers = closes.index, list(closes.columns)
+    start = str(dates[0].date())
+
+    t0 = time.perf_counter()
+    table = run_sweep(tickers, start, "2100-01-01", FAST, SLOW, ALLOCATIONS,
+                      max_workers=workers or None, close_data=(dates, tickers, closes.to_numpy()))
+    sweep = time.perf_counter() - t0
+
+    legacy_data = data[data.index.isin(dates[:legacy_days])]
+    t0 = time.perf_counter()
+    BacktestEngine()._simulate_loop(legacy_data)
+    legacy_variant = (time.perf_counter() - t0) * len(dates) / legacy_days
+    legacy_total = legacy_variant * len(table)
+
+    print("\n" + "=" * 60)
+    print(f"📊 PARAMETER SWEEP BENCHMARK ({n_tickers} tickers × {years:g} years)")
+    print("=" * 60)
+    print(f"   Variants:        {len(table)}  (workers={workers or os.cpu_count()})")
+    print(f"   Sweep:           {sweep:.1f} s  ({sweep / len(table) * 1000:.0f} ms/variant)")
+    print(f"   Legacy (est.):   {legacy_total / 3600:.1f} h  ({legacy_variant:.1f} s/variant, serial loop)")
+    print(f"   Speedup:         {legacy_total / sweep:.0f}x")
+    best = table.iloc[0]
+    print(f"   Best:            SMA {best['fast']}/{best['slow']}, {best['allocation']:.0%} "
+          f"→ Sharpe {best['sharpe_ratio']:.2f}, return {best['total_return']:+.1f}%")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--years", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per CPU")
+    parser.add_argument("--legacy-days", type=int, default=60)
+    args = parser.parse_args()
+    run(args.tickers, args.years, args.workers, args.legacy_days)
+
+
+if __name__ == "__main__":
+    main()
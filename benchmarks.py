@@ -0,0 +1,237 @@
+"""
+Benchmark series and relative performance metrics for backtests.
+
+Benchmark prices (SPY, QQQ, sector ETFs) come from the local price store,
+so a date range is downloaded once and later runs read it from disk. The
+equal-weight benchmark is the daily-rebalanced average return of the
+backtest's own universe.
+
+Per-benchmark summaries (return, Sharpe, max drawdown) are memoized on disk
+keyed by symbol, date range and the price store's data version, so
+identical ranges are not recomputed across runs and changed prices
+invalidate them. Alpha, beta, tracking error and information ratio against
+every benchmark are computed in one pass over a dates × benchmarks matrix.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cache_store import CacheStore
+from price_store import get_price_store
+
+BENCHMARK_DB = Path(__file__).parent / ".cache" / "benchmarks.sqlite3"
+SUMMARY_TTL = 30 * 86400  # keys carry the data version, so this only bounds growth
+SERIES_CACHE_SIZE = 32    # return series kept in memory
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.02
+EQUAL_WEIGHT = 'EQUAL_WEIGHT'
+
+BENCHMARKS = {
+    'SPY': 'S&P 500',
+    'QQQ': 'Nasdaq 100',
+    'DIA': 'Dow Jones',
+    'IWM': 'Russell 2000',
+    'XLK': 'Technology',
+    'XLF': 'Financials',
+    'XLV': 'Health Care',
+    'XLE': 'Energy',
+    'XLY': 'Consumer Discretionary',
+    'XLP': 'Consumer Staples',
+    'XLI': 'Industrials',
+    'XLU': 'Utilities',
+    'XLB': 'Materials',
+    'XLRE': 'Real Estate',
+    'XLC': 'Communication Services',
+    EQUAL_WEIGHT: 'Equal-weight universe',
+}
+
+_summaries: Optional[CacheStore] = None
+_series: "OrderedDict[tuple, pd.Series]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _get_summaries() -> CacheStore:
+    global _summaries
+    if _summaries is None:
+        with _lock:
+            if _summaries is None:
+                _summaries = CacheStore(BENCHMARK_DB, default_ttl=SUMMARY_TTL)
+    return _summaries
+
+
+# ============================================================================
+# SERIES
+# ============================================================================
+
+def benchmark_returns(symbol: str, start_date: str, end_date: str, universe: Optional[Sequence[str]] = None) -> pd.Series:
+    """
+    Daily returns of one benchmark over [start_date, end_date) (empty if
+    unavailable). EQUAL_WEIGHT needs the universe tickers.
+    """
+    symbol = symbol.upper()
+    tickers = sorted({t.upper() for t in universe or []}) if symbol == EQUAL_WEIGHT else [symbol]
+    if not tickers:
+        return pd.Series(dtype=np.float64)
+
+    store = get_price_store()
+    store.ensure(tickers, start_date, end_date)
+    versions = store.data_version(tickers)
+    key = (symbol, start_date, end_date, tuple(sorted(versions.items())))
+    with _lock:
+        if key in _series:
+            _series.move_to_end(key)
+            return _series[key]
+
+    histories = store.get_histories(tickers, start_date, end_date)
+    if not histories:
+        returns = pd.Series(dtype=np.float64)
+    else:
+        closes = pd.DataFrame({t: h['Close'] for t, h in histories.items()}).sort_index()
+        # Each constituent's own return between its bars; average what traded that day
+        returns = closes.apply(lambda col: col.dropna().pct_change()).mean(axis=1).iloc[1:]
+        returns.name = symbol
+
+    with _lock:
+        _series[key] = returns
+        if len(_series) > SERIES_CACHE_SIZE:
+            _series.popitem(last=False)
+    return returns
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def _summarize_returns(returns: np.ndarray) -> Dict[str, float]:
+    """Same formulas BacktestEngine has always used for the benchmark."""
+    if len(returns) == 0:
+        return {'return': 0, 'sharpe': 0, 'max_drawdown': 0}
+    growth = np.cumprod(1 + returns)
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    sharpe = np.sqrt(TRADING_DAYS) * (returns - RISK_FREE_RATE / TRADING_DAYS).mean() / std if std > 0 else 0
+    drawdown = (growth / np.maximum(np.maximum.accumulate(growth), 1.0) - 1) * 100
+    return {
+        'return': float((growth[-1] - 1) * 100),
+        'sharpe': float(sharpe),
+        'max_drawdown': float(min(drawdown.min(), 0.0)),
+    }
+
+
+def benchmark_summary(symbol: str, start_date: str, end_date: str, universe: Optional[Sequence[str]] = None) -> Dict[str, float]:
+    """Return, Sharpe and max drawdown of a benchmark, memoized per range and data version."""
+    symbol = symbol.upper()
+    tickers = sorted({t.upper() for t in universe or []}) if symbol == EQUAL_WEIGHT else [symbol]
+    store = get_price_store()
+    store.ensure(tickers, start_date, end_date)
+    versions = ','.join(f"{t}={v}" for t, v in sorted(store.data_version(tickers).items()))
+    key = f"{symbol}:{start_date}:{end_date}:{versions}"
+
+    summaries = _get_summaries()
+    cached = summaries.get(key)
+    if cached is not None:
+        return cached
+
+    summary = _summarize_returns(benchmark_returns(symbol, start_date, end_date, universe).to_numpy())
+    summaries.set(key, summary)
+    return summary
+
+
+def relative_metrics(strategy_returns: pd.Series, benchmark_matrix: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """
+    Alpha (annualized, %), beta, tracking error (annualized, %) and
+    information ratio of one return series against each benchmark column,
+    computed together on the dates they share.
+    """
+    aligned = benchmark_matrix.join(strategy_returns.rename('__strategy__'), how='inner').dropna()
+    results = {}
+    if len(aligned) < 2:
+        return {column: {'alpha': 0, 'beta': 0, 'tracking_error': 0, 'information_ratio': 0} for column in benchmark_matrix.columns}
+
+    r = aligned.pop('__strategy__').to_numpy()[:, None]
+    b = aligned.to_numpy()
+    rf = RISK_FREE_RATE / TRADING_DAYS
+
+    b_centered = b - b.mean(axis=0)
+    variance = (b_centered ** 2).sum(axis=0) / (len(b) - 1)
+    covariance = ((r - r.mean()) * b_centered).sum(axis=0) / (len(b) - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = np.where(variance > 0, covariance / variance, 0.0)
+        alpha = ((r - rf).mean() - beta * (b - rf).mean(axis=0)) * TRADING_DAYS * 100
+        active = r - b
+        tracking = active.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+        information = np.where(tracking > 0, active.mean(axis=0) * TRADING_DAYS / tracking, 0.0)
+
+    for i, column in enumerate(aligned.columns):
+        results[column] = {
+            'alpha': float(alpha[i]),
+            'beta': float(beta[i]),
+            'tracking_error': float(tracking[i] * 100),
+            'information_ratio': float(information[i]),
+        }
+    return results
+
+
+def compare_benchmarks(
+    values: pd.Series,
+    start_date: str,
+    end_date: str,
+    symbols: Sequence[str] = ('SPY', 'QQQ', EQUAL_WEIGHT),
+    universe: Optional[Sequence[str]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compare an equity curve (date-indexed portfolio values) with each
+    benchmark: the benchmark's own summary plus the relative metrics.
+    Benchmarks without data are left out.
+    """
+    columns = {}
+    summaries = {}
+    for symbol in symbols:
+        if symbol.upper() == EQUAL_WEIGHT and not universe:
+            continue
+        try:
+            returns = benchmark_returns(symbol, start_date, end_date, universe)
+            if returns.empty:
+                continue
+            columns[symbol.upper()] = returns
+            summaries[symbol.upper()] = benchmark_summary(symbol, start_date, end_date, universe)
+        except Exception as e:
+            print(f"⚠️ Benchmark {symbol} unavailable: {e}")
+
+    return compare_return_series(values, columns, summaries)
+
+
+def compare_return_series(
+    values: pd.Series,
+    returns: Dict[str, pd.Series],
+    summaries: Optional[Dict[str, Dict[str, float]]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    compare_benchmarks for benchmark return series the caller already has
+    (e.g. accumulated while streaming bars). Summaries not passed in are
+    computed from the series; empty series are left out.
+    """
+    returns = {symbol: series for symbol, series in returns.items() if not series.empty}
+    if not returns:
+        return {}
+    summaries = summaries or {}
+    relative = relative_metrics(values.pct_change().iloc[1:], pd.DataFrame(returns))
+    return {
+        symbol: {
+            'name': BENCHMARKS.get(symbol, symbol),
+            **(summaries.get(symbol) or _summarize_returns(series.dropna().to_numpy())),
+            **relative[symbol],
+        }
+        for symbol, series in returns.items()
+    }
+
+
+def clear_benchmark_cache():
+    """Forget memoized benchmark series and summaries."""
+    with _lock:
+        _series.clear()
+    _get_summaries().clear()
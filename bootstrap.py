@@ -0,0 +1,171 @@
+"""
+Bootstrap resampling for confidence intervals.
+
+All resample indices are drawn at once as an (n_iterations × n) integer
+matrix from a seeded NumPy generator. Metrics with a vectorized version
+(see VECTOR_METRICS) are evaluated for every resample in one pass over that
+matrix; any other Python callable is applied per resample, optionally
+spread over a process pool.
+
+For time series, block_size switches to a circular moving-block bootstrap:
+each resample is built from runs of block_size consecutive observations,
+which keeps short-range autocorrelation (volatility clustering) intact.
+"""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.02
+CHUNK_ELEMENTS = 4_000_000  # resampled values materialized at a time (~32 MB of float64)
+
+
+# ============================================================================
+# VECTORIZED METRICS (one row per resample of periodic returns)
+# ============================================================================
+
+def _mean(samples: np.ndarray) -> np.ndarray:
+    return samples.mean(axis=1)
+
+
+def _sharpe(samples: np.ndarray) -> np.ndarray:
+    """Annualized Sharpe, same formula as BacktestEngine._calculate_metrics."""
+    std = samples.std(axis=1, ddof=1)
+    excess = (samples - RISK_FREE_RATE / TRADING_DAYS).mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, np.sqrt(TRADING_DAYS) * excess / std, 0.0)
+
+
+def _max_drawdown(samples: np.ndarray) -> np.ndarray:
+    """Worst peak-to-trough fall (%) of the equity curve the returns compound into."""
+    equity = np.cumprod(1 + samples, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    return ((equity / peak - 1) * 100).min(axis=1)
+
+
+def _win_rate(samples: np.ndarray) -> np.ndarray:
+    return (samples > 0).mean(axis=1) * 100
+
+
+def _total_return(samples: np.ndarray) -> np.ndarray:
+    return (np.prod(1 + samples, axis=1) - 1) * 100
+
+
+def _annual_volatility(samples: np.ndarray) -> np.ndarray:
+    return samples.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+
+
+VECTOR_METRICS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'mean': _mean,
+    'sharpe': _sharpe,
+    'max_drawdown': _max_drawdown,
+    'win_rate': _win_rate,
+    'total_return': _total_return,
+    'annual_volatility': _annual_volatility,
+}
+
+
+# ============================================================================
+# RESAMPLING
+# ============================================================================
+
+def resample_indices(
+    n: int,
+    n_iterations: int,
+    rng: np.random.Generator,
+    block_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    (n_iterations × n) row indices. With block_size > 1, each row is a
+    concatenation of circular blocks of consecutive indices, cut to n.
+    """
+    if not block_size or block_size <= 1:
+        return rng.integers(0, n, size=(n_iterations, n))
+    block_size = min(block_size, n)
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, size=(n_iterations, n_blocks, 1))
+    blocks = (starts + np.arange(block_size)) % n
+    return blocks.reshape(n_iterations, n_blocks * block_size)[:, :n]
+
+
+def _apply_chunk(data, metric_func: Callable, indices: np.ndarray) -> list:
+    """Worker body: metric_func on each resample (rows of indices)."""
+    take = data.iloc if isinstance(data, (pd.DataFrame, pd.Series)) else data
+    return [metric_func(take[idx]) for idx in indices]
+
+
+def _vector_values(data, column: Optional[str]) -> np.ndarray:
+    """1-D float array the vectorized metrics run on."""
+    if isinstance(data, pd.DataFrame):
+        if column is None:
+            if data.shape[1] == 1:
+                column = data.columns[0]
+            elif 'returns' in data.columns:
+                column = 'returns'
+            else:
+                raise ValueError("Pass column= to pick the returns column for a named metric")
+        data = data[column]
+    values = np.asarray(data, dtype=np.float64).ravel()
+    return values[~np.isnan(values)]
+
+
+def bootstrap_distribution(
+    data: Union[pd.DataFrame, pd.Series, np.ndarray],
+    metric: Union[str, Callable],
+    n_iterations: int = 1000,
+    block_size: Optional[int] = None,
+    seed: Optional[int] = None,
+    n_jobs: int = 1,
+    column: Optional[str] = None,
+) -> np.ndarray:
+    """
+    Metric value for each of n_iterations resamples of data.
+
+    Args:
+        data: Observations (rows are resampled)
+        metric: Name in VECTOR_METRICS (data are periodic returns; NaNs are
+            dropped) or a callable taking a resampled copy of data
+        n_iterations: Number of resamples
+        block_size: Block length for the moving-block bootstrap (None = iid)
+        seed: Seed for reproducible resamples
+        n_jobs: Worker processes for callable metrics (1 = in-process)
+        column: Returns column when data is a multi-column DataFrame
+
+    Returns:
+        Array of n_iterations metric values
+    """
+    rng = np.random.default_rng(seed)
+
+    if isinstance(metric, str):
+        if metric not in VECTOR_METRICS:
+            raise ValueError(f"Unknown metric: {metric} (choose from {', '.join(VECTOR_METRICS)})")
+        values = _vector_values(data, column)
+        if len(values) == 0:
+            return np.empty(0)
+        indices = resample_indices(len(values), n_iterations, rng, block_size)
+        func = VECTOR_METRICS[metric]
+        rows = max(1, CHUNK_ELEMENTS // len(values))
+        return np.concatenate([func(values[indices[i:i + rows]]) for i in range(0, n_iterations, rows)])
+
+    if len(data) == 0:
+        return np.empty(0)
+    indices = resample_indices(len(data), n_iterations, rng, block_size)
+
+    if n_jobs > 1:
+        try:
+            pickle.dumps(metric)
+        except Exception:
+            print("⚠️ Bootstrap metric cannot be sent to worker processes (lambda or closure?); running in-process")
+            n_jobs = 1
+
+    if n_jobs <= 1:
+        return np.asarray(_apply_chunk(data, metric, indices), dtype=np.float64)
+
+    chunks = np.array_split(indices, n_jobs)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        results = executor.map(_apply_chunk, [data] * len(chunks), [metric] * len(chunks), chunks)
+        return np.asarray([value for chunk in results for value in chunk], dtype=np.float64)
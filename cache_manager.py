@@ -1,37 +1,50 @@
 """Persistent file-based cache for stock data to survive API throttling."""
 
 import json
+import threading
 import time
 from pathlib import Path
 from typing import Any, Optional
 
-CACHE_DIR = Path(".cache")
-CACHE_FILE = CACHE_DIR / "stock_data_cache.json"
+from cache_store import CacheStore
+from memory_cache import get_memory_cache
+from revalidate import mark_stale
+
+CACHE_DIR = Path(__file__).parent / ".cache"  # one cache root for every module
+CACHE_DB = CACHE_DIR / "stock_data_cache.sqlite3"
+CACHE_FILE = CACHE_DIR / "stock_data_cache.json"  # legacy single-file cache
 CACHE_TTL_SECONDS = 300  # 5 minutes
+MEMORY_KEY_PREFIX = "stock:"
+
+_store: Optional[CacheStore] = None
+_store_lock = threading.Lock()
 
 
-def _ensure_cache_dir():
-    """Create cache directory if it doesn't exist."""
-    CACHE_DIR.mkdir(exist_ok=True)
+def _get_store() -> CacheStore:
+    """Open the keyed store on first use, importing any legacy JSON cache."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = CacheStore(CACHE_DB, default_ttl=CACHE_TTL_SECONDS)
+                _migrate_legacy_cache(store)
+                _store = store
+    return _store
 
 
-def _load_cache() -> dict[str, dict[str, Any]]:
-    """Load the entire cache from disk."""
+def _migrate_legacy_cache(store: CacheStore):
+    """Move unexpired entries from the old single-JSON cache into the store."""
     if not CACHE_FILE.exists():
-        return {}
+        return
     try:
         with CACHE_FILE.open("r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-
-def _save_cache(cache: dict[str, dict[str, Any]]):
-    """Write the entire cache to disk."""
-    _ensure_cache_dir()
-    try:
-        with CACHE_FILE.open("w") as f:
-            json.dump(cache, f, indent=2)
+            legacy = json.load(f)
+        now = time.time()
+        for ticker, entry in legacy.items():
+            remaining = CACHE_TTL_SECONDS - (now - entry.get("cached_at", 0))
+            if remaining > 0 and entry.get("data"):
+                store.set(ticker, entry["data"], ttl=remaining)
+        CACHE_FILE.unlink()
     except Exception:
         pass
 
@@ -41,31 +54,48 @@ def get_cached_stock(ticker: str) -> Optional[dict[str, Any]]:
     Retrieve cached stock data if it exists and is not expired.
     Returns None if cache miss or expired.
     """
-    cache = _load_cache()
-    entry = cache.get(ticker)
-    if not entry:
+    memory = get_memory_cache()
+    key = MEMORY_KEY_PREFIX + ticker
+    cached = memory.get(key)
+    if cached is not None:
+        return cached
+
+    entry = _get_store().get_entry(ticker)
+    if entry is None:
+        return None
+
+    memory.set(key, entry["data"], entry["expires_at"] - time.time())
+    return entry["data"]
+
+
+def get_stale_stock(ticker: str, max_staleness: float) -> Optional[dict[str, Any]]:
+    """
+    Return an expired entry no older than max_staleness seconds, tagged with
+    'stale' and 'cache_age'. Used for stale-while-revalidate reads.
+    """
+    entry = _get_store().get_entry(ticker, include_expired=True)
+    if entry is None or not entry["data"]:
         return None
-    
-    cached_time = entry.get("cached_at", 0)
-    age = time.time() - cached_time
-    
-    if age > CACHE_TTL_SECONDS:
+
+    age = time.time() - entry["cached_at"]
+    if age > max_staleness:
         return None
-    
-    return entry.get("data")
+
+    return mark_stale(entry["data"], age)
 
 
-def set_cached_stock(ticker: str, data: dict[str, Any]):
+def set_cached_stock(ticker: str, data: dict[str, Any], ttl: Optional[float] = None):
     """Store stock data in the cache with current timestamp."""
-    cache = _load_cache()
-    cache[ticker] = {
-        "cached_at": time.time(),
-        "data": data,
-    }
-    _save_cache(cache)
+    ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+    memory = get_memory_cache()
+    memory.invalidate(MEMORY_KEY_PREFIX + ticker)
+    _get_store().set(ticker, data, ttl=ttl)
+    memory.set(MEMORY_KEY_PREFIX + ticker, data, ttl)
 
 
 def clear_cache():
     """Remove all cached stock data."""
+    get_memory_cache().invalidate_prefix(MEMORY_KEY_PREFIX)
+    _get_store().clear()
     if CACHE_FILE.exists():
         CACHE_FILE.unlink()
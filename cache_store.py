@@ -0,0 +1,183 @@
+"""
+Keyed on-disk cache store backed by SQLite in WAL mode.
+
+Replaces the single JSON file that had to be loaded and rewritten on every
+lookup. Each key is its own row, so reads and writes are O(1) index lookups,
+every write is one atomic transaction, and WAL lets readers in any thread or
+process proceed while a writer commits.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    cached_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class CacheStore:
+    """
+    Thread- and process-safe key/value store with per-key TTL.
+
+    Connections are opened lazily, one per thread (and re-opened after a
+    fork), because sqlite3 connections must not be shared across threads.
+    """
+
+    def __init__(self, db_path: Path, default_ttl: float = 300, busy_timeout: float = 10.0):
+        self.db_path = Path(db_path)
+        self.default_ttl = default_ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the database if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.busy_timeout,
+            isolation_level=None,  # autocommit; each statement is its own transaction
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute(_SCHEMA)
+                self._initialized = True
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Key/value API
+    # ------------------------------------------------------------------
+
+    def get_entry(self, key: str, include_expired: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Return {'data', 'cached_at', 'expires_at'} for a key.
+        Expired entries are only returned when include_expired is True.
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT value, cached_at, expires_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache read failed for {key}: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        value, cached_at, expires_at = row
+        if not include_expired and expires_at < time.time():
+            return None
+
+        try:
+            data = json.loads(value)
+        except ValueError:
+            return None
+
+        return {"data": data, "cached_at": cached_at, "expires_at": expires_at}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        entry = self.get_entry(key)
+        return entry["data"] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Insert or replace a value; the write is atomic."""
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        try:
+            payload = json.dumps(value, separators=(",", ":"), default=str)
+            self._connect().execute(
+                "INSERT OR REPLACE INTO entries (key, value, cached_at, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, now, expires_at),
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"⚠️ Cache write failed for {key}: {e}")
+
+    def set_many(self, items: Iterable[tuple], ttl: Optional[float] = None):
+        """Insert several (key, value) pairs in one transaction."""
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        try:
+            rows = [
+                (key, json.dumps(value, separators=(",", ":"), default=str), now, expires_at)
+                for key, value in items
+            ]
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, value, cached_at, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"⚠️ Cache bulk write failed: {e}")
+
+    def delete(self, key: str):
+        """Remove a single key."""
+        try:
+            self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache delete failed for {key}: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        try:
+            cur = self._connect().execute(
+                "DELETE FROM entries WHERE expires_at < ?", (time.time(),)
+            )
+            return cur.rowcount
+        except sqlite3.Error:
+            return 0
+
+    def clear(self):
+        """Remove every entry."""
+        try:
+            self._connect().execute("DELETE FROM entries")
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache clear failed: {e}")
+
+    def __len__(self) -> int:
+        try:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            return 0
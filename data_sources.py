@@ -1,6 +1,7 @@
 """Data access helpers for stock advisor app with parallel API requests."""
 
 import concurrent.futures
+import os
 import random
 import time
 import warnings
@@ -11,7 +12,11 @@ import pandas as pd
 import streamlit as st
 import yfinance as yf
 
-from cache_manager import get_cached_stock, set_cached_stock
+from cache_manager import get_cached_stock, get_stale_stock, set_cached_stock
+from indicators import RSI
+from provider_health import get_health
+from revalidate import schedule_refresh
+from singleflight import SingleFlight
 
 # Suppress ScriptRunContext warning from threading
 warnings.filterwarnings("ignore", message=".*missing ScriptRunContext.*")
@@ -26,21 +31,38 @@ BACKOFF_BASE = 2.0  # Increased backoff
 BACKOFF_FACTOR = 2.0
 JITTER_MAX = 0.5
 
+YF_BATCH_SIZE = 50  # tickers per yf.download call
+
 # Thread-safe rate limiting for Yahoo Finance
 _request_lock = Lock()
 _yf_last_call = 0
 YF_MIN_DELAY = 2.0  # Minimum 2 seconds between Yahoo calls
 
+# Serve expired cache entries instantly and refresh them in the background
+STALE_WHILE_REVALIDATE = os.getenv("STALE_WHILE_REVALIDATE", "true").lower() == "true"
+MAX_STALENESS_SECONDS = 24 * 3600
+
+# Batch fetches reuse a record's name/P/E/market cap/sector for this long
+# instead of making a per-ticker info call (fundamentals change slowly)
+FUNDAMENTALS_MAX_AGE_SECONDS = 24 * 3600
+
+# Concurrent requests for the same ticker share one Yahoo fetch
+_yahoo_flight = SingleFlight("data_sources")
+
+
+def _wait_for_yahoo_slot():
+    """Sleep until YF_MIN_DELAY has passed since the last Yahoo call; hold _request_lock."""
+    global _yf_last_call
+    elapsed = time.time() - _yf_last_call
+    if elapsed < YF_MIN_DELAY:
+        time.sleep(YF_MIN_DELAY - elapsed)
+    _yf_last_call = time.time()
+
 
 def safe_yf_fetch(ticker: str):
     """Thread-safe Yahoo Finance fetch with guaranteed rate limiting."""
-    global _yf_last_call
-    
     with _request_lock:
-        elapsed = time.time() - _yf_last_call
-        if elapsed < YF_MIN_DELAY:
-            time.sleep(YF_MIN_DELAY - elapsed)
-        _yf_last_call = time.time()
+        _wait_for_yahoo_slot()
         
         # Now do the actual call
         stock = yf.Ticker(ticker)
@@ -50,48 +72,181 @@ def safe_yf_fetch(ticker: str):
         return info, hist
 
 
-@st.cache_data(ttl=180)
+def safe_yf_fetch_batch(tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Download 3 months of history for several tickers in one rate-limited
+    Yahoo request and split it into per-ticker frames.
+    """
+    with _request_lock:
+        _wait_for_yahoo_slot()
+        frame = yf.download(tickers, period="3mo", group_by="ticker", threads=False, progress=False)
+
+    if frame is None or frame.empty:
+        return {}
+
+    histories = {}
+    for ticker in tickers:
+        if isinstance(frame.columns, pd.MultiIndex):
+            if ticker not in frame.columns.get_level_values(0):
+                continue
+            hist = frame[ticker]
+        else:
+            hist = frame
+        hist = hist.dropna(how="all")
+        if not hist.empty:
+            histories[ticker] = hist
+    return histories
+
+
+def safe_yf_info(ticker: str) -> Dict:
+    """Rate-limited Yahoo info lookup (fundamentals have no batch endpoint)."""
+    with _request_lock:
+        _wait_for_yahoo_slot()
+        return yf.Ticker(ticker).info
+
+
 def get_stock_data(ticker: str):
-    """Fetch live stock data for a single ticker with file-based cache fallback."""
+    """
+    Fetch live stock data for a single ticker with file-based cache fallback.
+
+    Not wrapped in st.cache_data itself: a stale answer memoized there would
+    hide the background refresh from the UI. Only the blocking fetch is.
+    """
     # Check persistent cache first
     cached = get_cached_stock(ticker)
     if cached:
         return cached
 
+    # Expired but recent enough: answer now, refresh off the interactive path
+    if STALE_WHILE_REVALIDATE:
+        stale = get_stale_stock(ticker, MAX_STALENESS_SECONDS)
+        if stale:
+            schedule_refresh(f"stock:{ticker}", lambda: _coalesced_fetch(ticker))
+            return stale
+
+    return _fetch_fresh(ticker)
+
+
+@st.cache_data(ttl=180)
+def _fetch_fresh(ticker: str):
+    """Blocking fetch for get_stock_data when there is no usable cache entry."""
+    return _coalesced_fetch(ticker)
+
+
+def _coalesced_fetch(ticker: str):
+    """Run _fetch_stock_data, joining any fetch for the same ticker already in flight."""
+    return _yahoo_flight.do(("yfinance", ticker), lambda: _fetch_stock_data(ticker))
+
+
+def _rsi_from_history(hist: pd.DataFrame):
+    """
+    RSI of the last close and the indicator state after the last completed
+    bar, kept so live prices can update RSI (see refresh_rsi).
+    """
+    if len(hist) <= 14:
+        return 50.0, None
+    closes = hist["Close"].tolist()
+    rsi = RSI(14, smoothing="sma")
+    for close in closes[:-1]:
+        rsi.update(close)
+    rsi_val = rsi.peek(closes[-1])
+    return (50.0 if pd.isna(rsi_val) else float(rsi_val)), rsi.to_dict()
+
+
+def _build_stock_result(ticker: str, info: Dict, hist: pd.DataFrame) -> Dict:
+    """Turn Yahoo info + price history into the app's stock record."""
+    rsi_val, rsi_state = _rsi_from_history(hist)
+
+    # Extract price - reject if zero or None
+    price = info.get("currentPrice") or info.get("regularMarketPrice")
+    if price is None or price == 0:
+        # Invalid price, treat as failure
+        raise ValueError(f"Invalid price for {ticker}: {price}")
+
+    return {
+        "success": True,
+        "ticker": ticker,
+        "name": info.get("longName", ticker),
+        "price": float(price),
+        "change": float(info.get("regularMarketChangePercent", 0) or 0),
+        "pe": info.get("trailingPE", "N/A"),
+        "marketCap": (info.get("marketCap", 0) / 1e9) if info.get("marketCap") else 0,
+        "dividend": (info.get("dividendYield", 0) * 100) or 0,
+        "rsi": rsi_val,
+        "rsi_state": rsi_state,
+        "volume": info.get("volume", 0) or 0,
+        "sector": info.get("sector", "Unknown"),
+        "fundamentals_at": time.time(),
+    }
+
+
+def _build_from_history(ticker: str, previous: Dict, hist: pd.DataFrame) -> Dict:
+    """
+    Rebuild a stock record from fresh price history, carrying fundamentals
+    over from a previous record. P/E and market cap scale with the price
+    and dividend yield inversely, as earnings, share count and payout are
+    unchanged.
+    """
+    closes = hist["Close"].dropna()
+    if closes.empty or closes.iloc[-1] <= 0:
+        raise ValueError(f"Invalid price for {ticker}: no closes")
+
+    price = float(closes.iloc[-1])
+    change = (price / closes.iloc[-2] - 1) * 100 if len(closes) > 1 and closes.iloc[-2] > 0 else 0.0
+    ratio = price / previous["price"] if previous.get("price") else 1.0
+    pe = previous.get("pe", "N/A")
+    if isinstance(pe, (int, float)):
+        pe = pe * ratio
+    rsi_val, rsi_state = _rsi_from_history(hist)
+    volume = hist["Volume"].iloc[-1] if "Volume" in hist else 0
+
+    return {
+        "success": True,
+        "ticker": ticker,
+        "name": previous.get("name", ticker),
+        "price": price,
+        "change": float(change),
+        "pe": pe,
+        "marketCap": (previous.get("marketCap") or 0) * ratio,
+        "dividend": (previous.get("dividend") or 0) / ratio,
+        "rsi": rsi_val,
+        "rsi_state": rsi_state,
+        "volume": 0 if pd.isna(volume) else int(volume),
+        "sector": previous.get("sector", "Unknown"),
+        "fundamentals_at": previous["fundamentals_at"],
+    }
+
+
+def refresh_rsi(record: Dict, price: float) -> Dict:
+    """
+    Return a copy of a stock record with RSI recomputed for a new live
+    price, from the stored indicator state instead of refetching history.
+    """
+    state = record.get("rsi_state")
+    if not state or not price:
+        return record
+    value = RSI.from_dict(state).peek(float(price))
+    updated = dict(record)
+    updated["rsi"] = 50.0 if pd.isna(value) else float(value)
+    return updated
+
+
+def _fetch_stock_data(ticker: str):
+    """
+    Fetch a ticker from Yahoo with retries and write it to the persistent cache.
+    Outcomes go to Yahoo's circuit breaker (provider_health) from here, the
+    only place a network call is made: a success, or a final throttling /
+    outage failure. Bad tickers are not Yahoo's fault and are not recorded.
+    """
+    health = get_health("yfinance")
     for attempt in range(MAX_RETRIES):
         try:
+            start = time.monotonic()
             info, hist = safe_yf_fetch(ticker)
+            latency = time.monotonic() - start
             
-            # Calculate RSI if we have enough history
-            if len(hist) > 14 and not hist.empty:
-                delta = hist["Close"].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                rsi_val = rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50.0
-            else:
-                rsi_val = 50.0
-
-            # Extract price - reject if zero or None
-            price = info.get("currentPrice") or info.get("regularMarketPrice")
-            if price is None or price == 0:
-                # Invalid price, treat as failure
-                raise ValueError(f"Invalid price for {ticker}: {price}")
-
-            result = {
-                "success": True,
-                "ticker": ticker,
-                "name": info.get("longName", ticker),
-                "price": float(price),
-                "change": float(info.get("regularMarketChangePercent", 0) or 0),
-                "pe": info.get("trailingPE", "N/A"),
-                "marketCap": (info.get("marketCap", 0) / 1e9) if info.get("marketCap") else 0,
-                "dividend": (info.get("dividendYield", 0) * 100) or 0,
-                "rsi": float(rsi_val),
-                "volume": info.get("volume", 0) or 0,
-                "sector": info.get("sector", "Unknown"),
-            }
+            result = _build_stock_result(ticker, info, hist)
+            health.record_success(latency)
             
             # Store in persistent cache
             set_cached_stock(ticker, result)
@@ -128,6 +283,7 @@ def get_stock_data(ticker: str):
                 continue
 
             # On final failure, return an error dict (don't cache failures)
+            health.record_failure(time.monotonic() - start, "Throttled/Unavailable")
             return {
                 "success": False,
                 "ticker": ticker,
@@ -144,6 +300,76 @@ def get_stock_data(ticker: str):
     }
 
 
+def get_stocks_batch(tickers: List[str]) -> Dict[str, Dict]:
+    """
+    Batch Yahoo fetch: fresh cache hits are returned as-is and, with
+    STALE_WHILE_REVALIDATE, expired entries are returned at once while one
+    background batch refresh per chunk updates them. The rest are fetched
+    now (see _fetch_stocks_batch). Tickers that fail are simply left out.
+    """
+    results: Dict[str, Dict] = {}
+    stale, missing = [], []
+    for ticker in dict.fromkeys(tickers):
+        cached = get_cached_stock(ticker)
+        if cached:
+            results[ticker] = cached
+            continue
+        previous = get_stale_stock(ticker, MAX_STALENESS_SECONDS) if STALE_WHILE_REVALIDATE else None
+        if previous:
+            results[ticker] = previous
+            stale.append(ticker)
+        else:
+            missing.append(ticker)
+
+    for start in range(0, len(stale), YF_BATCH_SIZE):
+        chunk = stale[start : start + YF_BATCH_SIZE]
+        schedule_refresh(f"stock-batch:{','.join(chunk)}", lambda chunk=chunk: _fetch_stocks_batch(chunk))
+
+    results.update(_fetch_stocks_batch(missing))
+    return results
+
+
+def _fetch_stocks_batch(tickers: List[str]) -> Dict[str, Dict]:
+    """
+    One history download per YF_BATCH_SIZE chunk. Fundamentals come from the
+    ticker's last cached record while younger than FUNDAMENTALS_MAX_AGE_SECONDS,
+    so only tickers never seen (or seen too long ago) need a per-ticker info
+    call. Each result is written to the per-ticker cache so get_stock_data
+    picks it up.
+    """
+    results: Dict[str, Dict] = {}
+    health = get_health("yfinance")
+    for start in range(0, len(tickers), YF_BATCH_SIZE):
+        chunk = tickers[start : start + YF_BATCH_SIZE]
+        if not health.allow_request():
+            print(f"⏭️ Yahoo Finance circuit open, skipping {len(tickers) - start} tickers")
+            break
+        request_start = time.monotonic()
+        try:
+            histories = safe_yf_fetch_batch(chunk)
+        except Exception as exc:
+            health.record_failure(time.monotonic() - request_start, type(exc).__name__)
+            print(f"⚠️ YFinance batch download failed for {len(chunk)} tickers: {exc}")
+            continue
+        health.record_success(time.monotonic() - request_start)
+
+        now = time.time()
+        for ticker, hist in histories.items():
+            previous = get_stale_stock(ticker, MAX_STALENESS_SECONDS)
+            try:
+                if previous and now - previous.get("fundamentals_at", 0) < FUNDAMENTALS_MAX_AGE_SECONDS:
+                    result = _build_from_history(ticker, previous, hist)
+                else:
+                    result = _build_stock_result(ticker, safe_yf_info(ticker), hist)
+            except Exception as exc:  # noqa: PERF203
+                print(f"⚠️ YFinance batch error for {ticker}: {exc}")
+                continue
+            set_cached_stock(ticker, result)
+            results[ticker] = result
+
+    return results
+
+
 def get_stocks_parallel(tickers: List[str], max_workers: int = MAX_WORKERS) -> List[Dict]:
     """
     Fetch stock data for multiple tickers with batched parallelism to avoid throttling.
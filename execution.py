@@ -0,0 +1,91 @@
+"""
+Execution-cost model for backtests.
+
+An ExecutionModel describes how an order turns into a fill:
+
+- commission: flat fee in dollars per trade
+- slippage_bps: adverse price move in basis points (buys pay more, sells
+  receive less)
+- max_participation: cap on shares bought as a fraction of the bar's
+  Volume; the unfilled part of an entry is cancelled (exits always sell the
+  whole position)
+- fill_at: 'close' fills on the signal bar's close, 'next_open' on the
+  open of the ticker's next bar
+
+The price helpers work on scalars and NumPy arrays alike, so the vectorized
+kernel applies them to the arrays of all its trade events at once while
+the per-date and streaming loops apply them per order.
+
+Usage:
+    engine = BacktestEngine(execution=ExecutionModel(commission=1.0, slippage_bps=5,
+                                                     max_participation=0.01, fill_at='next_open'))
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+FILL_MODES = ('close', 'next_open')
+
+
+class ExecutionModel:
+    """Commission, slippage, volume cap and fill timing for simulated orders."""
+
+    def __init__(
+        self,
+        commission: float = 0.0,
+        slippage_bps: float = 0.0,
+        max_participation: Optional[float] = None,
+        fill_at: str = 'close',
+    ):
+        if fill_at not in FILL_MODES:
+            raise ValueError(f"Unknown fill_at: {fill_at} (choose from {', '.join(FILL_MODES)})")
+        if commission < 0 or slippage_bps < 0:
+            raise ValueError("Commission and slippage must not be negative")
+        if max_participation is not None and not 0 < max_participation <= 1:
+            raise ValueError("max_participation must be in (0, 1]")
+        self.commission = float(commission)
+        self.slippage_bps = float(slippage_bps)
+        self.max_participation = max_participation
+        self.fill_at = fill_at
+
+    @property
+    def next_open(self) -> bool:
+        return self.fill_at == 'next_open'
+
+    def buy_price(self, price):
+        return price * (1 + self.slippage_bps / 10_000)
+
+    def sell_price(self, price):
+        return price * (1 - self.slippage_bps / 10_000)
+
+    def share_cap(self, volume):
+        """Most shares one entry may buy on a bar with this volume (inf without a cap)."""
+        if self.max_participation is None or volume is None:
+            return np.inf
+        return volume * self.max_participation
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'commission': self.commission,
+            'slippage_bps': self.slippage_bps,
+            'max_participation': self.max_participation,
+            'fill_at': self.fill_at,
+        }
+
+    def __repr__(self) -> str:
+        args = ', '.join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"ExecutionModel({args})"
+
+
+def buy_fill(budget: float, price: float, commission: float, cap: float):
+    """
+    (shares, notional) for an entry spending at most `budget` including the
+    commission, at `price` (already slipped), capped at `cap` shares.
+    Shares are 0 when nothing can be bought.
+    """
+    if cap < np.inf:
+        shares = min((budget - commission) / price, cap)
+        return (shares, shares * price) if shares > 0 else (0.0, 0.0)
+    notional = budget - commission
+    return (notional / price, notional) if notional > 0 else (0.0, 0.0)
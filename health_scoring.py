@@ -2,6 +2,12 @@
 
 from typing import Dict
 
+import numpy as np
+import pandas as pd
+
+GRADE_CUTOFFS = [(90, 'A+'), (85, 'A'), (80, 'A-'), (75, 'B+'), (70, 'B'), (65, 'B-'),
+                 (60, 'C+'), (55, 'C'), (50, 'C-'), (40, 'D')]
+
 
 def calculate_health_score(stock_data: Dict) -> Dict:
     """
@@ -223,3 +229,57 @@ def calculate_volatility_risk(stock_data: Dict) -> Dict:
         'score': risk_score,
         'label': risk_label
     }
+
+
+# ============================================================================
+# VECTORIZED SCORING (whole universes at once)
+# ============================================================================
+
+def numeric_column(frame: pd.DataFrame, column: str, default: float) -> np.ndarray:
+    """Column as float64; missing or unparsable values become default."""
+    if column not in frame.columns:
+        return np.full(len(frame), default, dtype=np.float64)
+    values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+    return np.where(np.isnan(values), default, values)
+
+
+def calculate_health_scores(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    calculate_health_score for every row of a DataFrame of stock records
+    (same rules and grades, without the per-row breakdown and explanation).
+    A missing or unparsable P/E scores neutral, like 'N/A'.
+    
+    Returns a DataFrame (same index) with 'health_score' and 'health_grade'.
+    """
+    success = frame['success'].fillna(False).astype(bool).to_numpy() if 'success' in frame.columns \
+        else np.zeros(len(frame), dtype=bool)
+    pe = numeric_column(frame, 'pe', 0.0)
+    market_cap = numeric_column(frame, 'marketCap', 0.0)
+    dividend = numeric_column(frame, 'dividend', 0.0)
+    rsi = numeric_column(frame, 'rsi', 50.0)
+    change = numeric_column(frame, 'change', 0.0)
+    volume = numeric_column(frame, 'volume', 0.0)
+    
+    pe_score = np.select(
+        [pe == 0, (pe >= 10) & (pe <= 20), ((pe >= 5) & (pe < 10)) | ((pe > 20) & (pe <= 30)),
+         ((pe > 0) & (pe < 5)) | ((pe > 30) & (pe <= 40)), pe > 40],
+        [10, 20, 15, 10, 5], default=0
+    )
+    cap_score = np.select([market_cap >= 200, market_cap >= 50, market_cap >= 10, market_cap >= 2], [15, 13, 10, 7], default=5)
+    div_score = np.select([dividend >= 4, dividend >= 2, dividend >= 1, dividend > 0], [15, 12, 8, 5], default=3)
+    rsi_score = np.select(
+        [(rsi >= 30) & (rsi <= 70), ((rsi >= 20) & (rsi < 30)) | ((rsi > 70) & (rsi <= 80)), rsi < 20],
+        [20, 15, 10], default=8
+    )
+    change_score = np.select([change > 5, change > 2, change > 0, change > -2, change > -5], [15, 12, 10, 8, 5], default=3)
+    vol_score = np.select([volume >= 50_000_000, volume >= 10_000_000, volume >= 1_000_000, volume >= 100_000],
+                          [15, 12, 9, 6], default=3)
+    
+    total = pe_score + cap_score + div_score + rsi_score + change_score + vol_score
+    score = np.where(success, (total / 100 * 100).astype(np.int64), 0)
+    
+    grade = np.full(len(frame), 'F', dtype=object)
+    for cutoff, letter in reversed(GRADE_CUTOFFS):
+        grade[score >= cutoff] = letter
+    grade[~success] = 'F'
+    return pd.DataFrame({'health_score': score, 'health_grade': grade}, index=frame.index)
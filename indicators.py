@@ -0,0 +1,349 @@
+"""
+Technical indicators, in two flavours:
+
+- Streaming classes (SMA, EMA, RSI, RollingStd, ATR, MACD, Bollinger) keep
+  just enough state to fold in one new bar in O(1). RSI state can be saved
+  with to_dict() and restored with from_dict(), so a live quote refresh can
+  update it without refetching history.
+- Batch functions (sma, ema, rsi, rolling_std, atr, macd, bollinger) for
+  whole arrays. They work along axis 0, so a dates × tickers matrix is
+  handled in one call. Inputs are expected to be dense (no NaN gaps).
+
+Batch and streaming versions agree to floating-point rounding.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+RESUM_EVERY = 1024  # streaming SMA re-sums its window this often to cancel drift
+
+
+# ============================================================================
+# STREAMING (O(1) per bar)
+# ============================================================================
+
+class SMA:
+    """Simple moving average over the last `window` values."""
+
+    __slots__ = ('window', 'values', 'total', 'updates')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        self.updates += 1
+        if self.updates % RESUM_EVERY == 0:
+            self.total = math.fsum(self.values)
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def value(self) -> float:
+        return self.total / self.window if self.ready else math.nan
+
+    def to_dict(self) -> Dict:
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "SMA":
+        sma = cls(state['window'])
+        for x in state['values']:
+            sma.update(x)
+        return sma
+
+
+class EMA:
+    """Exponential moving average, seeded with the first value (pandas ewm(adjust=False))."""
+
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, span: Optional[float] = None, alpha: Optional[float] = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.value = math.nan
+
+    def update(self, x: float) -> float:
+        self.value = x if math.isnan(self.value) else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {'alpha': self.alpha, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "EMA":
+        ema = cls(alpha=state['alpha'])
+        ema.value = state['value']
+        return ema
+
+
+class _WilderAverage:
+    """Mean of the first `period` values, then avg = (avg * (n - 1) + x) / n."""
+
+    __slots__ = ('period', 'count', 'value')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count <= self.period:
+            self.value += (x - self.value) / self.count
+        else:
+            self.value += (x - self.value) / self.period
+        return self.value if self.count >= self.period else math.nan
+
+    def to_dict(self) -> Dict:
+        return {'period': self.period, 'count': self.count, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "_WilderAverage":
+        avg = cls(state['period'])
+        avg.count, avg.value = state['count'], state['value']
+        return avg
+
+
+def _rsi_from(avg_gain: float, avg_loss: float) -> float:
+    if math.isnan(avg_gain) or math.isnan(avg_loss) or (avg_gain == 0 and avg_loss == 0):
+        return math.nan
+    if avg_loss == 0:
+        return 100.0
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+class RSI:
+    """
+    Relative Strength Index over `period` closes.
+
+    smoothing='wilder' is the standard Wilder RSI; smoothing='sma' averages
+    gains and losses with a plain moving average (the variant data_sources
+    has always reported).
+    """
+
+    __slots__ = ('period', 'smoothing', 'prev_close', 'gain', 'loss')
+
+    def __init__(self, period: int = 14, smoothing: str = 'wilder'):
+        if smoothing not in ('wilder', 'sma'):
+            raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self.prev_close: Optional[float] = None
+        average = _WilderAverage if smoothing == 'wilder' else SMA
+        self.gain = average(period)
+        self.loss = average(period)
+
+    def update(self, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return math.nan
+        delta = close - self.prev_close
+        self.prev_close = close
+        return _rsi_from(self.gain.update(max(delta, 0.0)), self.loss.update(max(-delta, 0.0)))
+
+    def peek(self, close: float) -> float:
+        """RSI if the next bar closed at `close`, without changing the state."""
+        return RSI.from_dict(self.to_dict()).update(close)
+
+    def to_dict(self) -> Dict:
+        return {
+            'period': self.period,
+            'smoothing': self.smoothing,
+            'prev_close': self.prev_close,
+            'gain': self.gain.to_dict(),
+            'loss': self.loss.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "RSI":
+        rsi = cls(state['period'], state['smoothing'])
+        rsi.prev_close = state['prev_close']
+        average = _WilderAverage if rsi.smoothing == 'wilder' else SMA
+        rsi.gain = average.from_dict(state['gain'])
+        rsi.loss = average.from_dict(state['loss'])
+        return rsi
+
+
+class RollingStd:
+    """Standard deviation over the last `window` values (sliding Welford update)."""
+
+    __slots__ = ('window', 'ddof', 'values', 'mean', 'm2')
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.window:
+            old = self.values[0]
+            new_mean = self.mean + (x - old) / self.window
+            self.m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+        else:
+            n = len(self.values) + 1
+            delta = x - self.mean
+            self.mean += delta / n
+            self.m2 += delta * (x - self.mean)
+        self.values.append(x)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self.values) < self.window:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.window - self.ddof))
+
+
+class ATR:
+    """Average True Range with Wilder smoothing."""
+
+    __slots__ = ('prev_close', 'average')
+
+    def __init__(self, period: int = 14):
+        self.prev_close: Optional[float] = None
+        self.average = _WilderAverage(period)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.average.update(true_range)
+
+
+class MACD:
+    """MACD line, signal line and histogram."""
+
+    __slots__ = ('fast', 'slow', 'signal')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        line = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(line)
+        return line, signal, line - signal
+
+
+class Bollinger:
+    """Middle band (SMA) and upper/lower bands at k standard deviations."""
+
+    __slots__ = ('sma', 'std', 'k')
+
+    def __init__(self, window: int = 20, k: float = 2.0, ddof: int = 0):
+        self.sma = SMA(window)
+        self.std = RollingStd(window, ddof)
+        self.k = k
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        middle = self.sma.update(close)
+        spread = self.k * self.std.update(close)
+        return middle - spread, middle, middle + spread
+
+
+# ============================================================================
+# BATCH (NumPy, along axis 0)
+# ============================================================================
+
+def _windowed(x: np.ndarray, window: int, reducer, **kwargs) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = reducer(sliding_window_view(x, window, axis=0), axis=-1, **kwargs)
+    return out
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; the first window-1 rows are NaN."""
+    return _windowed(x, window, np.mean)
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Rolling standard deviation (ddof=1 like pandas rolling().std())."""
+    return _windowed(x, window, np.std, ddof=ddof)
+
+
+def _smooth(x: np.ndarray, alpha: float, seed: np.ndarray) -> np.ndarray:
+    """y[0] = seed, y[t] = y[t-1] + alpha * (x[t] - y[t-1]), via a linear filter."""
+    zi = ((1 - alpha) * seed)[np.newaxis, ...]
+    y, _ = lfilter([alpha], [1, alpha - 1], x[1:], axis=0, zi=zi) if len(x) > 1 else (x[:0], None)
+    return np.concatenate([seed[np.newaxis, ...], y], axis=0)
+
+
+def ema(x: np.ndarray, span: Optional[float] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average seeded with the first value (pandas ewm(adjust=False))."""
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) == 0:
+        return x.copy()
+    alpha = alpha if alpha is not None else 2.0 / (span + 1)
+    return _smooth(x, alpha, x[0])
+
+
+def _wilder(x: np.ndarray, period: int) -> np.ndarray:
+    """Wilder average: SMA of the first `period` values, then alpha = 1/period."""
+    out = np.full(x.shape, np.nan)
+    if len(x) >= period:
+        seed = x[:period].mean(axis=0)
+        out[period - 1:] = _smooth(x[period - 1:], 1.0 / period, seed)
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14, smoothing: str = 'wilder') -> np.ndarray:
+    """RSI per row (NaN until warm, and where there was no movement at all)."""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape, np.nan)
+    if len(close) < 2:
+        return out
+    delta = np.diff(close, axis=0)
+    gains, losses = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    average = _wilder if smoothing == 'wilder' else sma
+    avg_gain, avg_loss = average(gains, period), average(losses, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    values = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, values)
+    out[1:] = values
+    return out
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    true_range = high - low
+    if len(close) > 1:
+        prev = close[:-1]
+        true_range[1:] = np.maximum.reduce([high[1:] - low[1:], np.abs(high[1:] - prev), np.abs(low[1:] - prev)])
+    return _wilder(true_range, period)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(MACD line, signal line, histogram)."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close: np.ndarray, window: int = 20, k: float = 2.0, ddof: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(lower, middle, upper) bands."""
+    middle = sma(close, window)
+    spread = k * rolling_std(close, window, ddof)
+    return middle - spread, middle, middle + spread
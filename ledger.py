@@ -0,0 +1,279 @@
+"""
+Compact, array-backed records for backtests.
+
+- TradeLedger: append-only trade log stored in a growable NumPy structured
+  array (61 bytes per trade; tickers and actions are small integer codes)
+  instead of one dict per trade. Columns are exposed as array views for
+  single-pass metrics, and the log exports to pandas or Parquet.
+- EquityCurve: (date, value) pairs in two growable arrays.
+- Position: an open position with __slots__.
+
+Iterating a TradeLedger still yields the familiar trade dicts (built on
+demand), so code written against the old list-of-dicts keeps working.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+TRADE_DTYPE = np.dtype([
+    ('date', 'datetime64[ns]'),
+    ('ticker', np.int32),
+    ('action', np.int8),
+    ('price', np.float64),
+    ('shares', np.float64),
+    ('amount', np.float64),
+    ('pnl', np.float64),         # NaN for buys
+    ('pnl_pct', np.float64),     # NaN for buys
+    ('commission', np.float64),  # NaN when no execution model was used
+])
+BUY, SELL = 1, -1
+ACTION_CODES = {'BUY': BUY, 'SELL': SELL}
+ACTION_NAMES = {BUY: 'BUY', SELL: 'SELL'}
+INITIAL_CAPACITY = 256
+
+
+def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+    """Copy into a buffer at least twice as large (amortized O(1) appends)."""
+    grown = np.empty(max(needed, 2 * len(array), INITIAL_CAPACITY), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class Position:
+    """An open position (dict-style access kept for existing strategies)."""
+
+    __slots__ = ('shares', 'buy_price', 'buy_date', 'cost_basis')
+
+    def __init__(self, shares: float, buy_price: float, buy_date, cost_basis: float):
+        self.shares = shares
+        self.buy_price = buy_price
+        self.buy_date = buy_date
+        self.cost_basis = cost_basis
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Position(shares={self.shares:.4f}, buy_price={self.buy_price:.2f}, buy_date={self.buy_date})"
+
+
+class TradeLedger:
+    """Append-only trade log in a growable NumPy structured array."""
+
+    def __init__(self, tickers: Optional[Sequence[str]] = None):
+        self._data = np.empty(0, dtype=TRADE_DTYPE)
+        self._size = 0
+        self.tickers: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for ticker in tickers or []:
+            self._code(ticker)
+
+    def _code(self, ticker: str) -> int:
+        code = self._codes.get(ticker)
+        if code is None:
+            code = self._codes[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        return code
+
+    def _reserve(self, extra: int):
+        if self._size + extra > len(self._data):
+            self._data = _grow(self._data[:self._size], self._size + extra)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        date,
+        ticker: str,
+        action: str,
+        price: float,
+        shares: float,
+        amount: float,
+        pnl: float = np.nan,
+        pnl_pct: float = np.nan,
+        commission: float = np.nan,
+    ):
+        """Append one trade."""
+        self._reserve(1)
+        self._data[self._size] = (np.datetime64(pd.Timestamp(date), 'ns'), self._code(ticker), ACTION_CODES[action],
+                                  price, shares, amount, pnl, pnl_pct, commission)
+        self._size += 1
+
+    def append(self, trade: Dict[str, Any]):
+        """Append one trade dict (list-compatible)."""
+        self.record(trade['date'], trade['ticker'], trade['action'], trade['price'], trade['shares'],
+                    trade['amount'], trade.get('pnl', np.nan), trade.get('pnl_pct', np.nan),
+                    trade.get('commission', np.nan))
+
+    def append_columns(self, columns: Dict[str, Any], tickers: Sequence[str]):
+        """
+        Bulk append from column arrays; columns['ticker'] holds indexes into
+        `tickers` and columns['action'] holds BUY/SELL codes.
+        """
+        n = len(columns['date'])
+        if n == 0:
+            return
+        remap = np.array([self._code(t) for t in tickers], dtype=np.int32)
+        self._reserve(n)
+        block = self._data[self._size:self._size + n]
+        for name in TRADE_DTYPE.names:
+            if name == 'ticker':
+                block[name] = remap[np.asarray(columns[name], dtype=np.int64)]
+            else:
+                block[name] = columns.get(name, np.nan)
+        self._size += n
+
+    def extend(self, trades: Union["TradeLedger", Iterable[Dict[str, Any]]]):
+        """Append another ledger (columnar copy) or an iterable of trade dicts."""
+        if isinstance(trades, TradeLedger):
+            records = trades.records
+            self.append_columns({name: records[name] for name in TRADE_DTYPE.names}, trades.tickers)
+            return
+        for trade in trades:
+            self.append(trade)
+
+    def clear(self):
+        self._size = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @property
+    def records(self) -> np.ndarray:
+        """Structured array view of the recorded trades."""
+        return self._data[:self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        return self._data[name][:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        return self._size * TRADE_DTYPE.itemsize
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _as_dict(self, row) -> Dict[str, Any]:
+        trade = {
+            'date': pd.Timestamp(row['date']),
+            'ticker': self.tickers[row['ticker']],
+            'action': ACTION_NAMES[int(row['action'])],
+            'price': float(row['price']),
+            'shares': float(row['shares']),
+            'amount': float(row['amount']),
+        }
+        if row['action'] == SELL:
+            trade['pnl'] = float(row['pnl'])
+            trade['pnl_pct'] = float(row['pnl_pct'])
+        if not np.isnan(row['commission']):
+            trade['commission'] = float(row['commission'])
+        return trade
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('trade index out of range')
+        return self._as_dict(self._data[index])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in self.records:
+            yield self._as_dict(row)
+
+    def scaled(self, factor: float) -> "TradeLedger":
+        """Copy with share counts and dollar amounts multiplied by factor (prices unchanged)."""
+        copy = TradeLedger(self.tickers)
+        copy._data = self.records.copy()
+        copy._size = self._size
+        for name in ('shares', 'amount', 'pnl'):
+            copy._data[name] *= factor
+        return copy
+
+    def closed_stats(self) -> Dict[str, float]:
+        """Counts and average returns of closed (SELL) trades, in one pass over the pnl column."""
+        pnl = self.column('pnl')
+        closed = ~np.isnan(pnl)
+        pnl_pct = self.column('pnl_pct')[closed]
+        pnl = pnl[closed]
+        wins, losses = pnl > 0, pnl < 0
+        n_wins, n_losses = int(wins.sum()), int(losses.sum())
+        return {
+            'total_trades': int(closed.sum()),
+            'winning_trades': n_wins,
+            'losing_trades': n_losses,
+            'win_rate': n_wins / len(pnl) * 100 if len(pnl) else 0,
+            'avg_win': pnl_pct[wins].mean() if n_wins else 0,
+            'avg_loss': pnl_pct[losses].mean() if n_losses else 0,
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """Columnar export with ticker and action names."""
+        records = self.records
+        frame = pd.DataFrame({name: records[name] for name in TRADE_DTYPE.names})
+        frame['ticker'] = pd.Categorical.from_codes(records['ticker'], categories=self.tickers) \
+            if self.tickers else pd.Categorical([])
+        frame['action'] = np.where(records['action'] == BUY, 'BUY', 'SELL')
+        return frame
+
+    def to_parquet(self, path, **kwargs):
+        """Write the ledger as a Parquet file (needs pyarrow)."""
+        self.to_frame().to_parquet(path, index=False, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"TradeLedger({self._size} trades, {len(self.tickers)} tickers)"
+
+
+class EquityCurve:
+    """(date, value) pairs in two growable arrays."""
+
+    def __init__(self):
+        self._dates = np.empty(0, dtype='datetime64[ns]')
+        self._values = np.empty(0, dtype=np.float64)
+        self._size = 0
+
+    def _reserve(self, extra: int):
+        if self._size + extra > len(self._values):
+            self._dates = _grow(self._dates[:self._size], self._size + extra)
+            self._values = _grow(self._values[:self._size], self._size + extra)
+
+    def append(self, date, value: float):
+        self._reserve(1)
+        self._dates[self._size] = np.datetime64(pd.Timestamp(date), 'ns')
+        self._values[self._size] = value
+        self._size += 1
+
+    def extend(self, dates, values):
+        n = len(values)
+        self._reserve(n)
+        self._dates[self._size:self._size + n] = pd.DatetimeIndex(dates).values
+        self._values[self._size:self._size + n] = values
+        self._size += n
+
+    def clear(self):
+        self._size = 0
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self._dates[:self._size])
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for date, value in zip(self.dates, self.values.tolist()):
+            yield {'date': date, 'value': value}
+
+    def to_series(self) -> pd.Series:
+        return pd.Series(self.values.copy(), index=self.dates, name='value')
@@ -0,0 +1,150 @@
+"""
+In-process memory tier for the on-disk caches.
+
+A bounded LRU with per-entry TTL that sits in front of the provider JSON
+files (multi_provider) and the keyed stock store (cache_manager), so repeated
+Streamlit reruns are served from already-parsed objects instead of hitting
+the disk and the JSON parser again.
+"""
+
+import copy
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Default memory budget for the shared cache (override with MEMORY_CACHE_MAX_BYTES)
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # 32 MB
+
+
+def _estimate_size(obj: Any) -> int:
+    """Approximate deep size in bytes of a JSON-shaped object."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _estimate_size(key) + _estimate_size(value)
+    elif isinstance(obj, (list, tuple, set)):
+        for item in obj:
+            size += _estimate_size(item)
+    return size
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU cache bounded by an approximate memory budget in bytes.
+
+    Each entry carries its own expiry so callers can apply provider-specific
+    TTLs. Dict and list values are deep-copied on set, so a caller that keeps
+    editing a record after caching it doesn't change the cached value, and
+    dict values are returned as shallow copies so callers that tag results
+    (e.g. data['source'] = ...) don't mutate the cached object.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self._current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live value and mark it most-recently used, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, size = entry
+            if expires_at < time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return dict(value) if isinstance(value, dict) else value
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Insert or replace an entry, evicting least-recently used ones to fit."""
+        if ttl <= 0:
+            self.invalidate(key)
+            return
+
+        if isinstance(value, (dict, list)):
+            value = copy.deepcopy(value)
+        size = _estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if size > self.max_bytes:
+                return  # Larger than the whole budget; leave it to the disk tier
+
+            while self._entries and self._current_bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+            self._entries[key] = (value, time.time() + ttl, size)
+            self._current_bytes += size
+
+    def invalidate(self, key: str):
+        """Drop a single key if present."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_prefix(self, prefix: str):
+        """Drop every key starting with prefix."""
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: str):
+        """Remove an entry; caller must hold the lock."""
+        _, _, size = self._entries.pop(key)
+        self._current_bytes -= size
+
+
+_shared_cache: Optional[MemoryCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_memory_cache() -> MemoryCache:
+    """Return the process-wide memory tier shared by all disk caches."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                max_bytes = int(os.getenv('MEMORY_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+                _shared_cache = MemoryCache(max_bytes=max_bytes)
+    return _shared_cache
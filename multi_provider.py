@@ -6,13 +6,22 @@ to avoid rate limits while keeping everything 100% FREE.
 
 import yfinance as yf
 import requests
-import time
 import json
 import os
-from datetime import datetime, timedelta
-from pathlib import Path
 import threading
-from typing import Dict, List, Optional
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+
+from memory_cache import get_memory_cache
+from provider_health import get_health, get_provider_health, routing_order
+from rate_limiter import DAY, MINUTE, MONTH, RateLimiter
+from revalidate import mark_stale, schedule_refresh
+from singleflight import SingleFlight, get_singleflight_stats
 
 # Load environment variables from .env file if present
 try:
@@ -35,6 +44,13 @@ ALPHA_VANTAGE_CACHE_TTL = 3600  # 1 hour
 TWELVE_DATA_CACHE_TTL = 300  # 5 minutes (real-time)
 MARKETSTACK_CACHE_TTL = 900  # 15 minutes
 
+# Batch endpoints: max symbols per request
+MARKETSTACK_BATCH_SIZE = 100
+
+# Stale-while-revalidate: serve expired entries instantly and refresh in the background
+STALE_WHILE_REVALIDATE = os.getenv('STALE_WHILE_REVALIDATE', 'true').lower() == 'true'
+MAX_STALENESS_SECONDS = 24 * 3600  # never serve anything older than a day
+
 # API Keys (FREE TIER - get yours at the links below)
 # Finnhub: https://finnhub.io/register (60 calls/minute free)
 # Alpha Vantage: https://www.alphavantage.co/support/#api-key (25 calls/day free)
@@ -47,18 +63,42 @@ ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
 TWELVE_DATA_API_KEY = os.getenv('TWELVE_DATA_API_KEY')
 MARKETSTACK_API_KEY = os.getenv('MARKETSTACK_API_KEY')
 
-# Rate limiting
-_yfinance_lock = threading.Lock()
-_finnhub_lock = threading.Lock()
-_alphavantage_lock = threading.Lock()
-_twelvedata_lock = threading.Lock()
-_marketstack_lock = threading.Lock()
-
-YFINANCE_DELAY = 1.5  # seconds between calls
-FINNHUB_DELAY = 1.0   # 60 calls/min = 1 call/sec (safe)
-ALPHAVANTAGE_DELAY = 13.0  # 25 calls/day ≈ 1 call per 13 sec (very conservative)
-TWELVE_DATA_DELAY = 0.11  # 800 calls/day ≈ 8 calls/min (safe with buffer)
-MARKETSTACK_DELAY = 0.1  # 1000 calls/month ≈ 33/day (safe with buffer)
+# Rate limiting: real free-tier quotas (token bucket + sliding windows).
+# Window usage is persisted, so daily/monthly caps hold across restarts.
+PROVIDER_QUOTAS = {
+    'finnhub': {'windows': [(60, MINUTE)], 'burst': 10, 'rate': 1.0},
+    'alphavantage': {'windows': [(5, MINUTE), (25, DAY)]},
+    'twelvedata': {'windows': [(8, MINUTE), (800, DAY)]},
+    'marketstack': {'windows': [(1000, MONTH)], 'burst': 5, 'rate': 0.5},
+}
+RATE_LIMIT_MAX_WAIT = 5.0  # seconds a caller will wait for budget before giving up
+
+_rate_limiters = {name: RateLimiter(name, **quota) for name, quota in PROVIDER_QUOTAS.items()}
+
+# HTTP: one keep-alive connection pool shared by every provider call
+FINNHUB_BASE_URL = "https://finnhub.io"
+ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co"
+TWELVE_DATA_BASE_URL = "https://api.twelvedata.com"
+MARKETSTACK_BASE_URL = "https://api.marketstack.com"
+HTTP_TIMEOUT = 10
+HTTP_POOL_SIZE = 20
+_http_session: Optional[requests.Session] = None
+USE_ASYNC_CLIENT = os.getenv('USE_ASYNC_CLIENT', 'true').lower() == 'true'
+
+# Request coalescing: one in-flight fetch per (provider, ticker)
+_provider_flight = SingleFlight('multi_provider')
+
+# Hedged requests: if the current provider hasn't answered within the latency
+# budget, race the next one in parallel; the first valid quote wins.
+HEDGED_REQUESTS = os.getenv('HEDGED_REQUESTS', 'true').lower() == 'true'
+HEDGE_AFTER_SECONDS = float(os.getenv('HEDGE_AFTER_SECONDS', '2.0'))  # ~p95 of a healthy quote call
+HEDGE_EXCLUDED_PROVIDERS = {'alphavantage'}  # 25 calls/day: sequential last resort, never raced
+HEDGE_MIN_HEADROOM = 0.2  # only race a provider while 20%+ of its tightest quota window is unused
+HEDGE_MAX_WORKERS = 16
+
+_hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix='hedge')
+_hedge_lock = threading.Lock()
+_hedge_stats = {'requests': 0, 'hedges_fired': 0, 'hedge_wins': 0, 'quota_skips': 0}
 
 # ============================================================================
 # CACHE UTILITIES
@@ -69,8 +109,21 @@ def _get_cache_path(provider: str, ticker: str, data_type: str = "main") -> Path
     safe_ticker = ticker.replace(".", "_").replace("/", "_")
     return CACHE_DIR / f"{provider}_{safe_ticker}_{data_type}.json"
 
-def _read_cache(cache_path: Path, ttl_seconds: int) -> Optional[Dict]:
-    """Read cache if it exists and is not expired."""
+def _read_cache(cache_path: Path, ttl_seconds: int, refresh: Optional[Callable[[], Any]] = None) -> Optional[Dict]:
+    """
+    Read cache if it exists and is not expired (memory tier first, then disk).
+    
+    If refresh is given and stale-while-revalidate is enabled, an expired entry
+    younger than MAX_STALENESS_SECONDS is returned tagged with its age while
+    refresh() runs on the background pool.
+    """
+    memory = get_memory_cache()
+    key = str(cache_path)
+    
+    cached = memory.get(key)
+    if cached is not None:
+        return cached
+    
     if not cache_path.exists():
         return None
     
@@ -80,15 +133,27 @@ def _read_cache(cache_path: Path, ttl_seconds: int) -> Optional[Dict]:
         
         # Check expiration
         cached_time = datetime.fromisoformat(data.get('cached_at', '2000-01-01'))
-        if datetime.now() - cached_time > timedelta(seconds=ttl_seconds):
+        age = (datetime.now() - cached_time).total_seconds()
+        if age > ttl_seconds:
+            if refresh and STALE_WHILE_REVALIDATE and age <= MAX_STALENESS_SECONDS and data.get('data'):
+                schedule_refresh(key, refresh)
+                return mark_stale(data['data'], age)
             return None  # Expired
         
+        # Promote to the memory tier for the rest of its lifetime
+        memory.set(key, data.get('data'), ttl_seconds - age)
         return data.get('data')
     except Exception:
         return None
 
-def _write_cache(cache_path: Path, data: Dict):
-    """Write data to cache with timestamp."""
+def _coalesced(provider: str, ticker: str, fetch_func: Callable[[str], Optional[Dict]]) -> Callable[[], Optional[Dict]]:
+    """Wrap fetch_func so concurrent callers for (provider, ticker) share one request."""
+    return lambda: _provider_flight.do((provider, ticker), lambda: fetch_func(ticker))
+
+def _write_cache(cache_path: Path, data: Dict, ttl_seconds: int):
+    """Write data to cache with timestamp (disk, then refresh the memory tier)."""
+    memory = get_memory_cache()
+    memory.invalidate(str(cache_path))
     try:
         cache_data = {
             'cached_at': datetime.now().isoformat(),
@@ -96,6 +161,7 @@ def _write_cache(cache_path: Path, data: Dict):
         }
         with open(cache_path, 'w') as f:
             json.dump(cache_data, f)
+        memory.set(str(cache_path), data, ttl_seconds)
     except Exception as e:
         print(f"⚠️ Cache write failed: {e}")
 
@@ -111,15 +177,32 @@ def get_yfinance_data(ticker: str) -> Optional[Dict]:
     """
     cache_path = _get_cache_path('yfinance', ticker)
     
-    # Try cache first
-    cached = _read_cache(cache_path, YFINANCE_CACHE_TTL)
+    # Try cache first (expired entries are served stale while a refresh runs)
+    fetch = _coalesced('yfinance', ticker, _fetch_yfinance_data)
+    cached = _read_cache(cache_path, YFINANCE_CACHE_TTL, refresh=fetch)
     if cached:
         return cached
     
-    # Import safe rate-limited fetch from data_sources
+    # Concurrent callers for the same ticker share one in-flight request
+    return fetch()
+
+def _fetch_yfinance_data(ticker: str) -> Optional[Dict]:
+    """Fetch from Yahoo Finance (via data_sources) and write the cache."""
+    cache_path = _get_cache_path('yfinance', ticker)
+    
+    health = get_health('yfinance')
+    if not health.allow_request():
+        print(f"⏭️ Yahoo Finance circuit open, skipping {ticker}")
+        return None
+    
+    # Import safe rate-limited fetch from data_sources. It reports outcomes to
+    # the breaker itself, only for calls that actually reached Yahoo
     try:
         from data_sources import get_stock_data
-        result = get_stock_data(ticker)
+        try:
+            result = get_stock_data(ticker)
+        finally:
+            health.release_probe()  # answered from a cache: the probe never went out
         
         if result and result.get('success'):
             # Map data_sources format to multi_provider format
@@ -137,11 +220,15 @@ def get_yfinance_data(ticker: str) -> Optional[Dict]:
                 'volume': result.get('volume', 0),
                 'avg_volume': result.get('avgVolume', 0),
                 'history': result.get('history', {}),
+                'rsi': result.get('rsi'),
+                'rsi_state': result.get('rsi_state'),
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Cache and return
-            _write_cache(cache_path, data)
+            # Cache and return (a stale upstream answer is passed through, not re-cached as fresh)
+            if result.get('stale'):
+                return mark_stale(data, result.get('cache_age', 0))
+            _write_cache(cache_path, data, YFINANCE_CACHE_TTL)
             return data
             
     except Exception as e:
@@ -165,43 +252,36 @@ def get_finnhub_quote(ticker: str) -> Optional[Dict]:
     
     cache_path = _get_cache_path('finnhub', ticker, 'quote')
     
-    # Try cache first
-    cached = _read_cache(cache_path, FINNHUB_CACHE_TTL)
+    # Try cache first (expired entries are served stale while a refresh runs)
+    fetch = _coalesced('finnhub', ticker, _fetch_finnhub_quote)
+    cached = _read_cache(cache_path, FINNHUB_CACHE_TTL, refresh=fetch)
     if cached:
         return cached
     
-    # Rate-limited fetch
-    with _finnhub_lock:
-        try:
-            url = f"https://finnhub.io/api/v1/quote?symbol={ticker}&token={FINNHUB_API_KEY}"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                quote = response.json()
-                
-                data = {
-                    'ticker': ticker,
-                    'current_price': quote.get('c', 0),  # Current price
-                    'change': quote.get('d', 0),          # Change
-                    'percent_change': quote.get('dp', 0),  # Percent change
-                    'high': quote.get('h', 0),            # Day high
-                    'low': quote.get('l', 0),             # Day low
-                    'open': quote.get('o', 0),            # Day open
-                    'previous_close': quote.get('pc', 0), # Previous close
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                _write_cache(cache_path, data)
-                time.sleep(FINNHUB_DELAY)
-                return data
-            else:
-                time.sleep(FINNHUB_DELAY)
-                return None
-                
-        except Exception as e:
-            print(f"⚠️ Finnhub error for {ticker}: {e}")
-            time.sleep(FINNHUB_DELAY)
-            return None
+    # Concurrent callers for the same ticker share one in-flight request
+    return fetch()
+
+def _finnhub_request(ticker: str) -> Tuple[str, Dict]:
+    """URL and query params for a Finnhub quote."""
+    return f"{FINNHUB_BASE_URL}/api/v1/quote", {'symbol': ticker, 'token': FINNHUB_API_KEY}
+
+def _parse_finnhub_quote(ticker: str, quote: Dict) -> Optional[Dict]:
+    """Map a Finnhub quote payload to the unified format."""
+    return {
+        'ticker': ticker,
+        'current_price': quote.get('c', 0),  # Current price
+        'change': quote.get('d', 0),          # Change
+        'percent_change': quote.get('dp', 0),  # Percent change
+        'high': quote.get('h', 0),            # Day high
+        'low': quote.get('l', 0),             # Day low
+        'open': quote.get('o', 0),            # Day open
+        'previous_close': quote.get('pc', 0), # Previous close
+        'timestamp': datetime.now().isoformat()
+    }
+
+def _fetch_finnhub_quote(ticker: str) -> Optional[Dict]:
+    """Fetch a Finnhub quote over the network and write the cache."""
+    return _fetch_http_provider('finnhub', ticker)
 
 # ============================================================================
 # ALPHA VANTAGE (Backup for indicators, FX)
@@ -219,48 +299,41 @@ def get_alphavantage_overview(ticker: str) -> Optional[Dict]:
     
     cache_path = _get_cache_path('alphavantage', ticker, 'overview')
     
-    # Try cache first
-    cached = _read_cache(cache_path, ALPHA_VANTAGE_CACHE_TTL)
+    # Try cache first (expired entries are served stale while a refresh runs)
+    fetch = _coalesced('alphavantage', ticker, _fetch_alphavantage_overview)
+    cached = _read_cache(cache_path, ALPHA_VANTAGE_CACHE_TTL, refresh=fetch)
     if cached:
         return cached
     
-    # Rate-limited fetch (VERY conservative for 25/day limit)
-    with _alphavantage_lock:
-        try:
-            url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={ticker}&apikey={ALPHA_VANTAGE_API_KEY}"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                overview = response.json()
-                
-                if 'Symbol' not in overview:
-                    return None  # Invalid response
-                
-                data = {
-                    'ticker': ticker,
-                    'name': overview.get('Name', ticker),
-                    'sector': overview.get('Sector', 'Unknown'),
-                    'industry': overview.get('Industry', 'Unknown'),
-                    'market_cap': float(overview.get('MarketCapitalization', 0)),
-                    'pe_ratio': float(overview.get('PERatio', 0)),
-                    'peg_ratio': float(overview.get('PEGRatio', 0)),
-                    'dividend_yield': float(overview.get('DividendYield', 0)),
-                    'eps': float(overview.get('EPS', 0)),
-                    'analyst_target': float(overview.get('AnalystTargetPrice', 0)),
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                _write_cache(cache_path, data)
-                time.sleep(ALPHAVANTAGE_DELAY)
-                return data
-            else:
-                time.sleep(ALPHAVANTAGE_DELAY)
-                return None
-                
-        except Exception as e:
-            print(f"⚠️ Alpha Vantage error for {ticker}: {e}")
-            time.sleep(ALPHAVANTAGE_DELAY)
-            return None
+    # Concurrent callers for the same ticker share one in-flight request
+    return fetch()
+
+def _alphavantage_request(ticker: str) -> Tuple[str, Dict]:
+    """URL and query params for an Alpha Vantage company overview."""
+    return f"{ALPHA_VANTAGE_BASE_URL}/query", {'function': 'OVERVIEW', 'symbol': ticker, 'apikey': ALPHA_VANTAGE_API_KEY}
+
+def _parse_alphavantage_overview(ticker: str, overview: Dict) -> Optional[Dict]:
+    """Map an Alpha Vantage overview payload to the unified format."""
+    if 'Symbol' not in overview:
+        return None  # Invalid response
+    
+    return {
+        'ticker': ticker,
+        'name': overview.get('Name', ticker),
+        'sector': overview.get('Sector', 'Unknown'),
+        'industry': overview.get('Industry', 'Unknown'),
+        'market_cap': float(overview.get('MarketCapitalization', 0)),
+        'pe_ratio': float(overview.get('PERatio', 0)),
+        'peg_ratio': float(overview.get('PEGRatio', 0)),
+        'dividend_yield': float(overview.get('DividendYield', 0)),
+        'eps': float(overview.get('EPS', 0)),
+        'analyst_target': float(overview.get('AnalystTargetPrice', 0)),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def _fetch_alphavantage_overview(ticker: str) -> Optional[Dict]:
+    """Fetch an Alpha Vantage overview over the network and write the cache."""
+    return _fetch_http_provider('alphavantage', ticker)
 
 # ============================================================================
 # TWELVE DATA (Real-time quotes, time series)
@@ -278,55 +351,45 @@ def get_twelvedata_quote(ticker: str) -> Optional[Dict]:
     
     cache_path = _get_cache_path('twelvedata', ticker, 'quote')
     
-    # Try cache first
-    cached = _read_cache(cache_path, TWELVE_DATA_CACHE_TTL)
+    # Try cache first (expired entries are served stale while a refresh runs)
+    fetch = _coalesced('twelvedata', ticker, _fetch_twelvedata_quote)
+    cached = _read_cache(cache_path, TWELVE_DATA_CACHE_TTL, refresh=fetch)
     if cached:
         return cached
     
-    # Rate-limited fetch
-    with _twelvedata_lock:
-        try:
-            url = f"https://api.twelvedata.com/quote?symbol={ticker}&apikey={TWELVE_DATA_API_KEY}"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                quote = response.json()
-                
-                # Check for API error response
-                if 'code' in quote or 'status' in quote:
-                    print(f"⚠️ Twelve Data API error for {ticker}: {quote.get('message', 'Unknown error')}")
-                    time.sleep(TWELVE_DATA_DELAY)
-                    return None
-                
-                # Extract data
-                data = {
-                    'ticker': ticker,
-                    'name': quote.get('name', ticker),
-                    'current_price': float(quote.get('close', 0)),
-                    'previous_close': float(quote.get('previous_close', 0)),
-                    'change': float(quote.get('change', 0)),
-                    'percent_change': float(quote.get('percent_change', 0)),
-                    'high': float(quote.get('high', 0)),
-                    'low': float(quote.get('low', 0)),
-                    'open': float(quote.get('open', 0)),
-                    'volume': int(quote.get('volume', 0)),
-                    'fifty_two_week_high': float(quote.get('fifty_two_week', {}).get('high', 0)),
-                    'fifty_two_week_low': float(quote.get('fifty_two_week', {}).get('low', 0)),
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                _write_cache(cache_path, data)
-                time.sleep(TWELVE_DATA_DELAY)
-                return data
-            else:
-                print(f"⚠️ Twelve Data HTTP {response.status_code} for {ticker}")
-                time.sleep(TWELVE_DATA_DELAY)
-                return None
-                
-        except Exception as e:
-            print(f"⚠️ Twelve Data error for {ticker}: {e}")
-            time.sleep(TWELVE_DATA_DELAY)
-            return None
+    # Concurrent callers for the same ticker share one in-flight request
+    return fetch()
+
+def _twelvedata_request(ticker: str) -> Tuple[str, Dict]:
+    """URL and query params for a Twelve Data quote."""
+    return f"{TWELVE_DATA_BASE_URL}/quote", {'symbol': ticker, 'apikey': TWELVE_DATA_API_KEY}
+
+def _parse_twelvedata_quote(ticker: str, quote: Dict) -> Optional[Dict]:
+    """Map a Twelve Data quote payload to the unified format."""
+    # Check for API error response
+    if 'code' in quote or 'status' in quote:
+        print(f"⚠️ Twelve Data API error for {ticker}: {quote.get('message', 'Unknown error')}")
+        return None
+    
+    return {
+        'ticker': ticker,
+        'name': quote.get('name', ticker),
+        'current_price': float(quote.get('close', 0)),
+        'previous_close': float(quote.get('previous_close', 0)),
+        'change': float(quote.get('change', 0)),
+        'percent_change': float(quote.get('percent_change', 0)),
+        'high': float(quote.get('high', 0)),
+        'low': float(quote.get('low', 0)),
+        'open': float(quote.get('open', 0)),
+        'volume': int(quote.get('volume', 0)),
+        'fifty_two_week_high': float(quote.get('fifty_two_week', {}).get('high', 0)),
+        'fifty_two_week_low': float(quote.get('fifty_two_week', {}).get('low', 0)),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def _fetch_twelvedata_quote(ticker: str) -> Optional[Dict]:
+    """Fetch a Twelve Data quote over the network and write the cache."""
+    return _fetch_http_provider('twelvedata', ticker)
 
 # ============================================================================
 # MARKETSTACK (EOD data, real-time intraday)
@@ -344,142 +407,345 @@ def get_marketstack_data(ticker: str) -> Optional[Dict]:
     
     cache_path = _get_cache_path('marketstack', ticker, 'eod')
     
-    # Try cache first
-    cached = _read_cache(cache_path, MARKETSTACK_CACHE_TTL)
+    # Try cache first (expired entries are served stale while a refresh runs)
+    fetch = _coalesced('marketstack', ticker, _fetch_marketstack_data)
+    cached = _read_cache(cache_path, MARKETSTACK_CACHE_TTL, refresh=fetch)
     if cached:
         return cached
     
-    # Rate-limited fetch
-    with _marketstack_lock:
+    # Concurrent callers for the same ticker share one in-flight request
+    return fetch()
+
+def _marketstack_request(ticker: str) -> Tuple[str, Dict]:
+    """URL and query params for the latest MarketStack EOD bar."""
+    params = {
+        'access_key': MARKETSTACK_API_KEY,
+        'symbols': ticker,
+        'limit': 1
+    }
+    return f"{MARKETSTACK_BASE_URL}/v1/eod/latest", params
+
+def _parse_marketstack_data(ticker: str, result: Dict) -> Optional[Dict]:
+    """Map a MarketStack EOD payload to the unified format."""
+    # Check for API error
+    if 'error' in result:
+        print(f"⚠️ MarketStack API error for {ticker}: {result['error'].get('message', 'Unknown error')}")
+        return None
+    
+    # Extract data from response
+    if not result.get('data') or len(result['data']) == 0:
+        print(f"⚠️ MarketStack: No data for {ticker}")
+        return None
+    
+    quote = result['data'][0]
+    
+    # Calculate percent change
+    close = float(quote.get('close', 0))
+    open_price = float(quote.get('open', 0))
+    percent_change = ((close - open_price) / open_price * 100) if open_price > 0 else 0.0
+    
+    return {
+        'ticker': ticker,
+        'name': quote.get('symbol', ticker),
+        'current_price': close,
+        'open': open_price,
+        'high': float(quote.get('high', 0)),
+        'low': float(quote.get('low', 0)),
+        'previous_close': float(quote.get('adj_close', close)),
+        'change': close - open_price,
+        'percent_change': percent_change,
+        'volume': int(quote.get('volume', 0)),
+        'date': quote.get('date', datetime.now().isoformat()),
+        'exchange': quote.get('exchange', 'Unknown'),
+        'timestamp': datetime.now().isoformat(),
+        'provider': 'marketstack'
+    }
+
+def _fetch_marketstack_data(ticker: str) -> Optional[Dict]:
+    """Fetch MarketStack EOD data over the network and write the cache."""
+    return _fetch_http_provider('marketstack', ticker)
+
+def get_marketstack_batch(tickers: List[str]) -> Dict[str, Dict]:
+    """
+    Fetch many tickers from MarketStack with one eod/latest call per
+    MARKETSTACK_BATCH_SIZE symbols, demultiplexed into the per-ticker caches.
+    Costs one unit of the monthly quota per chunk instead of per ticker.
+    """
+    if not MARKETSTACK_API_KEY:
+        return {}
+    
+    results = {}
+    missing = []
+    for ticker in dict.fromkeys(tickers):
+        cached = _read_cache(_get_cache_path('marketstack', ticker, 'eod'), MARKETSTACK_CACHE_TTL)
+        if cached:
+            results[ticker] = cached
+        else:
+            missing.append(ticker)
+    
+    health = get_health('marketstack')
+    for start in range(0, len(missing), MARKETSTACK_BATCH_SIZE):
+        chunk = missing[start:start + MARKETSTACK_BATCH_SIZE]
+        # Same breaker as the per-ticker path: an open circuit skips the rest
+        if not health.allow_request():
+            print(f"⏭️ MarketStack circuit open, skipping {len(missing) - start} tickers")
+            break
+        if not _rate_limiters['marketstack'].acquire(timeout=RATE_LIMIT_MAX_WAIT):
+            health.release_probe()
+            print(f"⚠️ MarketStack rate limit reached, skipping {len(chunk)} tickers")
+            break
+        
+        request_start = time.monotonic()
         try:
-            # Get latest EOD data (use HTTPS for better compatibility)
-            url = f"https://api.marketstack.com/v1/eod/latest"
             params = {
                 'access_key': MARKETSTACK_API_KEY,
-                'symbols': ticker,
-                'limit': 1
+                'symbols': ",".join(chunk),
+                'limit': len(chunk)
             }
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Check for API error
-                if 'error' in result:
-                    print(f"⚠️ MarketStack API error for {ticker}: {result['error'].get('message', 'Unknown error')}")
-                    time.sleep(MARKETSTACK_DELAY)
-                    return None
-                
-                # Extract data from response
-                if not result.get('data') or len(result['data']) == 0:
-                    print(f"⚠️ MarketStack: No data for {ticker}")
-                    time.sleep(MARKETSTACK_DELAY)
-                    return None
-                
-                quote = result['data'][0]
-                
-                # Calculate percent change
-                close = float(quote.get('close', 0))
-                open_price = float(quote.get('open', 0))
-                percent_change = ((close - open_price) / open_price * 100) if open_price > 0 else 0.0
-                
-                data = {
-                    'ticker': ticker,
-                    'name': quote.get('symbol', ticker),
-                    'current_price': close,
-                    'open': open_price,
-                    'high': float(quote.get('high', 0)),
-                    'low': float(quote.get('low', 0)),
-                    'previous_close': float(quote.get('adj_close', close)),
-                    'change': close - open_price,
-                    'percent_change': percent_change,
-                    'volume': int(quote.get('volume', 0)),
-                    'date': quote.get('date', datetime.now().isoformat()),
-                    'exchange': quote.get('exchange', 'Unknown'),
-                    'timestamp': datetime.now().isoformat(),
-                    'provider': 'marketstack'
-                }
-                
-                _write_cache(cache_path, data)
-                time.sleep(MARKETSTACK_DELAY)
-                return data
-            else:
-                print(f"⚠️ MarketStack HTTP {response.status_code} for {ticker}")
-                time.sleep(MARKETSTACK_DELAY)
-                return None
-                
+            response = _get_http_session().get(f"{MARKETSTACK_BASE_URL}/v1/eod/latest", params=params, timeout=HTTP_TIMEOUT)
+            if response.status_code != 200:
+                health.record_failure(time.monotonic() - request_start, f"HTTP {response.status_code}",
+                                      retry_after=_retry_after(response.status_code, response.headers))
+                print(f"⚠️ MarketStack HTTP {response.status_code} for batch of {len(chunk)}")
+                continue
+            payload = response.json()
         except Exception as e:
-            print(f"⚠️ MarketStack error for {ticker}: {e}")
-            time.sleep(MARKETSTACK_DELAY)
+            health.record_failure(time.monotonic() - request_start, type(e).__name__)
+            print(f"⚠️ MarketStack batch error: {e}")
+            continue
+        health.record_success(time.monotonic() - request_start)
+        
+        if 'error' in payload:
+            print(f"⚠️ MarketStack API error: {payload['error'].get('message', 'Unknown error')}")
+            continue
+        
+        # Demultiplex: one row per symbol, cached exactly like a single fetch
+        for row in payload.get('data') or []:
+            ticker = row.get('symbol')
+            if ticker in chunk and ticker not in results:
+                data = _handle_payload('marketstack', ticker, {'data': [row]})
+                if data:
+                    results[ticker] = data
+    
+    return results
+
+# ============================================================================
+# SHARED HTTP PLUMBING (used by the sync fetchers and async_client)
+# ============================================================================
+
+# name -> (label, cache data_type, cache TTL, request builder, payload parser)
+HTTP_PROVIDERS = {
+    'finnhub': ('Finnhub', 'quote', FINNHUB_CACHE_TTL, _finnhub_request, _parse_finnhub_quote),
+    'alphavantage': ('Alpha Vantage', 'overview', ALPHA_VANTAGE_CACHE_TTL, _alphavantage_request, _parse_alphavantage_overview),
+    'twelvedata': ('Twelve Data', 'quote', TWELVE_DATA_CACHE_TTL, _twelvedata_request, _parse_twelvedata_quote),
+    'marketstack': ('MarketStack', 'eod', MARKETSTACK_CACHE_TTL, _marketstack_request, _parse_marketstack_data),
+}
+
+def _get_http_session() -> requests.Session:
+    """Process-wide keep-alive session so calls reuse TCP+TLS connections."""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(HTTP_PROVIDERS), pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _http_session = session
+    return _http_session
+
+def _handle_payload(provider: str, ticker: str, payload: Dict) -> Optional[Dict]:
+    """Parse a provider payload and write the result to the cache."""
+    label, data_type, ttl, _, parse = HTTP_PROVIDERS[provider]
+    try:
+        data = parse(ticker, payload)
+    except Exception as e:
+        print(f"⚠️ {label} error for {ticker}: {e}")
+        return None
+    
+    if data:
+        _write_cache(_get_cache_path(provider, ticker, data_type), data, ttl)
+    return data
+
+def _retry_after(status_code: int, headers) -> Optional[float]:
+    """Seconds to back off after a 429 (Retry-After header, else the breaker default)."""
+    if status_code != 429:
+        return None
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+def _fetch_http_provider(provider: str, ticker: str) -> Optional[Dict]:
+    """Rate-limited request over the shared session, parsed and cached."""
+    label, _, _, build_request, _ = HTTP_PROVIDERS[provider]
+    health = get_health(provider)
+    
+    # A provider with an open circuit fails fast instead of timing out
+    if not health.allow_request():
+        print(f"⏭️ {label} circuit open, skipping {ticker}")
+        return None
+    
+    # Reserve quota; the request itself runs without holding any lock
+    if not _rate_limiters[provider].acquire(timeout=RATE_LIMIT_MAX_WAIT):
+        health.release_probe()
+        print(f"⚠️ {label} rate limit reached, skipping {ticker}")
+        return None
+    
+    start = time.monotonic()
+    try:
+        url, params = build_request(ticker)
+        response = _get_http_session().get(url, params=params, timeout=HTTP_TIMEOUT)
+        
+        if response.status_code != 200:
+            health.record_failure(time.monotonic() - start, f"HTTP {response.status_code}",
+                                  retry_after=_retry_after(response.status_code, response.headers))
+            print(f"⚠️ {label} HTTP {response.status_code} for {ticker}")
             return None
+        
+        payload = response.json()
+    except Exception as e:
+        health.record_failure(time.monotonic() - start, type(e).__name__)
+        print(f"⚠️ {label} error for {ticker}: {e}")
+        return None
+    
+    health.record_success(time.monotonic() - start)
+    return _handle_payload(provider, ticker, payload)
 
 # ============================================================================
 # UNIFIED API - Combines all providers intelligently
 # ============================================================================
 
-def fetch_quote_multi_provider(ticker: str) -> Optional[Dict]:
+def _provider_headroom(provider: str) -> float:
+    limiter = _rate_limiters.get(provider)
+    return limiter.headroom() if limiter else 1.0
+
+def _quote_providers() -> List[Tuple[str, str, Callable[[str], Optional[Dict]]]]:
     """
-    Fetch stock quote with cascading fallback across providers.
-    
-    Strategy: Yahoo → Finnhub → MarketStack → Alpha Vantage (immediate fallback on error)
-    - Try Yahoo Finance first (with safe rate limiting)
-    - If Yahoo fails (429, parse error, etc.), immediately try Finnhub
-    - If Finnhub fails, try MarketStack
-    - If MarketStack fails, try Alpha Vantage
-    - Return None only after all providers fail
-    
-    Returns unified dict with stock data, or None if all providers fail.
+    Configured quote providers as (name, label, fetch), routed by health:
+    the cascade order Yahoo → Finnhub → MarketStack → Alpha Vantage, with
+    open circuits moved last and degraded or quota-starved providers after
+    the healthy ones.
     """
-    # Try Yahoo Finance first
+    providers = {'yfinance': ('yfinance', 'Yahoo Finance', get_yfinance_data)}
+    if FINNHUB_API_KEY:
+        providers['finnhub'] = ('finnhub', 'Finnhub', get_finnhub_quote)
+    if MARKETSTACK_API_KEY:
+        providers['marketstack'] = ('marketstack', 'MarketStack', get_marketstack_data)
+    if ALPHA_VANTAGE_API_KEY:
+        providers['alphavantage'] = ('alphavantage', 'Alpha Vantage', get_alphavantage_overview)
+    
+    order = routing_order(list(providers), _provider_headroom, low_headroom=HEDGE_MIN_HEADROOM)
+    return [providers[name] for name in order]
+
+def _has_hedge_budget(provider: str) -> bool:
+    """A speculative (hedge) call is only worth it while the provider has quota to spare."""
+    if not get_health(provider).is_available():
+        return False
+    limiter = _rate_limiters.get(provider)
+    if limiter is None:
+        return True  # Yahoo is throttled inside data_sources, not by quota
+    return limiter.wait_time() <= 0 and limiter.headroom() >= HEDGE_MIN_HEADROOM
+
+def _record_hedge(stat: str):
+    with _hedge_lock:
+        _hedge_stats[stat] += 1
+
+def _try_quote(label: str, fetch: Callable[[str], Optional[Dict]], ticker: str) -> Optional[Dict]:
+    """One provider attempt; returns the quote only if it has a price."""
     try:
-        yf_data = get_yfinance_data(ticker)
-        if yf_data and yf_data.get('current_price'):
-            print(f"✅ Yahoo Finance success for {ticker}")
-            return yf_data
-        else:
-            print(f"⚠️ Yahoo Finance failed for {ticker}, trying Finnhub...")
+        data = fetch(ticker)
+        if data and data.get('current_price'):
+            print(f"✅ {label} success for {ticker}")
+            return data
+        print(f"⚠️ {label} failed for {ticker}")
     except Exception as e:
-        print(f"⚠️ Yahoo Finance exception for {ticker}, trying Finnhub... ({e})")
+        print(f"⚠️ {label} exception for {ticker}: {e}")
+    return None
+
+def _fetch_quote_hedged(ticker: str, providers: List[Tuple[str, str, Callable]]) -> Optional[Dict]:
+    """
+    Race providers: start the first one; each time HEDGE_AFTER_SECONDS pass
+    without an answer, also start the next one that has quota to spare. When
+    every running call has failed, the next provider starts immediately, as
+    in the serial cascade. Excluded providers run afterwards, one at a time.
     
-    # Fallback to Finnhub if API key available
-    if FINNHUB_API_KEY:
-        try:
-            fh_data = get_finnhub_quote(ticker)
-            if fh_data and fh_data.get('current_price'):
-                print(f"✅ Finnhub success for {ticker}")
-                return fh_data
+    Losing calls are not cancelled; they finish in the background and still
+    populate their provider cache.
+    """
+    queue = [p for p in providers if p[0] not in HEDGE_EXCLUDED_PROVIDERS]
+    reserves = [p for p in providers if p[0] in HEDGE_EXCLUDED_PROVIDERS]
+    pending = {}  # future -> launched as a hedge?
+    
+    def _launch(provider, hedge: bool):
+        queue.remove(provider)
+        _, label, fetch = provider
+        pending[_hedge_executor.submit(_try_quote, label, fetch, ticker)] = hedge
+        if hedge:
+            _record_hedge('hedges_fired')
+    
+    _record_hedge('requests')
+    while queue or pending:
+        if not pending:
+            _launch(queue[0], hedge=False)
+        
+        done, _ = wait(pending, timeout=HEDGE_AFTER_SECONDS if queue else None, return_when=FIRST_COMPLETED)
+        for future in done:
+            hedge = pending.pop(future)
+            data = future.result()
+            if data:
+                if hedge:
+                    _record_hedge('hedge_wins')
+                return data
+        
+        if not done:
+            # Latency budget exceeded: race the next provider that can afford it
+            candidate = next((p for p in queue if _has_hedge_budget(p[0])), None)
+            if candidate:
+                _launch(candidate, hedge=True)
             else:
-                print(f"⚠️ Finnhub failed for {ticker}, trying MarketStack...")
-        except Exception as e:
-            print(f"⚠️ Finnhub exception for {ticker}, trying MarketStack... ({e})")
+                _record_hedge('quota_skips')
     
-    # Fallback to MarketStack if API key available
-    if MARKETSTACK_API_KEY:
-        try:
-            ms_data = get_marketstack_data(ticker)
-            if ms_data and ms_data.get('current_price'):
-                print(f"✅ MarketStack success for {ticker}")
-                return ms_data
-            else:
-                print(f"⚠️ MarketStack failed for {ticker}, trying Alpha Vantage...")
-        except Exception as e:
-            print(f"⚠️ MarketStack exception for {ticker}, trying Alpha Vantage... ({e})")
+    for _, label, fetch in reserves:
+        data = _try_quote(label, fetch, ticker)
+        if data:
+            return data
+    return None
+
+def fetch_quote_multi_provider(ticker: str) -> Optional[Dict]:
+    """
+    Fetch stock quote with fallback across providers.
+    
+    Strategy: Yahoo → Finnhub → MarketStack → Alpha Vantage, reordered by
+    provider health (see provider_health); open circuits fail fast
+    - Hedged (default): if a provider hasn't answered within HEDGE_AFTER_SECONDS,
+      the next one is fired in parallel and the first valid quote wins.
+      Providers short on quota are not raced, and Alpha Vantage is only
+      tried after everything else has failed.
+    - Serial (HEDGED_REQUESTS=false): each provider is tried only after the
+      previous one failed.
+    - Return None only after all providers fail
     
-    # Fallback to Alpha Vantage if API key available
-    if ALPHA_VANTAGE_API_KEY:
-        try:
-            av_data = get_alphavantage_overview(ticker)
-            if av_data and av_data.get('current_price'):
-                print(f"✅ Alpha Vantage success for {ticker}")
-                return av_data
-            else:
-                print(f"⚠️ Alpha Vantage failed for {ticker}")
-        except Exception as e:
-            print(f"⚠️ Alpha Vantage exception for {ticker}: {e}")
+    Returns unified dict with stock data, or None if all providers fail.
+    """
+    providers = _quote_providers()
+    
+    if HEDGED_REQUESTS and HEDGE_AFTER_SECONDS > 0:
+        data = _fetch_quote_hedged(ticker, providers)
+        if data:
+            return data
+    else:
+        for _, label, fetch in providers:
+            data = _try_quote(label, fetch, ticker)
+            if data:
+                return data
     
     print(f"❌ All providers failed for {ticker}")
     return None
 
+def get_hedge_stats() -> Dict[str, int]:
+    """Hedged-request counters: quote requests, hedges fired, hedges that won, skips for quota."""
+    with _hedge_lock:
+        return dict(_hedge_stats)
+
 def get_stock_data_multi(ticker: str) -> Optional[Dict]:
     """
     Fetch stock data from multiple providers in parallel.
@@ -510,6 +776,11 @@ def get_stock_data_multi(ticker: str) -> Optional[Dict]:
             results['day_high'] = fh_data['high']
             results['day_low'] = fh_data['low']
             results['realtime'] = True
+            
+            # Move RSI to the live price from the cached indicator state (no history refetch)
+            if results.get('rsi_state'):
+                from data_sources import refresh_rsi
+                results.update(refresh_rsi(results, fh_data['current_price']))
     
     # Supplemental: MarketStack (if API key available and no data yet)
     if not results and MARKETSTACK_API_KEY:
@@ -525,17 +796,56 @@ def get_stock_data_multi(ticker: str) -> Optional[Dict]:
     
     return results if results else None
 
-def get_stocks_parallel_multi(tickers: List[str], max_workers: int = 3) -> Dict[str, Dict]:
+def prefetch_batch(tickers: List[str]) -> Dict[str, Dict]:
+    """
+    Warm the per-ticker caches using batch-capable providers, in cascade order:
+    Yahoo (one history download per chunk), then MarketStack (one call per
+    chunk) for whatever Yahoo could not provide. Per-ticker fetches that
+    follow are then served from cache.
+    
+    Returns dict of tickers -> provider data that was prefetched.
+    """
+    prefetched = {}
+    try:
+        from data_sources import get_stocks_batch
+        for ticker, result in get_stocks_batch(tickers).items():
+            if result.get('success'):
+                prefetched[ticker] = result
+    except Exception as e:
+        print(f"⚠️ Yahoo batch prefetch failed: {e}")
+    
+    remaining = [t for t in tickers if t not in prefetched]
+    if remaining and MARKETSTACK_API_KEY:
+        prefetched.update(get_marketstack_batch(remaining))
+    
+    return prefetched
+
+def get_stocks_parallel_multi(tickers: List[str], max_workers: int = 3, prefetch: bool = True) -> Dict[str, Dict]:
     """
     Fetch multiple stocks in parallel with cascading fallback across providers.
     
     Args:
         tickers: List of ticker symbols
         max_workers: Number of parallel workers (3 is safe for free tiers)
+        prefetch: Warm caches with prefetch_batch first; pass False when the
+            caller has already prefetched these tickers
     
     Returns:
         Dict mapping ticker -> stock data (using fetch_quote_multi_provider with fallback)
     """
+    # Warm per-ticker caches with batch endpoints first
+    if prefetch:
+        prefetch_batch(tickers)
+    
+    # Preferred path: one event loop, pooled keep-alive connections
+    if USE_ASYNC_CLIENT:
+        try:
+            from async_client import HTTPX_AVAILABLE, fetch_quotes
+            if HTTPX_AVAILABLE:
+                return fetch_quotes(tickers)
+        except Exception as e:
+            print(f"⚠️ Async client failed, falling back to thread pool: {e}")
+    
     from concurrent.futures import ThreadPoolExecutor, as_completed
     
     results = {}
@@ -578,9 +888,11 @@ def clear_cache(provider: Optional[str] = None, ticker: Optional[str] = None):
         safe_ticker = ticker.replace(".", "_").replace("/", "_")
         pattern = f"*_{safe_ticker}_*"
     
+    memory = get_memory_cache()
     count = 0
     for cache_file in CACHE_DIR.glob(pattern + ".json"):
         cache_file.unlink()
+        memory.invalidate(str(cache_file))
         count += 1
     
     print(f"✅ Cleared {count} cache files")
@@ -599,7 +911,9 @@ def get_cache_stats() -> Dict:
     return {
         'total_files': len(cache_files),
         'total_size_mb': total_size / (1024 * 1024),
-        'by_provider': providers
+        'by_provider': providers,
+        'memory': get_memory_cache().stats(),
+        'singleflight': get_singleflight_stats()
     }
 
 # ============================================================================
@@ -614,6 +928,22 @@ def validate_api_keys() -> Dict[str, bool]:
         'marketstack': bool(MARKETSTACK_API_KEY)
     }
 
+def get_rate_limit_status() -> Dict[str, Dict]:
+    """Remaining quota per provider (per window) plus current wait time."""
+    return {name: limiter.status() for name, limiter in _rate_limiters.items()}
+
+def get_routing_status() -> Dict[str, Any]:
+    """Current routing order plus breaker state, latency, errors and quota headroom per provider."""
+    health = get_provider_health()
+    order = [name for name, _, _ in _quote_providers()]
+    return {
+        'order': order,
+        'providers': {
+            name: {**health.get(name, get_health(name).snapshot()), 'headroom': _provider_headroom(name)}
+            for name in order
+        },
+    }
+
 def get_provider_status() -> str:
     """Get human-readable status of configured providers."""
     keys = validate_api_keys()
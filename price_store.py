@@ -0,0 +1,368 @@
+"""
+Local columnar store for daily OHLCV history.
+
+One Arrow IPC (Feather v2, uncompressed) file per ticker under
+.cache/prices, plus a manifest recording which date range has already been
+requested for each ticker. A query only downloads the parts of its range
+the manifest does not cover (the missing head and/or tail), merges them into
+the ticker's file, and reads everything back through a memory map so the
+numeric columns land in pandas without a copy. Coverage is always one
+contiguous range: a request that starts past the covered end downloads from
+the covered end, so no stretch in between is marked covered unfetched. The manifest also records
+when the last stored bar was fetched; a bar fetched before its session
+closed is an intraday snapshot and is downloaded again after the close.
+
+Usage:
+    store = get_price_store()
+    hist = store.get_history('AAPL', '2020-01-01', '2025-01-01')
+    histories = store.get_histories(['AAPL', 'MSFT'], '2020-01-01', '2025-01-01')
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import yfinance as yf
+
+from cache_store import CacheStore
+
+PRICE_DIR = Path(__file__).parent / ".cache" / "prices"
+MANIFEST_TTL = 10 * 365 * 86400  # coverage never expires on its own
+TAIL_REFRESH_SECONDS = 3600      # how long today's (still-moving) bar is trusted
+SESSION_TZ = 'America/New_York'
+SESSION_CLOSE = '16:15'          # US close plus a margin for the final print
+EMPTY_RANGE_DAYS = 7             # an empty download longer than this is treated as a failure
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+Range = Tuple[pd.Timestamp, pd.Timestamp]  # [start, end) like yfinance
+
+
+def _to_day(value) -> pd.Timestamp:
+    day = pd.Timestamp(value)
+    if day.tzinfo is not None:
+        day = day.tz_localize(None)
+    return day.normalize()
+
+
+def _session_close(day: pd.Timestamp) -> float:
+    """Epoch seconds after which the daily bar for `day` is final."""
+    return pd.Timestamp(f"{day:%Y-%m-%d} {SESSION_CLOSE}", tz=SESSION_TZ).timestamp()
+
+
+def _normalize_frame(hist: pd.DataFrame) -> pd.DataFrame:
+    """Tz-naive midnight index named Date, float OHLC, int Volume."""
+    if hist.empty:
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+    hist = hist[[c for c in COLUMNS if c in hist.columns]].dropna(how='all')
+    index = pd.DatetimeIndex(hist.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    hist.index = index.normalize().astype('datetime64[ns]').rename('Date')
+    hist = hist.astype({c: 'float64' for c in ['Open', 'High', 'Low', 'Close'] if c in hist.columns})
+    if 'Volume' in hist.columns:
+        hist['Volume'] = hist['Volume'].fillna(0).astype('int64')
+    return hist
+
+
+def _download(tickers: List[str], start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+    """One yf.download call for every ticker sharing the same missing range."""
+    raw = yf.download(
+        tickers,
+        start=start.strftime('%Y-%m-%d'),
+        end=end.strftime('%Y-%m-%d'),
+        group_by='ticker',
+        auto_adjust=True,
+        progress=False,
+        threads=True,
+    )
+    frames = {}
+    for ticker in tickers:
+        try:
+            hist = raw[ticker] if isinstance(raw.columns, pd.MultiIndex) else raw
+        except KeyError:
+            continue
+        hist = hist.dropna(subset=['Close'])
+        if not hist.empty:
+            frames[ticker] = _normalize_frame(hist)
+    return frames
+
+
+class PriceStore:
+    """Per-ticker Arrow files with a manifest of covered date ranges."""
+
+    def __init__(self, root: Path = PRICE_DIR, downloader=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest = CacheStore(self.root / "manifest.sqlite3", default_ttl=MANIFEST_TTL)
+        self.downloader = downloader or _download
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.downloads = 0  # network round trips made by this store
+
+    # ------------------------------------------------------------------
+    # Files and manifest
+    # ------------------------------------------------------------------
+
+    def _path(self, ticker: str) -> Path:
+        safe = ticker.upper().replace('.', '_').replace('/', '_').replace('^', '_')
+        return self.root / f"{safe}.arrow"
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def coverage(self, ticker: str) -> Optional[Dict]:
+        """
+        Manifest entry: covered [start, end), row count, last update, data
+        version, and the date of the last stored bar with when it was fetched.
+        """
+        return self.manifest.get(ticker.upper())
+
+    def _read(self, ticker: str) -> pd.DataFrame:
+        path = self._path(ticker)
+        if not path.exists():
+            return _normalize_frame(pd.DataFrame())
+        # Memory-mapped, uncompressed IPC: numeric columns are zero-copy views
+        table = feather.read_table(path, memory_map=True)
+        return table.to_pandas(split_blocks=True).set_index('Date')
+
+    def _write(self, ticker: str, hist: pd.DataFrame):
+        path = self._path(ticker)
+        tmp = path.with_suffix('.arrow.tmp')
+        table = pa.Table.from_pandas(hist.reset_index(), preserve_index=False)
+        feather.write_feather(table, tmp, compression='uncompressed')
+        os.replace(tmp, path)  # readers see the old or the new file, never a partial one
+
+    # ------------------------------------------------------------------
+    # Gap detection
+    # ------------------------------------------------------------------
+
+    def _missing(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> List[Range]:
+        """Ranges within [start, end) the manifest does not cover yet."""
+        today = _to_day(pd.Timestamp.now())
+        end = min(end, today + pd.Timedelta(days=1))  # nothing to fetch past today
+        if start >= end:
+            return []
+
+        entry = self.coverage(ticker)
+        if entry is None:
+            return [(start, end)]
+
+        covered_start, covered_end = pd.Timestamp(entry['start']), pd.Timestamp(entry['end'])
+        gaps = []
+        if start < covered_start:
+            gaps.append((start, covered_start))
+
+        # A bar fetched before its session closed is a partial snapshot: refetch
+        # it once the session is over, and at most hourly while it is still open
+        now = time.time()
+        tail_start = covered_end
+        last_bar = entry.get('last_bar')
+        fetched_at = entry.get('last_bar_fetched_at') or entry.get('updated_at', 0)
+        if last_bar is not None and fetched_at < _session_close(pd.Timestamp(last_bar)):
+            closed = now >= _session_close(pd.Timestamp(last_bar))
+            if closed or now - fetched_at > TAIL_REFRESH_SECONDS:
+                tail_start = min(tail_start, pd.Timestamp(last_bar))
+        elif covered_end > today and now - entry.get('updated_at', 0) > TAIL_REFRESH_SECONDS:
+            tail_start = min(tail_start, today)  # today's bar may have appeared since
+        if end > tail_start:
+            # From the covered end even when the request starts later: the
+            # manifest holds one contiguous range, so a skipped stretch
+            # would be recorded as covered without ever being downloaded
+            gaps.append((tail_start, end))
+        return gaps
+
+    def _merge(self, ticker: str, new: Optional[pd.DataFrame], requested: Range, fetched_at: float):
+        """
+        Merge downloaded rows into the ticker file and widen its coverage.
+        fetched_at is when the download started; it dates the last bar when
+        the requested range includes it. The data version only moves when
+        stored values change, so refetching identical bars (the hourly tail
+        refresh) keeps caches keyed on it valid.
+        """
+        with self._lock(ticker):
+            entry = self.coverage(ticker)
+            hist = self._read(ticker)
+            changed = new is not None and not new.empty and self._changes(hist, new)
+            if changed:
+                hist = pd.concat([hist, new]) if not hist.empty else new
+                hist = hist[~hist.index.duplicated(keep='last')].sort_index()
+                self._write(ticker, hist)
+
+            start, end = requested
+            last_bar, last_fetched = (entry or {}).get('last_bar'), (entry or {}).get('last_bar_fetched_at')
+            if not hist.empty:
+                last_bar = hist.index.max()
+                if start <= last_bar < end:
+                    last_fetched = fetched_at
+                last_bar = last_bar.strftime('%Y-%m-%d')
+            if entry is not None:
+                start = min(start, pd.Timestamp(entry['start']))
+                end = max(end, pd.Timestamp(entry['end']))
+            self.manifest.set(ticker.upper(), {
+                'start': start.strftime('%Y-%m-%d'),
+                'end': end.strftime('%Y-%m-%d'),
+                'rows': len(hist),
+                'updated_at': time.time(),
+                'last_bar': last_bar,
+                'last_bar_fetched_at': last_fetched,
+                'version': (entry or {}).get('version', 0) + (1 if changed else 0),
+            })
+
+    @staticmethod
+    def _changes(hist: pd.DataFrame, new: pd.DataFrame) -> bool:
+        """True if merging new would add rows to hist or change any stored value."""
+        new = new[~new.index.duplicated(keep='last')]
+        overlap = new.index.intersection(hist.index)
+        if len(overlap) < len(new):
+            return True
+        columns = [c for c in COLUMNS if c in new.columns]
+        stored = hist.reindex(index=overlap, columns=columns).to_numpy(dtype=np.float64)
+        fetched = new.loc[overlap, columns].to_numpy(dtype=np.float64)
+        return not np.array_equal(stored, fetched, equal_nan=True)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def ensure(self, tickers: List[str], start_date: str, end_date: str):
+        """Download whatever part of [start_date, end_date) is not covered yet."""
+        start, end = _to_day(start_date), _to_day(end_date)
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+
+        # Tickers missing the same range share one download
+        by_gap: Dict[Range, List[str]] = {}
+        for ticker in tickers:
+            for gap in self._missing(ticker, start, end):
+                by_gap.setdefault(gap, []).append(ticker)
+
+        for (gap_start, gap_end), group in by_gap.items():
+            fetched_at = time.time()
+            try:
+                frames = self.downloader(group, gap_start, gap_end)
+                self.downloads += 1
+            except Exception as e:
+                print(f"⚠️ Price download failed for {len(group)} tickers: {e}")
+                continue
+            for ticker in group:
+                hist = frames.get(ticker)
+                if (hist is None or hist.empty) and (gap_end - gap_start).days > EMPTY_RANGE_DAYS:
+                    print(f"⚠️ No price data for {ticker} {gap_start:%Y-%m-%d}..{gap_end:%Y-%m-%d}")
+                    continue  # likely a failed download; don't mark it covered
+                self._merge(ticker, hist, (gap_start, gap_end), fetched_at)
+
+    def get_histories(self, tickers: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        """
+        Daily OHLCV for each ticker over [start_date, end_date), downloading
+        only the uncovered parts. Tickers with no data are left out.
+        """
+        start, end = _to_day(start_date), _to_day(end_date)
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        self.ensure(tickers, start_date, end_date)
+
+        results = {}
+        for ticker in tickers:
+            hist = self._read(ticker)
+            if hist.empty:
+                continue
+            window = hist[(hist.index >= start) & (hist.index < end)]
+            if not window.empty:
+                results[ticker] = window
+        return results
+
+    def get_history(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Daily OHLCV for one ticker (empty DataFrame if unavailable)."""
+        return self.get_histories([ticker], start_date, end_date).get(ticker.upper(), _normalize_frame(pd.DataFrame()))
+
+    def get_arrays(
+        self,
+        tickers: List[str],
+        start_date: str,
+        end_date: str,
+        columns: Tuple[str, ...] = ('Close', 'Volume'),
+        tail: Optional[int] = None,
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        {ticker: {column: array}} over [start_date, end_date) straight from
+        the memory-mapped files, skipping pandas (for scanning thousands of
+        tickers). tail keeps only the last rows. Downloads uncovered ranges
+        first, like get_histories.
+        """
+        start, end = np.datetime64(_to_day(start_date), 'ns'), np.datetime64(_to_day(end_date), 'ns')
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        self.ensure(tickers, start_date, end_date)
+
+        results = {}
+        for ticker in tickers:
+            path = self._path(ticker)
+            if not path.exists():
+                continue
+            table = feather.read_table(path, columns=['Date', *columns], memory_map=True)
+            dates = table.column('Date').to_numpy()
+            lo, hi = np.searchsorted(dates, start), np.searchsorted(dates, end)
+            if tail is not None:
+                lo = max(lo, hi - tail)
+            if hi > lo:
+                results[ticker] = {c: table.column(c).to_numpy()[lo:hi] for c in columns}
+        return results
+
+    def iter_bars(self, ticker: str, start_date: str, end_date: str, batch_rows: int = 4096) -> Iterator[tuple]:
+        """
+        Yield (date, open, high, low, close, volume) rows from the stored file
+        in small batches, without loading the whole history into pandas.
+        Call ensure() first if the range may not be covered.
+        """
+        path = self._path(ticker)
+        if not path.exists():
+            return
+        start, end = np.datetime64(_to_day(start_date), 'ns'), np.datetime64(_to_day(end_date), 'ns')
+        with pa.memory_map(str(path)) as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for offset in range(0, batch.num_rows, batch_rows):
+                    chunk = batch.slice(offset, batch_rows)
+                    dates = chunk.column('Date').to_numpy()
+                    if len(dates) == 0 or dates[-1] < start:
+                        continue
+                    if dates[0] >= end:
+                        return
+                    columns = [chunk.column(c).to_numpy() for c in COLUMNS]
+                    for row in np.flatnonzero((dates >= start) & (dates < end)):
+                        yield (pd.Timestamp(dates[row]),) + tuple(col[row].item() for col in columns)
+
+    def data_version(self, tickers: List[str]) -> Dict[str, int]:
+        """Per-ticker version, bumped whenever rows are added or stored values change."""
+        return {t.upper(): (self.coverage(t) or {}).get('version', 0) for t in tickers}
+
+    def clear(self, ticker: Optional[str] = None):
+        """Delete stored history for one ticker, or everything."""
+        if ticker:
+            with self._lock(ticker.upper()):
+                self._path(ticker).unlink(missing_ok=True)
+                self.manifest.delete(ticker.upper())
+            return
+        for path in self.root.glob('*.arrow'):
+            path.unlink(missing_ok=True)
+        self.manifest.clear()
+
+
+_store: Optional[PriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """Process-wide price store under .cache/prices."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceStore()
+    return _store
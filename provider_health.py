@@ -0,0 +1,196 @@
+"""
+Provider health tracking: circuit breakers plus a rolling latency/error model.
+
+Every real network call to a provider reports its outcome here. After
+repeated failures (or a 429 with Retry-After) the provider's breaker opens
+and calls to it fail fast instead of timing out; once the cooldown passes a
+single probe is let through, and its outcome closes the breaker or reopens
+it with a longer cooldown. Routing uses the same state to put healthy
+providers first.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+FAILURE_THRESHOLD = 3         # consecutive failures that open the breaker
+ERROR_RATE_THRESHOLD = 0.5    # ... or this error rate over the rolling window
+MIN_SAMPLES = 10              # calls needed before the error rate counts
+WINDOW_SECONDS = 300          # rolling window for latency and error stats
+MAX_SAMPLES = 200
+BASE_COOLDOWN = 30.0          # first open period, doubled on every failed probe
+MAX_COOLDOWN = 900.0
+PROBE_TIMEOUT = 30.0          # a probe that never reported back frees its slot after this
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderHealth:
+    """Circuit breaker and rolling stats for one provider."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = BASE_COOLDOWN
+        self.opened_until = 0.0
+        self.probe_started: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.skipped = 0
+        self._samples: deque = deque(maxlen=MAX_SAMPLES)  # (timestamp, latency, ok)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Breaker
+    # ------------------------------------------------------------------
+
+    def _refresh_state(self, now: float):
+        if self.state == OPEN and now >= self.opened_until:
+            self.state = HALF_OPEN
+            self.probe_started = None
+
+    def is_available(self) -> bool:
+        """True unless the breaker is open (does not reserve a probe)."""
+        with self._lock:
+            self._refresh_state(time.time())
+            return self.state != OPEN
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe at a time."""
+        with self._lock:
+            now = time.time()
+            self._refresh_state(now)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and (self.probe_started is None or now - self.probe_started > PROBE_TIMEOUT):
+                self.probe_started = now
+                return True
+            self.skipped += 1
+            return False
+
+    def release_probe(self):
+        """Give back a half-open probe slot when no call went out after all (cache hit, quota refusal)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probe_started = None
+
+    def _open(self, now: float, cooldown: float):
+        self.state = OPEN
+        self.opened_until = now + cooldown
+        self.probe_started = None
+
+    # ------------------------------------------------------------------
+    # Outcomes
+    # ------------------------------------------------------------------
+
+    def record_success(self, latency: float):
+        with self._lock:
+            now = time.time()
+            self._samples.append((now, latency, True))
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self.cooldown = BASE_COOLDOWN
+                self.probe_started = None
+
+    def record_failure(self, latency: float, reason: str, retry_after: Optional[float] = None):
+        """Record a failed call; retry_after (seconds) comes from a 429 response."""
+        with self._lock:
+            now = time.time()
+            self._samples.append((now, latency, False))
+            self.consecutive_failures += 1
+            self.last_error = reason
+
+            if self.state == HALF_OPEN:
+                # Failed probe: back off harder
+                self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+                self._open(now, max(self.cooldown, retry_after or 0))
+            elif retry_after:
+                self._open(now, min(retry_after, MAX_COOLDOWN))
+            elif self.consecutive_failures >= FAILURE_THRESHOLD or self._error_rate(now) >= ERROR_RATE_THRESHOLD:
+                self._open(now, self.cooldown)
+
+    # ------------------------------------------------------------------
+    # Rolling stats
+    # ------------------------------------------------------------------
+
+    def _recent(self, now: float) -> List[tuple]:
+        cutoff = now - WINDOW_SECONDS
+        return [s for s in self._samples if s[0] >= cutoff]
+
+    def _error_rate(self, now: float) -> float:
+        recent = self._recent(now)
+        if len(recent) < MIN_SAMPLES:
+            return 0.0
+        return sum(1 for s in recent if not s[2]) / len(recent)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State, error rate and latency percentiles for dashboards and routing."""
+        with self._lock:
+            now = time.time()
+            self._refresh_state(now)
+            recent = self._recent(now)
+            latencies = sorted(s[1] for s in recent)
+            errors = sum(1 for s in recent if not s[2])
+
+            def _pct(q: float) -> Optional[float]:
+                if not latencies:
+                    return None
+                return latencies[min(len(latencies) - 1, math.ceil(q * len(latencies)) - 1)]
+
+            return {
+                'state': self.state,
+                'calls': len(recent),
+                'error_rate': errors / len(recent) if recent else 0.0,
+                'p50_latency': _pct(0.50),
+                'p95_latency': _pct(0.95),
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in': max(0.0, self.opened_until - now) if self.state == OPEN else 0.0,
+                'last_error': self.last_error,
+                'skipped': self.skipped,
+            }
+
+
+_registry: Dict[str, ProviderHealth] = {}
+_registry_lock = threading.Lock()
+
+
+def get_health(provider: str) -> ProviderHealth:
+    """Process-wide health tracker for a provider (created on first use)."""
+    with _registry_lock:
+        health = _registry.get(provider)
+        if health is None:
+            health = _registry[provider] = ProviderHealth(provider)
+        return health
+
+
+def get_provider_health() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every tracked provider."""
+    with _registry_lock:
+        trackers = list(_registry.values())
+    return {h.name: h.snapshot() for h in trackers}
+
+
+def routing_order(providers: List[str], headroom: Callable[[str], float], low_headroom: float = 0.2) -> List[str]:
+    """
+    Order providers for the next request: available before open breakers,
+    then healthy before degraded (high error rate or low quota headroom),
+    keeping the configured preference order within each group.
+    """
+    def _rank(item):
+        index, name = item
+        health = get_health(name)
+        if not health.is_available():
+            return (2, index)
+        stats = health.snapshot()
+        degraded = (
+            (stats['calls'] >= MIN_SAMPLES and stats['error_rate'] >= ERROR_RATE_THRESHOLD / 2)
+            or headroom(name) < low_headroom
+        )
+        return (1 if degraded else 0, index)
+
+    return [name for _, name in sorted(enumerate(providers), key=_rank)]
@@ -1,85 +1,221 @@
 """
 Quantitative Research Engine for Investment Analysis
 Implements factor analysis, anomaly detection, forecasting, and causal inference
+
+Each engine computes its result once per instance and serves later calls
+from memory. QuantitativeAdvisor shares one AnalysisContext per data
+snapshot (keyed by a content hash of the input DataFrame), so advisors
+built on identical data reuse the same fitted models, and per-ticker
+theses are dictionary lookups.
 """
 
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 from datetime import datetime, timedelta
+import joblib
 from scipy import stats
+from scipy.optimize import linear_sum_assignment
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
+
+MODEL_DIR = Path(__file__).parent / ".cache" / "models"
+
+# Loaded model states by path, with the file's mtime when read, so warm
+# models are deserialized once per process (another process's save is
+# picked up through the changed mtime)
+_model_states: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_model_lock = threading.Lock()
+
+
+def _load_model(path: Path) -> Optional[Dict[str, Any]]:
+    """Persisted model state, or None if missing or unreadable."""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _model_lock:
+        cached = _model_states.get(str(path))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    try:
+        state = joblib.load(path)
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable model state {path.name}: {e}")
+        return None
+    with _model_lock:
+        _model_states[str(path)] = (mtime, state)
+    return state
+
+
+def _save_model(path: Path, state: Dict[str, Any]):
+    """Write model state atomically (readers never see a partial file)."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        joblib.dump(state, tmp)
+        os.replace(tmp, path)
+        with _model_lock:
+            _model_states[str(path)] = (path.stat().st_mtime_ns, state)
+    except Exception as e:
+        print(f"⚠️ Failed to save model state {path.name}: {e}")
+
+
+# ============================================================================
+# FACTOR STATISTICS
+# ============================================================================
+
+DEFAULT_FACTORS = {
+    'price_change': 'Price momentum',
+    'rsi': 'Technical strength',
+    'pe': 'Valuation',
+    'marketCap': 'Market size',
+    'volume': 'Liquidity',
+    'dividend': 'Income potential'
+}
+
+
+def factor_statistics(X: np.ndarray, y: np.ndarray, min_obs: int = 3) -> Dict[str, np.ndarray]:
+    """
+    Pearson correlation, two-sided p-value and Cohen's d of every column of
+    X (stocks × factors, NaN = missing) against the target y, in one pass.
+    
+    Each factor uses the stocks where both it and y are present. Columns are
+    standardized over those rows, so the correlation is the mean product of
+    z-scores. Cohen's d compares the factor between stocks whose target is
+    above vs at-or-below the median target of the same rows. Factors with
+    fewer than min_obs rows get NaN statistics.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(X) & ~np.isnan(y)[:, None]
+    n = valid.sum(axis=0)
+    enough = n >= min_obs
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Y = np.where(valid, y[:, None], np.nan)
+        Xc = np.where(valid, X - np.nansum(np.where(valid, X, 0.0), axis=0) / n, 0.0)
+        Yc = np.where(valid, Y - np.nansum(np.where(valid, Y, 0.0), axis=0) / n, 0.0)
+        x_std = np.sqrt((Xc ** 2).sum(axis=0) / n)
+        y_std = np.sqrt((Yc ** 2).sum(axis=0) / n)
+        correlation = ((Xc / x_std) * (Yc / y_std)).sum(axis=0) / n
+        correlation = np.clip(correlation, -1.0, 1.0)
+        
+        dof = n - 2
+        t_stat = correlation * np.sqrt(dof / (1 - correlation ** 2))
+        p_value = np.where(np.abs(correlation) == 1, 0.0, 2 * stats.t.sf(np.abs(t_stat), np.maximum(dof, 1)))
+        
+        # Cohen's d between the above-median and the rest, per factor's rows
+        median = np.nanmedian(Y[:, enough], axis=0) if enough.any() else np.empty(0)
+        medians = np.full(X.shape[1], np.nan)
+        medians[enough] = median
+        high = valid & (Y > medians)
+        low = valid & ~high
+        
+        def group_moments(mask):
+            count = mask.sum(axis=0)
+            mean = np.where(mask, X, 0.0).sum(axis=0) / count
+            var = np.where(mask, (X - mean) ** 2, 0.0).sum(axis=0) / (count - 1)
+            return mean, np.where(count > 1, var, np.nan)
+        
+        high_mean, high_var = group_moments(high)
+        low_mean, low_var = group_moments(low)
+        pooled_std = np.sqrt((high_var + low_var) / 2)
+        effect_size = np.where(pooled_std > 0, (high_mean - low_mean) / pooled_std, 0.0)
+    
+    correlation[~enough] = np.nan
+    p_value[~enough | np.isnan(correlation)] = np.nan
+    effect_size[~enough] = np.nan
+    return {'n': n, 'correlation': correlation, 'p_value': p_value, 'effect_size': effect_size}
+
+
+def benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """
+    Benjamini–Hochberg adjusted p-values (false discovery rate); NaN
+    p-values are left out of the number of tests and stay NaN.
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full_like(p_values, np.nan)
+    tested = np.flatnonzero(~np.isnan(p_values))
+    if len(tested) == 0:
+        return adjusted
+    order = tested[np.argsort(p_values[tested], kind='stable')]
+    ranked = p_values[order] * len(tested) / np.arange(1, len(tested) + 1)
+    adjusted[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return adjusted
 
 
 class FactorAnalysisEngine:
     """
     Analyzes which factors actually predict stock performance
     Returns statistically significant factors with p-values and effect sizes
+    
+    All factors are tested together (factor_statistics), and significance
+    uses Benjamini–Hochberg adjusted p-values by default so that screening
+    many candidate factors does not inflate false discoveries.
     """
     
-    def __init__(self, stock_data: pd.DataFrame):
+    def __init__(
+        self,
+        stock_data: pd.DataFrame,
+        factor_definitions: Dict[str, str] = None,
+        correction: Optional[str] = 'fdr_bh'
+    ):
         self.data = stock_data
+        self.factor_definitions = factor_definitions or DEFAULT_FACTORS
+        self.correction = correction  # 'fdr_bh' or None (raw p-values)
         self.significant_threshold = 0.05
+        self._factors: Optional[List[Dict[str, Any]]] = None
         
     def analyze_factors(self) -> List[Dict[str, Any]]:
         """
-        Perform factor analysis on stock metrics
+        Perform factor analysis on stock metrics (computed once per instance)
         Returns list of factors with statistical significance
         """
+        if self._factors is None:
+            self._factors = self._analyze_factors()
+        return list(self._factors)
+    
+    def _analyze_factors(self) -> List[Dict[str, Any]]:
         factors = []
         
-        # Define factors to analyze
-        factor_definitions = {
-            'price_change': 'Price momentum',
-            'rsi': 'Technical strength',
-            'pe': 'Valuation',
-            'marketCap': 'Market size',
-            'volume': 'Liquidity',
-            'dividend': 'Income potential'
-        }
-        
         if 'score' not in self.data.columns:
             return factors
-            
-        target = self.data['score']
         
-        for factor_col, factor_name in factor_definitions.items():
-            if factor_col not in self.data.columns:
-                continue
-                
-            # Calculate correlation and p-value
-            factor_data = pd.to_numeric(self.data[factor_col], errors='coerce')
-            valid_mask = ~(factor_data.isna() | target.isna())
-            
-            if valid_mask.sum() < 3:
-                continue
-                
-            correlation, p_value = stats.pearsonr(
-                factor_data[valid_mask],
-                target[valid_mask]
-            )
-            
-            # Calculate effect size (Cohen's d)
-            high_score = target[valid_mask] > target[valid_mask].median()
-            low_score = ~high_score
-            
-            if high_score.sum() > 0 and low_score.sum() > 0:
-                mean_diff = factor_data[valid_mask][high_score].mean() - factor_data[valid_mask][low_score].mean()
-                pooled_std = np.sqrt((factor_data[valid_mask][high_score].std()**2 + 
-                                     factor_data[valid_mask][low_score].std()**2) / 2)
-                effect_size = mean_diff / pooled_std if pooled_std > 0 else 0
-            else:
-                effect_size = 0
-            
+        columns = [col for col in self.factor_definitions if col in self.data.columns]
+        if not columns:
+            return factors
+        
+        # One stocks × factors matrix; all factors are tested in one pass
+        X = self.data[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        target = pd.to_numeric(self.data['score'], errors='coerce').to_numpy(dtype=np.float64)
+        results = factor_statistics(X, target)
+        
+        tested = results['n'] >= 3
+        p_adjusted = np.full(len(columns), np.nan)
+        p_adjusted[tested] = (
+            benjamini_hochberg(results['p_value'][tested]) if self.correction == 'fdr_bh'
+            else results['p_value'][tested]
+        )
+        
+        for i in np.flatnonzero(tested):
+            effect_size = float(results['effect_size'][i])
             factors.append({
-                'factor': factor_name,
-                'column': factor_col,
-                'correlation': correlation,
-                'p_value': p_value,
+                'factor': self.factor_definitions[columns[i]],
+                'column': columns[i],
+                'correlation': float(results['correlation'][i]),
+                'p_value': float(results['p_value'][i]),
+                'p_adjusted': float(p_adjusted[i]),
                 'effect_size': effect_size,
-                'significant': p_value < self.significant_threshold,
+                'significant': bool(p_adjusted[i] < self.significant_threshold),
                 'strength': self._classify_effect_size(abs(effect_size))
             })
         
@@ -113,50 +249,131 @@ class AnomalyDetector:
     """
     Detects hidden gems (undervalued) and red flags (overvalued)
     Uses Isolation Forest for anomaly detection
+    
+    The fitted scaler and forest are saved under .cache/models together with
+    the data version (content hash) they were fit on, one file per feature
+    set and ticker set, so a forest fit on one universe never scores
+    another. A later detector scores its stocks with the saved forest via
+    score_samples, without refitting, unless the refit policy says the
+    model is out of date:
+    
+    - the ticker set differs from the one the model was fit on
+    - the rows to score grew by more than REFIT_GROWTH since the fit
+    - the features drifted: some feature's mean moved more than
+      DRIFT_THRESHOLD training standard deviations
+    - the model is older than REFIT_MAX_AGE seconds
     """
     
-    def __init__(self, stock_data: pd.DataFrame):
+    FEATURE_COLS = ['score', 'price', 'change', 'rsi', 'marketCap', 'volume']
+    REFIT_GROWTH = 0.25
+    DRIFT_THRESHOLD = 0.5
+    REFIT_MAX_AGE = 7 * 86400
+    
+    def __init__(self, stock_data: pd.DataFrame, persist: bool = True, model_name: str = 'anomaly'):
         self.data = stock_data
+        self.persist = persist
+        self.model_name = model_name  # separate saved models for separate universes
         self.model = IsolationForest(contamination=0.1, random_state=42)
-        
-    def detect_anomalies(self) -> pd.DataFrame:
+        self.scaler: Optional[StandardScaler] = None
+        self.feature_cols: List[str] = []
+        self.fill_values: Optional[pd.Series] = None
+        self.data_version: Optional[str] = None  # content hash of the rows the model was fit on
+        self.universe: Optional[str] = None  # hash of the ticker set the model was fit on
+        self.n_fit = 0
+        self.fitted_at = 0.0
+        self.refit_reason: Optional[str] = None  # why the last detect_anomalies() refit, if it did
+        self._anomalies: Optional[pd.DataFrame] = None
+    
+    # ------------------------------------------------------------------
+    # Fitted state
+    # ------------------------------------------------------------------
+    
+    @property
+    def is_fitted(self) -> bool:
+        return self.scaler is not None
+    
+    def _state_path(self, feature_cols: List[str], universe: str) -> Path:
+        return MODEL_DIR / f"{self.model_name}_{'-'.join(feature_cols)}_{universe}.joblib"
+    
+    def _load_state(self, feature_cols: List[str], universe: str) -> bool:
+        state = _load_model(self._state_path(feature_cols, universe)) if self.persist else None
+        if state is None:
+            return False
+        self.model = state['model']
+        self.scaler = state['scaler']
+        self.feature_cols = feature_cols
+        self.fill_values = state['fill_values']
+        self.data_version = state['data_version']
+        self.universe = universe
+        self.n_fit = state['n_fit']
+        self.fitted_at = state['fitted_at']
+        return True
+    
+    def _features(self, data: pd.DataFrame, feature_cols: List[str]) -> pd.DataFrame:
+        """Numeric feature rows with at least half the features present."""
+        X = data.reindex(columns=feature_cols).apply(pd.to_numeric, errors='coerce')
+        return X.dropna(thresh=len(feature_cols) // 2)
+    
+    def _universe_key(self, X: pd.DataFrame) -> str:
+        """Short hash of the tickers behind feature rows X (row labels without a ticker column)."""
+        tickers = self.data.loc[X.index, 'ticker'] if 'ticker' in self.data.columns else X.index
+        return hashlib.sha256('\n'.join(sorted(set(map(str, tickers)))).encode()).hexdigest()[:16]
+    
+    def fit(self, X: pd.DataFrame):
+        """Fit scaler and forest on feature rows (see _features) and save them."""
+        self.feature_cols = list(X.columns)
+        self.fill_values = X.median()
+        self.scaler = StandardScaler()
+        X_scaled = self.scaler.fit_transform(X.fillna(self.fill_values).to_numpy())
+        self.model = IsolationForest(contamination=0.1, random_state=42)
+        self.model.fit(X_scaled)
+        self.data_version = frame_fingerprint(X)
+        self.universe = self._universe_key(X)
+        self.n_fit = len(X)
+        self.fitted_at = time.time()
+        if self.persist:
+            _save_model(self._state_path(self.feature_cols, self.universe), {
+                'model': self.model,
+                'scaler': self.scaler,
+                'fill_values': self.fill_values,
+                'data_version': self.data_version,
+                'n_fit': self.n_fit,
+                'fitted_at': self.fitted_at,
+            })
+    
+    def refit_reason_for(self, X: pd.DataFrame) -> Optional[str]:
+        """Why the fitted model should not score feature rows X of this detector's data as-is (None = it can)."""
+        if not self.is_fitted or list(X.columns) != self.feature_cols:
+            return 'no model'
+        if self.universe != self._universe_key(X):
+            return 'ticker set changed'
+        if self.data_version == frame_fingerprint(X):
+            return None
+        if len(X) > self.n_fit * (1 + self.REFIT_GROWTH):
+            return f'rows grew from {self.n_fit} to {len(X)}'
+        if time.time() - self.fitted_at > self.REFIT_MAX_AGE:
+            return 'model expired'
+        shift = np.abs(np.nanmean(self.scaler.transform(X.to_numpy()), axis=0))
+        if np.nanmax(shift) > self.DRIFT_THRESHOLD:
+            return f'{self.feature_cols[int(np.nanargmax(shift))]} drifted {np.nanmax(shift):.2f} std'
+        return None
+    
+    def score(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        Detect anomalous stocks (both opportunities and risks)
-        Returns DataFrame with anomaly scores and types
+        Anomaly scores of new or updated stocks with the fitted model (no
+        refit): data rows plus anomaly_score, is_anomaly and anomaly_type
         """
-        # Select numeric features for anomaly detection
-        feature_cols = ['score', 'price', 'change', 'rsi', 'marketCap', 'volume']
-        available_cols = [col for col in feature_cols if col in self.data.columns]
-        
-        if len(available_cols) < 2:
+        X = self._features(data, self.feature_cols)
+        if X.empty:
             return pd.DataFrame()
         
-        # Prepare data
-        X = self.data[available_cols].copy()
-        for col in available_cols:
-            X[col] = pd.to_numeric(X[col], errors='coerce')
-        
-        # Remove rows with too many NaNs
-        X = X.dropna(thresh=len(available_cols) // 2)
-        
-        if len(X) < 3:
-            return pd.DataFrame()
-        
-        # Fill remaining NaNs with median
-        X = X.fillna(X.median())
-        
-        # Standardize features
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        
-        # Detect anomalies
-        anomaly_scores = self.model.fit_predict(X_scaled)
+        X_scaled = self.scaler.transform(X.fillna(self.fill_values).to_numpy())
         anomaly_scores_continuous = self.model.score_samples(X_scaled)
         
         # Create results DataFrame
-        results = self.data.loc[X.index].copy()
+        results = data.loc[X.index].copy()
         results['anomaly_score'] = anomaly_scores_continuous
-        results['is_anomaly'] = anomaly_scores == -1
+        results['is_anomaly'] = anomaly_scores_continuous < self.model.offset_
         
         # Classify anomalies as hidden gems or red flags
         results['anomaly_type'] = 'NORMAL'
@@ -178,6 +395,40 @@ class AnomalyDetector:
         )
         results.loc[red_flag_mask, 'anomaly_type'] = 'RED_FLAG'
         
+        return results
+    
+    def detect_anomalies(self) -> pd.DataFrame:
+        """
+        Detect anomalous stocks (both opportunities and risks); computed once
+        per instance and the result reused (treat it as read-only)
+        Returns DataFrame with anomaly scores and types
+        """
+        if self._anomalies is None:
+            self._anomalies = self._detect_anomalies()
+        return self._anomalies
+    
+    def _detect_anomalies(self) -> pd.DataFrame:
+        # Select numeric features for anomaly detection
+        available_cols = [col for col in self.FEATURE_COLS if col in self.data.columns]
+        
+        if len(available_cols) < 2:
+            return pd.DataFrame()
+        
+        # Remove rows with too many NaNs
+        X = self._features(self.data, available_cols)
+        
+        if len(X) < 3:
+            return pd.DataFrame()
+        
+        # Warm start from the saved model unless the refit policy says otherwise
+        universe = self._universe_key(X)
+        if not self.is_fitted or self.feature_cols != available_cols or self.universe != universe:
+            self._load_state(available_cols, universe)
+        self.refit_reason = self.refit_reason_for(X)
+        if self.refit_reason:
+            self.fit(X)
+        
+        results = self.score(self.data)
         return results[results['is_anomaly']].sort_values('anomaly_score')
     
     def get_hidden_gems(self) -> pd.DataFrame:
@@ -199,76 +450,253 @@ class MarketSegmentation:
     """
     Clusters stocks into segments for portfolio allocation
     E.g., Growth, Value, Income, Speculative
+    
+    The fitted state (feature medians, scaler, MiniBatchKMeans centroids and
+    stable cluster labels) is kept on the instance and, with persist=True,
+    saved under .cache/models so later sessions start from it:
+    
+    - fit(): full refit; new centroids are matched to the previous ones
+      (Hungarian assignment) so each segment keeps its label and name
+    - update(): partial_fit on new quotes, centroids move, labels stay
+    - assign(): nearest-centroid labels for any stocks, O(k) per stock
+    
+    perform_clustering() only assigns with the saved state, and refits
+    first under the same policy as AnomalyDetector: no usable state, rows
+    grew by more than REFIT_GROWTH since the fit, some feature's mean
+    drifted more than DRIFT_THRESHOLD training standard deviations, or the
+    state is older than REFIT_MAX_AGE seconds. It never calls update();
+    moving the centroids is an explicit step for the caller.
+    
+    Segment names are chosen once per label, when the label first has
+    stocks, and saved with the state; a name is never given to two labels.
     """
     
-    def __init__(self, stock_data: pd.DataFrame, n_clusters: int = 4):
+    FEATURE_COLS = ['score', 'change', 'rsi', 'pe', 'dividend', 'marketCap']
+    SEGMENT_NAMES = ["🚀 Rocket Ships", "💰 Stable Growth", "📈 Emerging", "🔷 Value Play"]
+    REFIT_GROWTH = 0.25
+    DRIFT_THRESHOLD = 0.5
+    REFIT_MAX_AGE = 7 * 86400
+    
+    def __init__(self, stock_data: pd.DataFrame, n_clusters: int = 4, persist: bool = True,
+                 model_name: str = 'segmentation'):
         self.data = stock_data
         self.n_clusters = n_clusters
-        self.cluster_model = KMeans(n_clusters=n_clusters, random_state=42)
+        self.persist = persist
+        self.model_name = model_name  # separate saved models for separate universes
+        self.cluster_model: Optional[MiniBatchKMeans] = None
+        self.scaler: Optional[StandardScaler] = None
+        self.feature_cols: List[str] = []
+        self.fill_values: Optional[pd.Series] = None
+        self.labels = np.arange(n_clusters)  # model cluster index -> stable label
+        self.names: Dict[int, str] = {}  # stable label -> segment name
+        self.data_version: Optional[str] = None  # content hash of the rows the model was fit on
+        self.n_fit = 0
+        self.fitted_at = 0.0
+        self.refit_reason: Optional[str] = None  # why the last perform_clustering() refit, if it did
+        self._clusters: Optional[pd.DataFrame] = None
+        if persist:
+            self._load_state()
+    
+    # ------------------------------------------------------------------
+    # Fitted state
+    # ------------------------------------------------------------------
+    
+    @property
+    def state_path(self) -> Path:
+        return MODEL_DIR / f"{self.model_name}_k{self.n_clusters}.joblib"
+    
+    @property
+    def is_fitted(self) -> bool:
+        return self.cluster_model is not None
+    
+    def _load_state(self):
+        state = _load_model(self.state_path)
+        if state is None or state.get('n_clusters') != self.n_clusters:
+            return
+        self.cluster_model = state['model']
+        self.scaler = state['scaler']
+        self.feature_cols = state['feature_cols']
+        self.fill_values = state['fill_values']
+        self.labels = state['labels']
+        self.names = state.get('names', {})
+        self.data_version = state.get('data_version')
+        self.n_fit = state.get('n_fit', 0)
+        self.fitted_at = state.get('fitted_at', 0.0)
+    
+    def _save_state(self):
+        if self.persist and self.is_fitted:
+            _save_model(self.state_path, {
+                'n_clusters': self.n_clusters,
+                'model': self.cluster_model,
+                'scaler': self.scaler,
+                'feature_cols': self.feature_cols,
+                'fill_values': self.fill_values,
+                'labels': self.labels,
+                'names': self.names,
+                'data_version': self.data_version,
+                'n_fit': self.n_fit,
+                'fitted_at': self.fitted_at,
+            })
+    
+    def _features(self, data: pd.DataFrame, feature_cols: List[str]) -> pd.DataFrame:
+        """Numeric feature rows with at least half the features present."""
+        X = data.reindex(columns=feature_cols).apply(pd.to_numeric, errors='coerce')
+        return X.dropna(thresh=len(feature_cols) // 2)
+    
+    def _centroids(self) -> np.ndarray:
+        """Centroids in original feature units, indexed by stable label."""
+        centers = self.scaler.inverse_transform(self.cluster_model.cluster_centers_)
+        ordered = np.empty_like(centers)
+        ordered[self.labels] = centers
+        return ordered
+    
+    # ------------------------------------------------------------------
+    # Fit / update / assign
+    # ------------------------------------------------------------------
+    
+    def fit(self, data: pd.DataFrame = None) -> bool:
+        """Full refit on data (default: this instance's data); False if there is too little."""
+        data = self.data if data is None else data
+        feature_cols = [col for col in self.FEATURE_COLS if col in data.columns]
+        if len(feature_cols) < 2:
+            return False
+        
+        X = self._features(data, feature_cols)
+        if len(X) < self.n_clusters:
+            return False
+        
+        previous = self._centroids() if self.is_fitted and self.feature_cols == feature_cols else None
+        
+        self.feature_cols = feature_cols
+        self.fill_values = X.median()
+        self.scaler = StandardScaler()
+        X_scaled = self.scaler.fit_transform(X.fillna(self.fill_values).to_numpy())
+        self.cluster_model = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=42, n_init=3)
+        self.cluster_model.fit(X_scaled)
         
+        # Keep labels (and so names): each new centroid takes the label of the old one it replaces
+        self.labels = np.arange(self.n_clusters)
+        if previous is None:
+            self.names = {}
+        else:
+            cost = ((self.cluster_model.cluster_centers_[:, None, :]
+                     - self.scaler.transform(previous)[None, :, :]) ** 2).sum(axis=2)
+            rows, cols = linear_sum_assignment(cost)
+            self.labels[rows] = cols
+        
+        self.data_version = frame_fingerprint(X)
+        self.n_fit = len(X)
+        self.fitted_at = time.time()
+        self._clusters = None
+        self._save_state()
+        return True
+    
+    def update(self, data: pd.DataFrame) -> bool:
+        """
+        Move the centroids toward new quotes with one partial_fit step (the
+        scaler and labels are kept); fits from scratch when unfitted
+        """
+        if not self.is_fitted:
+            return self.fit(data)
+        X = self._features(data, self.feature_cols)
+        if X.empty:
+            return False
+        self.cluster_model.partial_fit(self.scaler.transform(X.fillna(self.fill_values).to_numpy()))
+        self._clusters = None
+        self._save_state()
+        return True
+    
+    def refit_reason_for(self, data: pd.DataFrame) -> Optional[str]:
+        """Why the fitted state should not assign these stocks as-is (None = it can)."""
+        feature_cols = [col for col in self.FEATURE_COLS if col in data.columns]
+        if not self.is_fitted or feature_cols != self.feature_cols:
+            return 'no model'
+        X = self._features(data, feature_cols)
+        if X.empty or self.data_version == frame_fingerprint(X):
+            return None
+        if len(X) > self.n_fit * (1 + self.REFIT_GROWTH):
+            return f'rows grew from {self.n_fit} to {len(X)}'
+        if time.time() - self.fitted_at > self.REFIT_MAX_AGE:
+            return 'model expired'
+        shift = np.abs(np.nanmean(self.scaler.transform(X.to_numpy()), axis=0))
+        if np.nanmax(shift) > self.DRIFT_THRESHOLD:
+            return f'{self.feature_cols[int(np.nanargmax(shift))]} drifted {np.nanmax(shift):.2f} std'
+        return None
+    
+    def assign(self, data: pd.DataFrame = None) -> pd.Series:
+        """Stable cluster label of each stock by nearest centroid (index = data's index)."""
+        data = self.data if data is None else data
+        if not self.is_fitted:
+            return pd.Series(dtype=np.int64)
+        X = self._features(data, self.feature_cols)
+        if X.empty:
+            return pd.Series(dtype=np.int64)
+        X_scaled = self.scaler.transform(X.fillna(self.fill_values).to_numpy())
+        distances = ((X_scaled[:, None, :] - self.cluster_model.cluster_centers_[None, :, :]) ** 2).sum(axis=2)
+        return pd.Series(self.labels[distances.argmin(axis=1)], index=X.index, name='cluster')
+    
     def perform_clustering(self) -> pd.DataFrame:
         """
-        Cluster stocks into market segments
+        Cluster stocks into market segments; computed once per instance and
+        the result reused (treat it as read-only)
         Returns DataFrame with cluster assignments and characteristics
         """
-        # Select features for clustering
-        feature_cols = ['score', 'change', 'rsi', 'pe', 'dividend', 'marketCap']
-        available_cols = [col for col in feature_cols if col in self.data.columns]
-        
-        if len(available_cols) < 2:
+        if self._clusters is None:
+            self._clusters = self._perform_clustering()
+        return self._clusters
+    
+    def _perform_clustering(self) -> pd.DataFrame:
+        self.refit_reason = self.refit_reason_for(self.data)
+        if self.refit_reason and not self.fit():
             return pd.DataFrame()
         
-        # Prepare data
-        X = self.data[available_cols].copy()
-        for col in available_cols:
-            X[col] = pd.to_numeric(X[col], errors='coerce')
-        
-        X = X.dropna(thresh=len(available_cols) // 2)
-        
-        if len(X) < self.n_clusters:
+        clusters = self.assign()
+        if clusters.empty:
             return pd.DataFrame()
         
-        X = X.fillna(X.median())
-        
-        # Standardize and cluster
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        
-        clusters = self.cluster_model.fit_predict(X_scaled)
-        
         # Create results
-        results = self.data.loc[X.index].copy()
+        results = self.data.loc[clusters.index].copy()
         results['cluster'] = clusters
         
-        # Name clusters based on characteristics
-        cluster_names = self._name_clusters(results)
-        results['cluster_name'] = results['cluster'].map(cluster_names)
+        # Name clusters based on characteristics (labels named before keep their names)
+        if self._name_clusters(results):
+            self._save_state()
+        results['cluster_name'] = results['cluster'].map(self.names)
         
         return results
     
-    def _name_clusters(self, data: pd.DataFrame) -> Dict[int, str]:
-        """Assign meaningful names to clusters based on their characteristics"""
+    def _name_clusters(self, data: pd.DataFrame) -> bool:
+        """
+        Name labels that have no name yet from their stocks' characteristics,
+        taking the best-fitting name no other label holds. True if any were added.
+        """
         cluster_stats = data.groupby('cluster').agg({
             'score': 'mean',
             'change': 'mean',
-            'marketCap': 'mean'
         })
         
-        names = {}
+        added = False
         for cluster_id in cluster_stats.index:
+            if cluster_id in self.names:
+                continue
             score_avg = cluster_stats.loc[cluster_id, 'score']
             change_avg = cluster_stats.loc[cluster_id, 'change']
             
             if score_avg > 7 and change_avg > 2:
-                names[cluster_id] = "🚀 Rocket Ships"
+                preferred = "🚀 Rocket Ships"
             elif score_avg > 6 and abs(change_avg) < 2:
-                names[cluster_id] = "💰 Stable Growth"
+                preferred = "💰 Stable Growth"
             elif score_avg < 5 and change_avg > 3:
-                names[cluster_id] = "📈 Emerging"
+                preferred = "📈 Emerging"
             else:
-                names[cluster_id] = "🔷 Value Play"
+                preferred = "🔷 Value Play"
+            
+            taken = set(self.names.values())
+            free = [name for name in [preferred] + self.SEGMENT_NAMES if name not in taken]
+            self.names[int(cluster_id)] = free[0] if free else f"{preferred} #{cluster_id}"
+            added = True
         
-        return names
+        return added
     
     def get_allocation_strategy(self, total_capital: float) -> Dict[str, float]:
         """
@@ -299,42 +727,145 @@ class MarketSegmentation:
         return allocations
 
 
+# ============================================================================
+# SHARED ANALYSIS CONTEXT
+# ============================================================================
+
+CONTEXT_CACHE_SIZE = 8  # data snapshots kept in memory
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (columns, index and values)."""
+    digest = hashlib.sha256(repr((list(df.columns), df.shape)).encode())
+    digest.update(pd.util.hash_pandas_object(df.index).values.tobytes())
+    for _, column in df.items():
+        try:
+            hashed = pd.util.hash_pandas_object(column, index=False)
+        except TypeError:  # unhashable cells (dicts, lists)
+            hashed = pd.util.hash_pandas_object(column.astype(str), index=False)
+        digest.update(hashed.values.tobytes())
+    return digest.hexdigest()
+
+
+def _first_by_ticker(frame: pd.DataFrame, column: str) -> Dict[str, Any]:
+    """{ticker: value of the ticker's first row}."""
+    if frame.empty or 'ticker' not in frame.columns:
+        return {}
+    first = frame.drop_duplicates('ticker')
+    return dict(zip(first['ticker'], first[column]))
+
+
+class AnalysisContext:
+    """
+    Engines and derived per-ticker lookups for one data snapshot.
+    Each analysis runs on first use only.
+    """
+    
+    def __init__(self, stock_data: pd.DataFrame, fingerprint: str = None):
+        self.data = stock_data
+        self.fingerprint = fingerprint or frame_fingerprint(stock_data)
+        self.factor_engine = FactorAnalysisEngine(stock_data)
+        self.anomaly_detector = AnomalyDetector(stock_data)
+        self.segmentation = MarketSegmentation(stock_data)
+        self._lock = threading.Lock()
+        self._lookups: Dict[str, Dict[str, Any]] = {}
+    
+    def _lookup(self, name: str, build) -> Dict[str, Any]:
+        table = self._lookups.get(name)
+        if table is None:
+            with self._lock:
+                table = self._lookups.get(name)
+                if table is None:
+                    table = self._lookups[name] = build()
+        return table
+    
+    def row(self, ticker: str) -> Optional[pd.Series]:
+        """The ticker's first row, or None."""
+        def build():
+            if 'ticker' not in self.data.columns:
+                return {}
+            positions = {}
+            for position, symbol in enumerate(self.data['ticker']):
+                positions.setdefault(symbol, position)
+            return positions
+        position = self._lookup('rows', build).get(ticker)
+        return None if position is None else self.data.iloc[position]
+    
+    def significant_factors(self) -> List[Dict[str, Any]]:
+        return self.factor_engine.get_significant_factors()
+    
+    def red_herrings(self) -> List[Dict[str, Any]]:
+        return self.factor_engine.get_red_herrings()
+    
+    def anomaly_type(self, ticker: str) -> str:
+        types = self._lookup('anomaly_type', lambda: _first_by_ticker(self.anomaly_detector.detect_anomalies(), 'anomaly_type'))
+        return types.get(ticker, 'NORMAL')
+    
+    def cluster_name(self, ticker: str) -> str:
+        names = self._lookup('cluster_name', lambda: _first_by_ticker(self.segmentation.perform_clustering(), 'cluster_name'))
+        return names.get(ticker, 'Unknown')
+
+
+_contexts: "OrderedDict[str, AnalysisContext]" = OrderedDict()
+_contexts_lock = threading.Lock()
+
+
+def get_analysis_context(stock_data: pd.DataFrame) -> AnalysisContext:
+    """Shared context for this data snapshot (LRU over recent snapshots)."""
+    fingerprint = frame_fingerprint(stock_data)
+    with _contexts_lock:
+        context = _contexts.get(fingerprint)
+        if context is not None:
+            _contexts.move_to_end(fingerprint)
+            return context
+        context = _contexts[fingerprint] = AnalysisContext(stock_data, fingerprint)
+        if len(_contexts) > CONTEXT_CACHE_SIZE:
+            _contexts.popitem(last=False)
+        return context
+
+
+def clear_analysis_cache():
+    """Forget every memoized analysis context."""
+    with _contexts_lock:
+        _contexts.clear()
+
+
 class QuantitativeAdvisor:
     """
     Main class that combines all quant engines
     Generates comprehensive investment recommendations
+    
+    The engines come from the shared AnalysisContext of the data, so each
+    model is fit once per data snapshot however many theses are generated.
+    Build a new advisor after changing the data.
     """
     
     def __init__(self, stock_data: pd.DataFrame):
         self.data = stock_data
-        self.factor_engine = FactorAnalysisEngine(stock_data)
-        self.anomaly_detector = AnomalyDetector(stock_data)
-        self.segmentation = MarketSegmentation(stock_data)
+        self.context = get_analysis_context(stock_data)
+        self.factor_engine = self.context.factor_engine
+        self.anomaly_detector = self.context.anomaly_detector
+        self.segmentation = self.context.segmentation
     
     def generate_investment_thesis(self, ticker: str) -> Dict[str, Any]:
         """
         Generate comprehensive investment thesis for a stock
         Combines factor analysis, anomaly detection, and clustering
         """
-        stock = self.data[self.data['ticker'] == ticker]
+        stock = self.context.row(ticker)
         
-        if stock.empty:
+        if stock is None:
             return {'error': 'Stock not found'}
         
-        stock = stock.iloc[0]
-        
         # Get factor analysis
-        significant_factors = self.factor_engine.get_significant_factors()
-        red_herrings = self.factor_engine.get_red_herrings()
+        significant_factors = self.context.significant_factors()
+        red_herrings = self.context.red_herrings()
         
         # Check for anomalies
-        anomalies = self.anomaly_detector.detect_anomalies()
-        is_anomaly = ticker in anomalies['ticker'].values if not anomalies.empty else False
-        anomaly_type = anomalies[anomalies['ticker'] == ticker]['anomaly_type'].values[0] if is_anomaly else 'NORMAL'
+        anomaly_type = self.context.anomaly_type(ticker)
         
         # Get cluster
-        clusters = self.segmentation.perform_clustering()
-        cluster_name = clusters[clusters['ticker'] == ticker]['cluster_name'].values[0] if not clusters.empty else 'Unknown'
+        cluster_name = self.context.cluster_name(ticker)
         
         # Calculate confidence score
         confidence = self._calculate_confidence(significant_factors, anomaly_type, stock)
@@ -359,6 +890,15 @@ class QuantitativeAdvisor:
             'position_size': recommendation['position_size']
         }
     
+    def generate_all_theses(self, tickers: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Investment theses for many tickers (default: every ticker in the
+        data) from one set of fitted models
+        """
+        if tickers is None:
+            tickers = list(dict.fromkeys(self.data['ticker'])) if 'ticker' in self.data.columns else []
+        return {ticker: self.generate_investment_thesis(ticker) for ticker in tickers}
+    
     def _calculate_confidence(self, factors: List[Dict], anomaly_type: str, stock: pd.Series) -> float:
         """Calculate confidence score based on multiple signals"""
         base_confidence = 0.5
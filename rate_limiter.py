@@ -0,0 +1,308 @@
+"""
+Quota-aware rate limiting for the free-tier data providers.
+
+Each limiter combines a token bucket (short-term smoothing and bursts) with
+any number of sliding windows (per-minute, per-day, per-month caps). A call
+only reserves budget; the HTTP round trip runs outside any lock, so several
+requests to the same provider can be in flight at once. Window usage is
+persisted so daily and monthly caps survive restarts: one SQLite row per
+granted call, and the read, quota check and insert run in a single
+BEGIN IMMEDIATE transaction, so processes sharing the database can never
+jointly go over a quota.
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache_manager import CACHE_DIR
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+MONTH = 31 * DAY  # sliding 31 days never lets a calendar month exceed the cap
+
+STATE_DB = CACHE_DIR / "rate_limits.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    limiter TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_by_limiter ON calls (limiter, ts);
+"""
+
+
+class UsageLog:
+    """
+    Granted calls per limiter, one row each, shared by every thread and
+    process using the database. Connections are per thread (re-opened after
+    a fork), as in CacheStore.
+    """
+
+    def __init__(self, db_path: Path, busy_timeout: float = 10.0):
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.busy_timeout,
+            isolation_level=None,  # transactions are explicit (BEGIN IMMEDIATE)
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._migrate(conn)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """Move timestamp lists from the old key/value layout into rows."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='entries'").fetchone():
+                for key, value in conn.execute("SELECT key, value FROM entries WHERE key LIKE 'ratelimit:%'").fetchall():
+                    try:
+                        stamps = json.loads(value)
+                    except ValueError:
+                        continue
+                    conn.executemany("INSERT INTO calls (limiter, ts) VALUES (?, ?)",
+                                     [(key[len('ratelimit:'):], float(ts)) for ts in stamps])
+                conn.execute("DROP TABLE entries")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def timestamps(self, limiter: str, since: float) -> List[float]:
+        """Granted calls after since, oldest first."""
+        rows = self._connect().execute(
+            "SELECT ts FROM calls WHERE limiter = ? AND ts > ? ORDER BY ts", (limiter, since)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def reserve(self, limiter: str, horizon: float, wait_for: Callable[[List[float], float], float]) -> float:
+        """
+        In one write transaction: drop rows older than horizon, compute
+        wait_for(timestamps, now), and record a call if it is <= 0.
+        Returns the wait (<= 0 means the call was granted).
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock before reading
+        try:
+            now = time.time()
+            conn.execute("DELETE FROM calls WHERE limiter = ? AND ts <= ?", (limiter, now - horizon))
+            stamps = [row[0] for row in conn.execute(
+                "SELECT ts FROM calls WHERE limiter = ? ORDER BY ts", (limiter,))]
+            wait = wait_for(stamps, now)
+            if wait <= 0:
+                conn.execute("INSERT INTO calls (limiter, ts) VALUES (?, ?)", (limiter, now))
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+_usage_log: Optional[UsageLog] = None
+_state_lock = threading.Lock()
+
+
+def _get_usage_log() -> UsageLog:
+    """Shared log of granted calls."""
+    global _usage_log
+    if _usage_log is None:
+        with _state_lock:
+            if _usage_log is None:
+                _usage_log = UsageLog(STATE_DB)
+    return _usage_log
+
+
+class TokenBucket:
+    """Classic token bucket: capacity tokens, refilled at rate tokens/second."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """Seconds until tokens are available (0 if available now)."""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def take(self, tokens: float = 1):
+        self._refill()
+        self.tokens -= tokens
+
+
+class SlidingWindow:
+    """At most `limit` events in any `seconds`-long span."""
+
+    def __init__(self, limit: int, seconds: float):
+        self.limit = limit
+        self.seconds = seconds
+
+    def used(self, timestamps: List[float], now: float) -> int:
+        return len(timestamps) - bisect.bisect_right(timestamps, now - self.seconds)
+
+    def wait_time(self, timestamps: List[float], now: float) -> float:
+        """Seconds until one more event fits in the window."""
+        used = self.used(timestamps, now)
+        if used < self.limit:
+            return 0.0
+        # The oldest event that must age out before a slot frees up
+        blocking = timestamps[len(timestamps) - self.limit]
+        return blocking + self.seconds - now
+
+
+class RateLimiter:
+    """
+    Token bucket plus sliding-window quotas for one provider.
+
+    Usage:
+        if limiter.acquire(timeout=5):
+            response = requests.get(...)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        windows: List[Tuple[int, float]],
+        burst: Optional[float] = None,
+        rate: Optional[float] = None,
+        persist: bool = True,
+    ):
+        self.name = name
+        self.windows = [SlidingWindow(limit, seconds) for limit, seconds in windows]
+        self.bucket = TokenBucket(burst, rate) if burst and rate else None
+        self.persist = persist
+        self._horizon = max((w.seconds for w in self.windows), default=0)
+        self._timestamps: List[float] = []
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.rejected = 0
+
+    # ------------------------------------------------------------------
+    # Usage (wall-clock timestamps so they survive restarts)
+    # ------------------------------------------------------------------
+
+    def _load(self, now: float):
+        """Refresh _timestamps for read-only queries (reservations go through _reserve)."""
+        if self.persist:
+            self._timestamps = _get_usage_log().timestamps(self.name, now - self._horizon)
+            return
+        cutoff = bisect.bisect_right(self._timestamps, now - self._horizon)
+        if cutoff:
+            del self._timestamps[:cutoff]
+
+    def _reserve(self) -> float:
+        """Check every quota and record the call if they all allow it; returns the wait."""
+        if self.persist:
+            return _get_usage_log().reserve(self.name, self._horizon, self._wait_time_for)
+        now = time.time()
+        self._load(now)
+        wait = self._wait_time_for(self._timestamps, now)
+        if wait <= 0:
+            self._timestamps.append(now)
+        return wait
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def _wait_time_for(self, timestamps: List[float], now: float) -> float:
+        wait = max((w.wait_time(timestamps, now) for w in self.windows), default=0.0)
+        if self.bucket:
+            wait = max(wait, self.bucket.wait_time())
+        return wait
+
+    def _wait_time_locked(self, now: float) -> float:
+        return self._wait_time_for(self._timestamps, now)
+
+    def wait_time(self) -> float:
+        """Seconds until the next call would be allowed."""
+        with self._lock:
+            now = time.time()
+            self._load(now)
+            return self._wait_time_locked(now)
+
+    def try_acquire(self) -> bool:
+        """Reserve one call if every quota allows it right now."""
+        return self.acquire(timeout=0)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Reserve one call, waiting up to timeout seconds (None = wait as long
+        as needed). Returns False without sleeping if the budget won't free up
+        in time, e.g. when a daily cap is exhausted.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                wait = self._reserve()
+                if wait <= 0:
+                    if self.bucket:
+                        self.bucket.take()
+                    self.granted += 1
+                    return True
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                with self._lock:
+                    self.rejected += 1
+                return False
+            time.sleep(min(wait, 1.0))
+
+    def remaining(self) -> Dict[str, int]:
+        """Calls left in each window, keyed like '60/60s'."""
+        with self._lock:
+            now = time.time()
+            self._load(now)
+            return {
+                f"{w.limit}/{int(w.seconds)}s": max(0, w.limit - w.used(self._timestamps, now))
+                for w in self.windows
+            }
+
+    def headroom(self) -> float:
+        """Unused fraction of the tightest window (1.0 when there are no windows)."""
+        with self._lock:
+            now = time.time()
+            self._load(now)
+            return min(
+                (max(0.0, 1 - w.used(self._timestamps, now) / w.limit) for w in self.windows),
+                default=1.0,
+            )
+
+    def status(self) -> Dict[str, Any]:
+        """Remaining budget, current wait and counters for dashboards."""
+        remaining = self.remaining()
+        return {
+            'remaining': remaining,
+            'min_remaining': min(remaining.values()) if remaining else None,
+            'wait_seconds': self.wait_time(),
+            'granted': self.granted,
+            'rejected': self.rejected,
+        }
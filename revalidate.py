@@ -0,0 +1,67 @@
+"""
+Stale-while-revalidate support for the provider caches.
+
+When a cache entry has expired but is still within its max-staleness window,
+callers serve the old value immediately and hand the real fetch to a small
+background worker pool instead of blocking the UI on a rate-limited request.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+MAX_REFRESH_WORKERS = 2
+
+_executor = ThreadPoolExecutor(max_workers=MAX_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_in_flight = set()
+_lock = threading.Lock()
+_stats = {'scheduled': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0}
+
+
+def mark_stale(data: Dict[str, Any], age_seconds: float) -> Dict[str, Any]:
+    """Return a copy of data tagged as a stale cache hit with its age."""
+    tagged = dict(data)
+    tagged['stale'] = True
+    tagged['cache_age'] = age_seconds
+    return tagged
+
+
+def schedule_refresh(key: str, refresh_func: Callable[[], Any]) -> bool:
+    """
+    Queue refresh_func on the background pool unless a refresh for key is
+    already pending. Returns True if a new refresh was queued.
+    """
+    with _lock:
+        if key in _in_flight:
+            _stats['deduplicated'] += 1
+            return False
+        _in_flight.add(key)
+        _stats['scheduled'] += 1
+
+    def _run():
+        try:
+            refresh_func()
+            with _lock:
+                _stats['completed'] += 1
+        except Exception as e:
+            print(f"⚠️ Background refresh failed for {key}: {e}")
+            with _lock:
+                _stats['failed'] += 1
+        finally:
+            with _lock:
+                _in_flight.discard(key)
+
+    try:
+        _executor.submit(_run)
+    except RuntimeError:
+        # Interpreter shutting down; drop the refresh
+        with _lock:
+            _in_flight.discard(key)
+        return False
+    return True
+
+
+def get_refresh_stats() -> Dict[str, int]:
+    """Counters for queued, deduplicated, completed and failed refreshes."""
+    with _lock:
+        return {**_stats, 'pending': len(_in_flight)}
@@ -2,6 +2,11 @@
 
 from typing import Dict, Optional
 
+import numpy as np
+import pandas as pd
+
+from health_scoring import numeric_column
+
 
 def calculate_ai_score(stock_data: dict, health_score: Optional[int] = None, 
                        sentiment_score: Optional[float] = None) -> float:
@@ -84,6 +89,48 @@ def calculate_ai_score(stock_data: dict, health_score: Optional[int] = None,
     return round(min(max(final_score, 1), 10), 1)
 
 
+def calculate_ai_scores(frame: pd.DataFrame, health_scores: Optional[np.ndarray] = None,
+                        sentiment_scores: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    calculate_ai_score for every row of a DataFrame of stock records at once
+    (same weights, same additions in the same order, so results match).
+    health_scores / sentiment_scores are per-row arrays; None means the
+    scalar version's default for every row.
+    """
+    n = len(frame)
+    success = frame['success'].fillna(False).astype(bool).to_numpy() if 'success' in frame.columns \
+        else np.zeros(n, dtype=bool)
+    change = numeric_column(frame, 'change', 0.0)
+    dividend = numeric_column(frame, 'dividend', 0.0)
+    volume = numeric_column(frame, 'volume', 0.0)
+    rsi = numeric_column(frame, 'rsi', 50.0)
+    
+    # P/E: "N/A" (or missing) counts as 50; other unparsable values add nothing
+    if 'pe' in frame.columns:
+        pe_raw = frame['pe']
+        pe = pd.to_numeric(pe_raw, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+        pe[(pe_raw == 'N/A').to_numpy()] = 50
+    else:
+        pe = np.full(n, 50.0)
+    
+    base_score = np.full(n, 4.0)
+    base_score += np.select([change > 5, change > 2, change > 0, change < -5, change < -2], [1.5, 1.0, 0.5, -1.5, -1.0], default=0.0)
+    base_score += np.select([(pe >= 10) & (pe <= 20), ((pe >= 5) & (pe < 10)) | ((pe > 20) & (pe <= 30)), pe > 40],
+                            [1.5, 1.0, -1.0], default=0.0)
+    base_score += np.select([dividend > 3, dividend > 1], [0.5, 0.3], default=0.0)
+    base_score += np.where(volume > 10_000_000, 0.5, 0.0)
+    
+    health_contribution = np.zeros(n) if health_scores is None else (np.asarray(health_scores) / 100) * 3.0
+    sentiment_contribution = np.ones(n) if sentiment_scores is None else (np.asarray(sentiment_scores) + 1) * 1.0
+    rsi_contribution = np.select([rsi < 30, rsi < 50, rsi > 70], [1.0, 0.7, 0.3], default=0.5)
+    
+    final_score = base_score + health_contribution + sentiment_contribution + rsi_contribution
+    clipped = np.minimum(np.maximum(final_score, 1), 10)
+    # Python's round (correctly rounded) rather than np.round, to match calculate_ai_score
+    rounded = np.array([round(value, 1) for value in clipped.tolist()], dtype=np.float64)
+    return np.where(success, rounded, 0.0)
+
+
 def get_recommendation(score: float, health_grade: Optional[str] = None, 
                        sentiment_label: Optional[str] = None, 
                        risk_label: Optional[str] = None) -> Dict:
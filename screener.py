@@ -0,0 +1,257 @@
+"""
+Universe-scale stock screener.
+
+Scores thousands of tickers at once with the vectorized health and AI
+scoring (calculate_health_scores, calculate_ai_scores), flags anomalies and
+assigns market segments with the persisted quant models, and returns the
+top K.
+
+The universe is processed in chunks of chunk_size tickers: each chunk is
+loaded (local snapshot / static CSV records, or daily bars from the price
+store), scored, and reduced to its best K candidates, which go through one
+size-K heap. Only the heap and a few numeric columns per ticker (the model
+features) outlive a chunk, so memory grows with chunk_size and K rather
+than with the size of the raw data.
+
+Anomaly detection and clustering use AnomalyDetector and
+MarketSegmentation with their own saved models ('screener_*'), so repeated
+screens score with warm models and refit only when their refit policy
+says so.
+
+Usage:
+    from screener import screen_universe
+    result = screen_universe(top_k=25)    # local snapshot + static CSV
+    result = screen_universe(tickers, source='price_store', start_date='2025-01-01')
+    result['top']                         # DataFrame of the best 25
+"""
+
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from health_scoring import calculate_health_scores
+from indicators import rsi
+from local_data import load_daily_snapshot, load_static_prices
+from price_store import get_price_store
+from quant_engine import AnomalyDetector, MarketSegmentation
+from scoring import calculate_ai_scores, get_recommendation
+
+SOURCES = ('local', 'price_store')
+CHUNK_SIZE = 1000
+RSI_PERIOD = 14
+MODEL_FEATURES = ['score', 'price', 'change', 'rsi', 'pe', 'dividend', 'marketCap', 'volume']
+
+
+# ============================================================================
+# UNIVERSE LOADING
+# ============================================================================
+
+def load_local_records() -> Dict[str, Dict[str, Any]]:
+    """Stock records from the static CSV, overridden by today's snapshot where present."""
+    records = load_static_prices()
+    records.update(load_daily_snapshot())
+    return records
+
+
+def price_store_frame(
+    tickers: Sequence[str],
+    start_date: str,
+    end_date: str,
+    fundamentals: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> pd.DataFrame:
+    """
+    Stock records for one chunk built from stored daily bars: last close,
+    last bar's % change and volume, and RSI(14) with the same SMA smoothing
+    as data_sources. Name, P/E, market cap, dividend and sector come from
+    `fundamentals` when available (defaults otherwise).
+    """
+    # Only the last RSI_PERIOD + 1 bars matter; read them without pandas
+    bars = get_price_store().get_arrays(list(tickers), start_date, end_date, tail=RSI_PERIOD + 1)
+    if not bars:
+        return pd.DataFrame()
+    fundamentals = fundamentals or {}
+    symbols = list(bars)
+    closes = [bars[t]['Close'].astype(np.float64) for t in symbols]
+    
+    last = np.array([c[-1] for c in closes])
+    previous = np.array([c[-2] if len(c) > 1 else c[-1] for c in closes])
+    rsi_values = np.full(len(symbols), 50.0)
+    full = [i for i, c in enumerate(closes) if len(c) > RSI_PERIOD]
+    if full:
+        # One RSI pass over a (15 × tickers) matrix of each ticker's last closes
+        values = rsi(np.column_stack([closes[i] for i in full]), RSI_PERIOD, smoothing='sma')[-1]
+        rsi_values[full] = np.where(np.isnan(values), 50.0, values)
+    
+    info = [fundamentals.get(t, {}) for t in symbols]
+    return pd.DataFrame({
+        'ticker': symbols,
+        'name': [i.get('name', t) for i, t in zip(info, symbols)],
+        'price': last,
+        'change': (last / previous - 1) * 100,
+        'volume': np.array([float(bars[t]['Volume'][-1]) for t in symbols]),
+        'pe': [i.get('pe', 'N/A') for i in info],
+        'marketCap': [i.get('marketCap', 0) for i in info],
+        'dividend': [i.get('dividend', 0) for i in info],
+        'rsi': rsi_values,
+        'sector': [i.get('sector', 'Unknown') for i in info],
+        'success': True,
+    })
+
+
+def iter_universe(
+    tickers: Optional[Sequence[str]] = None,
+    source: str = 'local',
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    records: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the universe as DataFrames of at most chunk_size stock records.
+    `records` ({ticker: record}) replaces the local files as the record /
+    fundamentals source.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source: {source} (choose from {', '.join(SOURCES)})")
+
+    if records is None:
+        records = load_local_records()
+    if tickers is not None and source == 'local':
+        records = {t.upper(): records[t.upper()] for t in tickers if t.upper() in records}
+    if source == 'local':
+        items = list(records.values())
+        for start in range(0, len(items), chunk_size):
+            yield pd.DataFrame(items[start:start + chunk_size])
+        return
+
+    if not tickers:
+        raise ValueError("The price_store source needs a ticker list")
+    end_date = end_date or (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    start_date = start_date or (datetime.now() - timedelta(days=60)).strftime('%Y-%m-%d')
+    symbols = list(dict.fromkeys(t.upper() for t in tickers))
+    for start in range(0, len(symbols), chunk_size):
+        frame = price_store_frame(symbols[start:start + chunk_size], start_date, end_date, records)
+        if not frame.empty:
+            yield frame
+
+
+# ============================================================================
+# SCREENING
+# ============================================================================
+
+def score_frame(frame: pd.DataFrame, sentiment_scores: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """Add health_score, health_grade and the AI score to a chunk of records."""
+    health = calculate_health_scores(frame)
+    sentiment = None
+    if sentiment_scores:
+        sentiment = frame['ticker'].map(sentiment_scores).fillna(0.0).to_numpy(dtype=np.float64)
+    scored = frame.assign(health_score=health['health_score'], health_grade=health['health_grade'])
+    scored['score'] = calculate_ai_scores(scored, health['health_score'].to_numpy(), sentiment)
+    return scored
+
+
+def _push_top(heap: List[tuple], chunk: pd.DataFrame, values: np.ndarray, k: int, offset: int):
+    """Offer a chunk's best k rows to a size-k min-heap of (value, -position, record)."""
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) > k:
+        # Everything above the k-th best value, then the earliest ties at it
+        threshold = np.partition(values[valid], -k)[-k]
+        above = valid[values[valid] > threshold]
+        tied = valid[values[valid] == threshold][:k - len(above)]
+        valid = np.concatenate([above, tied])
+    for i in valid:
+        entry = (float(values[i]), -(offset + int(i)))
+        if len(heap) < k:
+            heapq.heappush(heap, entry + (chunk.iloc[i].to_dict(),))
+        elif entry > heap[0][:2]:
+            heapq.heapreplace(heap, entry + (chunk.iloc[i].to_dict(),))
+
+
+def _model_features(chunk: pd.DataFrame) -> pd.DataFrame:
+    """The numeric columns the quant models need, as compact float64 columns."""
+    features = {'ticker': chunk['ticker'].to_numpy()}
+    for column in MODEL_FEATURES:
+        if column in chunk.columns:
+            features[column] = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=np.float64)
+    return pd.DataFrame(features)
+
+
+def screen_universe(
+    tickers: Optional[Sequence[str]] = None,
+    source: str = 'local',
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    top_k: int = 25,
+    rank_by: str = 'score',
+    chunk_size: int = CHUNK_SIZE,
+    sentiment_scores: Optional[Dict[str, float]] = None,
+    run_models: bool = True,
+    records: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Screen a universe and return its top K.
+
+    Args:
+        tickers: Universe (default for source='local': every local ticker)
+        source: 'local' (daily snapshot + static CSV) or 'price_store'
+            (daily bars; fundamentals from the local records where known)
+        start_date / end_date: Bar range for source='price_store'
+            (default: the last 60 days)
+        top_k: Number of results
+        rank_by: Numeric column ranked (descending): 'score', 'health_score', ...
+        chunk_size: Tickers loaded and scored at a time
+        sentiment_scores: Optional {ticker: -1..1}; neutral when missing
+        run_models: Anomaly detection and clustering over the whole universe
+        records: {ticker: stock record} to use instead of the local files
+
+    Returns:
+        Dict with 'top' (DataFrame, best first, with anomaly_type, segment
+        and recommendation), 'anomalies' (the top_k most anomalous stocks),
+        'segments' ({segment: count}), 'screened' (row count) and
+        'timings' (seconds per stage)
+    """
+    started = time.perf_counter()
+    heap: List[tuple] = []
+    features = []
+    screened = 0
+    for chunk in iter_universe(tickers, source, start_date, end_date, chunk_size, records):
+        chunk = score_frame(chunk.reset_index(drop=True), sentiment_scores)
+        values = pd.to_numeric(chunk[rank_by], errors='coerce').to_numpy(dtype=np.float64)
+        _push_top(heap, chunk, values, top_k, screened)
+        features.append(_model_features(chunk))
+        screened += len(chunk)
+    scored_at = time.perf_counter()
+
+    top = pd.DataFrame([record for _, _, record in sorted(heap, key=lambda entry: entry[:2], reverse=True)])
+    result = {'top': top, 'anomalies': pd.DataFrame(), 'segments': {}, 'screened': screened}
+    if top.empty:
+        result['timings'] = {'load_and_score': scored_at - started, 'models': 0.0, 'total': scored_at - started}
+        return result
+
+    if run_models:
+        universe = pd.concat(features, ignore_index=True)
+        anomalies = AnomalyDetector(universe, model_name='screener_anomaly').detect_anomalies()
+        clusters = MarketSegmentation(universe, model_name='screener_segmentation').perform_clustering()
+        anomaly_types = dict(zip(anomalies['ticker'], anomalies['anomaly_type'])) if not anomalies.empty else {}
+        segments = dict(zip(clusters['ticker'], clusters['cluster_name'])) if not clusters.empty else {}
+        top['anomaly_type'] = top['ticker'].map(anomaly_types).fillna('NORMAL')
+        top['segment'] = top['ticker'].map(segments).fillna('Unknown')
+        result['anomalies'] = anomalies.head(top_k)[['ticker', 'score', 'anomaly_score', 'anomaly_type']] \
+            if not anomalies.empty else anomalies
+        result['segments'] = clusters['cluster_name'].value_counts().to_dict() if not clusters.empty else {}
+    models_at = time.perf_counter()
+
+    top['recommendation'] = [
+        get_recommendation(score, health_grade=grade)['recommendation']
+        for score, grade in zip(top['score'], top['health_grade'])
+    ]
+    result['timings'] = {
+        'load_and_score': scored_at - started,
+        'models': models_at - scored_at,
+        'total': time.perf_counter() - started,
+    }
+    return result
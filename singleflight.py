@@ -0,0 +1,91 @@
+"""
+Request coalescing (single-flight) for concurrent fetches.
+
+When several threads ask for the same key at once, only the first one runs
+the fetch; the others wait for it and receive the same result, or the same
+exception. Keys are typically (provider, ticker) tuples.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+_registry: Dict[str, "SingleFlight"] = {}
+_registry_lock = threading.Lock()
+
+
+class _Call:
+    """One in-flight fetch shared by its leader and any waiters."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into a single execution.
+    Counters show how many calls were served by another caller's fetch.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+
+        with _registry_lock:
+            _registry[name] = self
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run func() for key, or wait for the identical call already running."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.deduplicated += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """Total calls, real executions, deduplicated calls and fetches in flight."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'deduplicated': self.deduplicated,
+                'in_flight': len(self._calls),
+            }
+
+
+def get_singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """Stats for every named single-flight group in the process."""
+    with _registry_lock:
+        groups = list(_registry.values())
+    return {group.name: group.stats() for group in groups}
@@ -27,7 +27,7 @@ st.set_page_config(page_title="AI Investment Advisor", page_icon="💼", layout=
 
 # --- Optional project imports with safe fallbacks ---
 try:
-    from data_sources import get_demo_stock, get_stocks_parallel
+    from data_sources import get_demo_stock, get_stocks_batch, get_stocks_parallel
 except Exception:  # pragma: no cover
     def get_demo_stock(ticker: str) -> Dict[str, Any]:
         return {
@@ -46,6 +46,9 @@ except Exception:  # pragma: no cover
     def get_stocks_parallel(tickers: Iterable[str]) -> List[Dict[str, Any]]:
         return [get_demo_stock(t) for t in tickers]
 
+    def get_stocks_batch(tickers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        return {}
+
 # Import local data manager for robust fallback
 try:
     from local_data import get_prices_with_fallback, cleanup_old_snapshots, load_static_prices
@@ -62,14 +65,19 @@ except Exception:  # pragma: no cover
 try:
     from multi_provider import (
         get_stocks_parallel_multi,
+        prefetch_batch,
         validate_api_keys,
         get_cache_stats,
+        get_routing_status,
         clear_cache as clear_multi_cache,
     )
 except Exception:  # pragma: no cover
-    def get_stocks_parallel_multi(tickers: Iterable[str], max_workers: int = 3) -> Dict[str, Dict[str, Any]]:
+    def get_stocks_parallel_multi(tickers: Iterable[str], max_workers: int = 3, prefetch: bool = True) -> Dict[str, Dict[str, Any]]:
         return {t: get_demo_stock(t) for t in tickers}
 
+    def prefetch_batch(tickers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        return {}
+
     def validate_api_keys():
         return {"finnhub": False, "alpha_vantage": False}
 
@@ -79,6 +87,9 @@ except Exception:  # pragma: no cover
     def clear_multi_cache():
         return None
 
+    def get_routing_status():
+        return {"order": [], "providers": {}}
+
 # Import quantitative research engine
 try:
     from quant_engine import (
@@ -99,11 +110,20 @@ try:
         ConfidenceInterval,
         generate_performance_report
     )
+    from backtest_cache import cached_backtest
+    from execution import ExecutionModel
     BACKTEST_AVAILABLE = True
 except Exception:  # pragma: no cover
     BACKTEST_AVAILABLE = False
     print("⚠️ Backtesting engine not available")
 
+try:
+    from screener import screen_universe
+    SCREENER_AVAILABLE = True
+except Exception:  # pragma: no cover
+    SCREENER_AVAILABLE = False
+    print("⚠️ Universe screener not available")
+
 try:
     from news_sentiment import fetch_stock_news, calculate_overall_sentiment
 except Exception:  # pragma: no cover
@@ -203,11 +223,21 @@ def fetch_sequential(tickers: List[str], use_multi: bool = True, delay: float =
     # Clean up old snapshots
     cleanup_old_snapshots(max_age_days=7)
     
+    # Warm per-ticker caches through batch endpoints (one request per chunk);
+    # the per-ticker fetches below are then cache hits and skip their own prefetch
+    try:
+        if use_multi:
+            prefetch_batch(tickers)
+        else:
+            get_stocks_batch(tickers)
+    except Exception as e:
+        print(f"⚠️ Batch prefetch failed: {e}")
+    
     # Use local data manager with fallback chain
     def api_fetch_wrapper(tickers_batch):
         if use_multi:
             try:
-                data_map = get_stocks_parallel_multi(tickers_batch, max_workers=2)
+                data_map = get_stocks_parallel_multi(tickers_batch, max_workers=2, prefetch=False)
                 results = []
                 for t in tickers_batch:
                     d = data_map.get(t)
@@ -812,12 +842,34 @@ def main() -> None:
             st.warning("⚠️ Not configured")
 
     st.info("Smart load distribution with cache; sequential fetch avoids rate limits.")
+
+    routing = get_routing_status()
+    if routing["providers"]:
+        with st.expander("🩺 Provider health", expanded=False):
+            state_icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+            rows = []
+            for name in routing["order"]:
+                info = routing["providers"][name]
+                p95 = info.get("p95_latency")
+                rows.append({
+                    "Provider": f"{state_icons.get(info['state'], '⚪')} {name}",
+                    "Circuit": info["state"] + (f" ({info['retry_in']:.0f}s)" if info["retry_in"] else ""),
+                    "Error rate": f"{info['error_rate']:.0%}",
+                    "p95 latency": f"{p95:.2f}s" if p95 is not None else "-",
+                    "Quota left": f"{info['headroom']:.0%}",
+                    "Last error": info.get("last_error") or "",
+                })
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+            st.caption("Routing order (top first); open circuits are skipped until their cooldown ends.")
     
     # Show available static data
     if LOCAL_DATA_AVAILABLE:
         static_data = load_static_prices()
         if static_data:
             st.success(f"📂 {len(static_data)} tickers available in local fallback (updated 2025-12-06)")
+    
+    if SCREENER_AVAILABLE:
+        render_screener_section()
 
     use_multi = st.checkbox("🚀 Enable Multi-Provider Mode", value=True)
     use_demo = st.checkbox("Use sample data if throttled", value=False)
@@ -834,6 +886,17 @@ def main() -> None:
 
     col_cache1, col_cache2 = st.columns([2, 1])
     col_cache1.caption(f"Cache: {cache_stats['total_files']} files ({cache_stats['total_size_mb']:.2f} MB)")
+    memory_stats = cache_stats.get("memory")
+    if memory_stats:
+        col_cache1.caption(
+            f"Memory tier: {memory_stats['entries']} entries "
+            f"({memory_stats['bytes'] / (1024 * 1024):.2f}/{memory_stats['max_bytes'] / (1024 * 1024):.0f} MB), "
+            f"{memory_stats['hit_rate']:.0%} hit rate, {memory_stats['evictions']} evictions"
+        )
+    flight_stats = cache_stats.get("singleflight")
+    if flight_stats:
+        deduplicated = sum(g.get("deduplicated", 0) for g in flight_stats.values())
+        col_cache1.caption(f"Coalesced requests: {deduplicated} duplicate fetches avoided")
     with col_cache2:
         if st.button("🗑️ Clear Cache"):
             try:
@@ -973,6 +1036,40 @@ def main() -> None:
     footer()
 
 
+def render_screener_section():
+    """Screen the whole local universe and list the top-ranked tickers"""
+    with st.expander("🔭 Universe Screener", expanded=False):
+        st.caption("Vectorized health and AI scoring, anomaly detection and segmentation over every locally available ticker")
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            top_k = st.number_input("Top K", min_value=5, max_value=200, value=25, step=5)
+        with col2:
+            rank_by = st.selectbox(
+                "Rank By",
+                ["score", "health_score"],
+                format_func=lambda v: "AI score" if v == "score" else "Health score"
+            )
+        with col3:
+            st.write("")  # Spacer
+            run_screen = st.button("🔎 Screen Universe")
+        
+        if run_screen:
+            with st.spinner("Screening universe..."):
+                st.session_state['screen_results'] = screen_universe(top_k=int(top_k), rank_by=rank_by)
+        
+        results = st.session_state.get('screen_results')
+        if results:
+            top = results['top']
+            if top.empty:
+                st.info("No local stock records to screen")
+                return
+            st.caption(f"Screened {results['screened']} tickers in {results['timings']['total']:.2f}s")
+            columns = [c for c in ["ticker", "name", "score", "health_score", "health_grade", "segment",
+                                   "anomaly_type", "recommendation"] if c in top.columns]
+            st.dataframe(top[columns], hide_index=True, use_container_width=True)
+            st.caption("Add tickers from this list under Custom to analyze them in detail (up to 15 at a time).")
+
+
 def render_backtest_section(tickers: List[str], capital: float):
     """Render backtesting and validation section"""
     st.markdown("## 🎯 Strategy Validation & Backtesting")
@@ -1000,6 +1097,32 @@ def render_backtest_section(tickers: List[str], capital: float):
         with col3:
             st.write("")  # Spacer
             run_backtest = st.button("🚀 Run Backtest", type="primary")
+        
+        st.markdown("**Execution costs**")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            commission = st.number_input("Commission ($/trade)", min_value=0.0, max_value=50.0, value=0.0, step=0.5)
+        
+        with col2:
+            slippage_bps = st.number_input("Slippage (bps)", min_value=0.0, max_value=100.0, value=0.0, step=1.0)
+        
+        with col3:
+            participation = st.number_input(
+                "Max % of Volume",
+                min_value=0.0,
+                max_value=100.0,
+                value=0.0,
+                step=0.5,
+                help="Cap on shares bought per bar as a share of its volume (0 = no cap)"
+            )
+        
+        with col4:
+            fill_at = st.selectbox(
+                "Fill At",
+                ["close", "next_open"],
+                format_func=lambda v: "Signal close" if v == "close" else "Next bar open"
+            )
     
     # Calculate date range
     period_days = {
@@ -1016,8 +1139,16 @@ def render_backtest_section(tickers: List[str], capital: float):
     if run_backtest or st.session_state.get('backtest_results'):
         with st.spinner(f"Running backtest for {backtest_period}..."):
             # Run backtest
-            engine = BacktestEngine(initial_capital=initial_capital_bt)
-            results = engine.run_backtest(
+            execution = ExecutionModel(
+                commission=commission,
+                slippage_bps=slippage_bps,
+                max_participation=participation / 100 if participation > 0 else None,
+                fill_at=fill_at
+            )
+            engine = BacktestEngine(initial_capital=initial_capital_bt, execution=execution)
+            # Identical settings on unchanged prices load the stored result
+            results = cached_backtest(
+                engine,
                 tickers=tickers,
                 start_date=start_date.strftime('%Y-%m-%d'),
                 end_date=end_date.strftime('%Y-%m-%d')
@@ -1095,7 +1226,22 @@ def render_backtest_section(tickers: List[str], capital: float):
         with col3:
             outperformance = "✅ OUTPERFORMED" if alpha > 0 else "⚠️ UNDERPERFORMED"
             st.metric("Performance", outperformance)
-        
+
+        if results.get('benchmarks'):
+            rows = [
+                {
+                    'Benchmark': f"{b['name']} ({symbol})",
+                    'Return': f"{b['return']:+.2f}%",
+                    'Sharpe': f"{b['sharpe']:.2f}",
+                    'Alpha': f"{b['alpha']:+.2f}%",
+                    'Beta': f"{b['beta']:.2f}",
+                    'Tracking Error': f"{b['tracking_error']:.2f}%",
+                    'Info Ratio': f"{b['information_ratio']:.2f}",
+                }
+                for symbol, b in results['benchmarks'].items()
+            ]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
         # Performance Chart
         if results.get('daily_values') and results.get('dates'):
             st.markdown("### 📈 Equity Curve")
@@ -1151,7 +1297,8 @@ def render_backtest_section(tickers: List[str], capital: float):
         # Disclaimer
         st.info("""
         ⚠️ **Backtest Disclaimer:** Past performance is not indicative of future results. 
-        Backtests assume perfect execution, no slippage, and may not reflect real-world trading conditions.
+        Execution costs are modelled only as configured above (commission, slippage, volume cap, fill timing)
+        and may not reflect real-world trading conditions.
         This is for educational purposes only and not financial advice.
         """)
 
@@ -1189,14 +1336,17 @@ def render_quant_insights(successful: List[Dict[str, Any]], total_capital: float
                 with col3:
                     st.metric("P-value", f"{factor['p_value']:.4f}")
                 
-                st.caption(f"Correlation: {factor['correlation']:.3f} | This factor has {factor['strength'].lower()} predictive power")
+                st.caption(
+                    f"Correlation: {factor['correlation']:.3f} | FDR-adjusted p: {factor['p_adjusted']:.4f} | "
+                    f"This factor has {factor['strength'].lower()} predictive power"
+                )
                 st.markdown("---")
         
         if red_herrings:
             st.markdown("#### ⚠️ Red Herrings (Not Statistically Significant)")
             st.caption("These factors seem important but don't actually predict performance")
             for factor in red_herrings[:2]:
-                st.write(f"• **{factor['factor']}**: p={factor['p_value']:.3f} (correlation: {factor['correlation']:.3f})")
+                st.write(f"• **{factor['factor']}**: p={factor['p_value']:.3f}, adjusted p={factor['p_adjusted']:.3f} (correlation: {factor['correlation']:.3f})")
     
     with tab2:
         st.markdown("### Hidden Gems & Red Flags")
@@ -0,0 +1,93 @@
+"""
+Async provider client: rate-limit checks run off the event loop, concurrent
+requests for the same ticker share one HTTP call, and responses go through
+the same parsing as the sync fetchers.
+Run with: python -m pytest test_async_client.py
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import multi_provider as mp
+from async_client import AsyncProviderClient
+from rate_limiter import RateLimiter
+
+
+class SlowLimiter:
+    """Limiter whose checks block like a busy SQLite database."""
+
+    def __init__(self, delay: float, wait: float = 0.0):
+        self.delay = delay
+        self.wait = wait
+        self.threads = set()
+
+    def wait_time(self) -> float:
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return self.wait
+
+    def try_acquire(self) -> bool:
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return self.wait <= 0
+
+
+@pytest.fixture
+def finnhub(tmp_path, monkeypatch):
+    monkeypatch.setattr(mp, 'FINNHUB_API_KEY', 'test-key')
+    monkeypatch.setattr(mp, '_read_cache', lambda *args, **kwargs: None)
+    monkeypatch.setattr(mp, '_get_cache_path', lambda provider, ticker, data_type: tmp_path / f"{provider}_{ticker}.json")
+    monkeypatch.setattr(mp, '_rate_limiters', {**mp._rate_limiters,
+                                               'finnhub': RateLimiter('finnhub', [(100, 60)], persist=False)})
+
+
+def test_limiter_checks_do_not_block_the_loop(monkeypatch):
+    limiter = SlowLimiter(delay=0.2)
+    monkeypatch.setattr(mp, '_rate_limiters', {'finnhub': limiter})
+
+    async def _main():
+        ticks = []
+
+        async def _heartbeat():
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        granted, _ = await asyncio.gather(AsyncProviderClient()._acquire('finnhub'), _heartbeat())
+        return granted, ticks, threading.get_ident()
+
+    granted, ticks, loop_thread = asyncio.run(_main())
+    assert granted
+    assert loop_thread not in limiter.threads
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.15
+
+
+def test_acquire_gives_up_when_budget_frees_too_late(monkeypatch):
+    monkeypatch.setattr(mp, '_rate_limiters', {'finnhub': SlowLimiter(delay=0, wait=3600)})
+    assert asyncio.run(AsyncProviderClient()._acquire('finnhub')) is False
+
+
+def test_concurrent_requests_share_one_call(finnhub):
+    calls = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params['symbol'])
+        return httpx.Response(200, json={'c': 187.5, 'd': 1.5, 'dp': 0.8, 'pc': 186.0})
+
+    async def _main():
+        client = AsyncProviderClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        try:
+            return await asyncio.gather(*(client.get_provider('finnhub', 'AAPL') for _ in range(5)),
+                                        client.get_provider('finnhub', 'MSFT'))
+        finally:
+            await client._client.aclose()
+
+    results = asyncio.run(_main())
+    assert sorted(calls) == ['AAPL', 'MSFT']
+    assert all(r['current_price'] == 187.5 for r in results)
+    assert results[0] is results[4] and results[5]['ticker'] == 'MSFT'
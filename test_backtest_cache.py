@@ -0,0 +1,108 @@
+"""
+Backtest result cache: identical runs are served from disk, anything that
+changes the result changes the key (refetching identical prices does not),
+and the directory is LRU-evicted by size.
+Run with: python -m pytest test_backtest_cache.py
+"""
+
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+import backtest_cache
+import backtest_engine
+import benchmarks
+from backtest_cache import BacktestCache, cached_backtest
+from backtest_engine import BacktestEngine
+from cache_store import CacheStore
+from execution import ExecutionModel
+from price_store import PriceStore, _session_close
+from test_price_store import StubDownloader
+
+START, END = '2021-01-04', '2021-07-01'
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = PriceStore(tmp_path / 'prices', downloader=StubDownloader())
+    for module in (backtest_cache, backtest_engine, benchmarks):
+        monkeypatch.setattr(module, 'get_price_store', lambda: store)
+    monkeypatch.setattr(benchmarks, '_summaries', CacheStore(tmp_path / 'benchmarks.sqlite3'))
+    benchmarks.clear_benchmark_cache()
+    yield store
+    benchmarks.clear_benchmark_cache()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BacktestCache(tmp_path / 'backtests')
+
+
+def test_second_run_is_a_hit(store, cache):
+    first = cached_backtest(BacktestEngine(), ['AAA', 'BBB'], START, END, cache=cache)
+    assert 'error' not in first and first['total_trades'] >= 0
+    engine = BacktestEngine()
+    second = cached_backtest(engine, ['AAA', 'BBB'], START, END, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second['daily_values'] == first['daily_values']
+    assert len(engine.trades) == 0  # not run
+
+
+def momentum(day_data, positions):
+    return {}
+
+
+def test_key_covers_the_settings(store, cache):
+    key = lambda engine, strategy=None: cache.key(engine, ['AAA'], START, END, strategy)
+    base = key(BacktestEngine())
+    assert key(BacktestEngine()) == base
+    assert key(BacktestEngine(allocation=0.3)) != base
+    assert key(BacktestEngine(execution=ExecutionModel(commission=1.0))) != base
+    assert key(BacktestEngine(benchmarks=['SPY'])) != base
+    assert key(BacktestEngine(), momentum) != base
+    assert cache.key(BacktestEngine(), ['AAA'], START, '2021-08-01') != base
+
+
+def test_key_follows_price_values_not_refetches(store, cache):
+    base = cache.key(BacktestEngine(), ['AAA'], START, END)
+
+    def _force_tail_refetch():
+        entry = store.coverage('AAA')
+        last_bar = pd.Timestamp(entry['last_bar'])
+        entry['last_bar_fetched_at'] = _session_close(last_bar) - 3600
+        store.manifest.set('AAA', entry)
+
+    _force_tail_refetch()
+    calls = len(store.downloader.calls)
+    assert cache.key(BacktestEngine(), ['AAA'], START, END) == base
+    assert len(store.downloader.calls) == calls + 1
+
+    original = store.downloader.__call__
+    store.downloader = lambda tickers, start, end: {
+        t: frame.assign(Close=frame['Close'] * 1.01) for t, frame in original(tickers, start, end).items()}
+    _force_tail_refetch()
+    assert cache.key(BacktestEngine(), ['AAA'], START, END) != base
+
+
+def test_lru_eviction_by_size(tmp_path):
+    payload = {'values': list(range(600))}
+    entry_bytes = len(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = BacktestCache(tmp_path / 'backtests', max_bytes=int(entry_bytes * 3.5))  # room for three
+    for i in range(3):
+        cache.set(f"k{i}", payload)
+        os.utime(cache._path(f"k{i}"), (1_000 + i, 1_000 + i))
+    assert cache.get('k0') is not None  # k0 is now the most recently used
+    cache.set('k3', payload)
+    cache.set('k4', payload)
+    assert len(cache) == 3
+    assert cache.get('k1') is None and cache.get('k2') is None
+    assert cache.get('k0') is not None and cache.get('k4') is not None
+
+
+def test_unreadable_entry_is_a_miss(cache):
+    cache.root.mkdir(parents=True)
+    cache._path('bad').write_bytes(b'not a pickle')
+    assert cache.get('bad') is None
+    assert not cache._path('bad').exists()
@@ -0,0 +1,134 @@
+"""
+Vectorized momentum kernel: trades and equity match the per-date engine
+loop, and the array helpers match their pandas equivalents.
+Run with: python -m pytest test_backtest_kernel.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import BacktestEngine
+from backtest_kernel import ffill_rows, momentum_holdings, rolling_mean_valid, summarize
+from ledger import TradeLedger
+
+
+def make_prices(n_tickers: int = 6, n_days: int = 400, seed: int = 11) -> pd.DataFrame:
+    """Long frame shaped like BacktestEngine._fetch_historical_data output."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2015-01-05", periods=n_days, name="Date")
+    frames = []
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n_days)))
+        hist = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.004, n_days)),
+            "Close": close,
+            "Volume": rng.integers(50_000, 2_000_000, n_days),
+        }, index=dates)
+        hist["ticker"] = f"T{i:02d}"
+        hist["returns"] = hist["Close"].pct_change()
+        hist["sma_20"] = hist["Close"].rolling(20).mean()
+        hist["sma_50"] = hist["Close"].rolling(50).mean()
+        frames.append(hist)
+    return pd.concat(frames)
+
+
+# ============================================================================
+# BACKTEST KERNEL
+# ============================================================================
+
+def gappy_prices(date_major: bool = False, seed: int = 4) -> pd.DataFrame:
+    """
+    make_prices with random bars missing and a late listing; date_major
+    orders the rows date by date instead of ticker by ticker.
+    """
+    rng = np.random.default_rng(seed)
+    data = make_prices()
+    keep = (rng.random(len(data)) > 0.05) | (data.index == data.index[0])
+    keep &= ~((data['ticker'] == 'T05') & (data.index < data.index[120]))
+    data = data[keep]
+    if date_major:
+        data = data.reset_index().sort_values(['Date', 'ticker'], kind='stable').set_index('Date')
+    return data
+
+
+def assert_same_run(loop: BacktestEngine, vectorized: BacktestEngine):
+
+    assert len(loop.trades) > 0
+    assert len(loop.trades) == len(vectorized.trades)
+    for a, b in zip(loop.trades, vectorized.trades):
+        assert (a['date'], a['ticker'], a['action']) == (b['date'], b['ticker'], b['action'])
+        assert a.keys() == b.keys()
+        for key in a.keys() & {'price', 'shares', 'amount', 'pnl', 'pnl_pct', 'commission'}:
+            assert np.isclose(a[key], b[key], rtol=1e-9, equal_nan=True), (key, a, b)
+
+    np.testing.assert_allclose(loop.daily_values.values, vectorized.daily_values.values, rtol=1e-9)
+    assert np.isclose(loop.capital, vectorized.capital, rtol=1e-9)
+    assert loop.positions.keys() == vectorized.positions.keys()
+
+
+@pytest.mark.parametrize("gaps", [False, True], ids=["dense", "gappy"])
+def test_run_momentum_matches_simulate_loop(gaps):
+    # The loop walks dates in order of appearance, so gappy data goes in date-major
+    data = gappy_prices(date_major=True) if gaps else make_prices()
+    loop = BacktestEngine()
+    loop._simulate_loop(data)
+    vectorized = BacktestEngine()
+    vectorized._simulate_vectorized(data)
+    assert_same_run(loop, vectorized)
+
+
+def test_custom_windows_match_loop():
+    data = make_prices()
+    data['sma_10'] = data.groupby('ticker')['Close'].transform(lambda c: c.rolling(10).mean())
+    data['sma_30'] = data.groupby('ticker')['Close'].transform(lambda c: c.rolling(30).mean())
+    loop = BacktestEngine(fast_window=10, slow_window=30, allocation=0.3)
+    loop._simulate_loop(data)
+    vectorized = BacktestEngine(fast_window=10, slow_window=30, allocation=0.3)
+    vectorized._simulate_vectorized(data)
+    assert_same_run(loop, vectorized)
+
+
+# ============================================================================
+# ARRAY HELPERS
+# ============================================================================
+
+def test_ffill_rows_matches_pandas():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(size=(200, 7))
+    matrix[rng.random(matrix.shape) < 0.3] = np.nan
+    matrix[:5, 2] = np.nan
+    np.testing.assert_array_equal(ffill_rows(matrix), pd.DataFrame(matrix).ffill().to_numpy())
+
+
+def test_rolling_mean_skips_gaps_like_per_ticker_sma():
+    rng = np.random.default_rng(2)
+    matrix = 100 + rng.normal(size=(300, 5)).cumsum(axis=0)
+    matrix[rng.random(matrix.shape) < 0.1] = np.nan
+    matrix[:, 0] = 100 + np.arange(300)  # one dense column takes the fast path
+    expected = np.full_like(matrix, np.nan)
+    for j in range(matrix.shape[1]):
+        column = pd.Series(matrix[:, j]).dropna()
+        expected[column.index, j] = column.rolling(20).mean()
+    np.testing.assert_allclose(rolling_mean_valid(matrix, 20), expected, rtol=1e-9, equal_nan=True)
+
+
+def test_momentum_holdings_keeps_state_between_signals():
+    fast = np.array([[np.nan], [1.0], [2.0], [2.0], [1.0], [0.5]])
+    slow = np.array([[np.nan], [2.0], [1.0], [2.0], [2.0], [0.5]])
+    # no data, below, cross up, equal (keep), cross down, equal (keep)
+    assert momentum_holdings(fast, slow)[:, 0].tolist() == [False, False, True, True, False, False]
+
+
+def test_summarize():
+    values = np.array([100.0, 110.0, 99.0, 120.0])
+    trades = TradeLedger()
+    trades.record('2020-01-02', 'A', 'BUY', 10.0, 1.0, 10.0)
+    trades.record('2020-01-03', 'A', 'SELL', 12.0, 1.0, 12.0, 2.0, 20.0)
+    summary = summarize(values, trades, 100.0)
+    returns = values[1:] / values[:-1] - 1
+    assert summary['total_return'] == pytest.approx(20.0)
+    assert summary['max_drawdown'] == pytest.approx(-10.0)
+    assert summary['sharpe_ratio'] == pytest.approx(np.sqrt(252) * (returns - 0.02 / 252).mean() / returns.std(ddof=1))
+    assert summary['win_rate'] == 100 and summary['total_trades'] == 1
+    assert summarize(np.empty(0), TradeLedger(), 100.0)['final_value'] == 100.0
@@ -0,0 +1,93 @@
+"""
+Streaming backtester: CSV runs match the in-memory loop, stay offline
+(benchmarks come from the streamed bars or CSV files), and intraday bars
+keep their timestamps.
+Run with: python -m pytest test_backtest_stream.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest_stream
+from backtest_engine import BacktestEngine
+from benchmarks import EQUAL_WEIGHT
+from test_backtest_kernel import make_prices
+
+
+def write_csvs(directory, data: pd.DataFrame):
+    for ticker, hist in data.groupby('ticker'):
+        hist[['Open', 'Close', 'Volume']].assign(High=hist['Close'], Low=hist['Close']) \
+            .to_csv(directory / f"{ticker}.csv", index_label='Date')
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Fails the test if the run touches the price store."""
+    def _no_store(*args, **kwargs):
+        raise AssertionError('price store used in CSV mode')
+    monkeypatch.setattr(backtest_stream, 'get_price_store', _no_store)
+    monkeypatch.setattr(backtest_stream, 'benchmark_returns', _no_store)
+
+
+def test_csv_run_matches_loop_and_stays_offline(tmp_path, offline):
+    data = make_prices(n_tickers=4, n_days=300)
+    write_csvs(tmp_path, data)
+    tickers = sorted(data['ticker'].unique())
+
+    streamed = BacktestEngine().run_backtest_streaming(
+        tickers, '2015-01-01', '2017-01-01', csv_dir=str(tmp_path), output_dir=tmp_path / 'out')
+    loop = BacktestEngine()
+    loop._simulate_loop(data)
+
+    np.testing.assert_allclose(streamed['daily_values'], loop.daily_values.values, rtol=1e-9)
+    assert len(streamed['trades']) == len(loop.trades) > 0
+    assert streamed['dates'][0] == '2015-01-05'
+    assert streamed['benchmark'] == {'return': 0, 'sharpe': 0, 'max_drawdown': 0}  # no SPY.csv
+
+    # Equal weight: each ticker's own return between its bars, averaged per date
+    closes = data.reset_index().pivot(index='Date', columns='ticker', values='Close')
+    expected = (closes.pct_change().mean(axis=1).iloc[1:] + 1).prod() - 1
+    assert set(streamed['benchmarks']) == {EQUAL_WEIGHT}
+    assert streamed['benchmarks'][EQUAL_WEIGHT]['return'] == pytest.approx(expected * 100)
+
+
+def test_benchmark_csv_is_used_and_benchmarks_can_be_skipped(tmp_path, offline):
+    data = make_prices(n_tickers=3, n_days=120)
+    write_csvs(tmp_path, data)
+    spy = make_prices(n_tickers=1, n_days=120, seed=3).assign(ticker='SPY')
+    write_csvs(tmp_path, spy)
+    tickers = ['T00', 'T01', 'T02']
+
+    result = BacktestEngine().run_backtest_streaming(
+        tickers, '2015-01-01', '2016-01-01', csv_dir=str(tmp_path), output_dir=tmp_path / 'out')
+    assert set(result['benchmarks']) == {'SPY', EQUAL_WEIGHT}
+    spy_return = (spy['Close'].iloc[-1] / spy['Close'].iloc[0] - 1) * 100
+    assert result['benchmark']['return'] == pytest.approx(spy_return)
+    assert result['benchmarks']['SPY']['return'] == pytest.approx(spy_return)
+
+    skipped = BacktestEngine().run_backtest_streaming(
+        tickers, '2015-01-01', '2016-01-01', csv_dir=str(tmp_path), output_dir=tmp_path / 'out',
+        benchmarks=[])
+    assert skipped['benchmarks'] == {}
+    assert skipped['daily_values'] == result['daily_values']
+
+
+def test_intraday_bars_keep_their_timestamps(tmp_path, offline):
+    stamps = pd.date_range('2024-03-04 09:30', periods=7 * 60, freq='h')
+    stamps = stamps[(stamps.hour >= 9) & (stamps.hour <= 15)]
+    data = make_prices(n_tickers=2, n_days=len(stamps))
+    data.index = np.tile(stamps, 2)
+    write_csvs(tmp_path, data)
+
+    result = BacktestEngine().run_backtest_streaming(
+        ['T00', 'T01'], '2024-03-01', '2024-06-01', csv_dir=str(tmp_path), output_dir=tmp_path / 'out')
+    assert len(result['dates']) == len(set(result['dates'])) == len(stamps)
+    assert result['dates'][:2] == ['2024-03-04 09:30:00', '2024-03-04 10:30:00']
+    equity = pd.read_csv(result['equity_path'])
+    assert len(equity) == len(stamps)
+
+
+def test_missing_csv_is_an_error(tmp_path, offline):
+    result = BacktestEngine().run_backtest_streaming(['NOPE'], '2020-01-01', '2021-01-01', csv_dir=str(tmp_path))
+    assert 'error' in result
@@ -0,0 +1,67 @@
+"""
+Parameter sweeps: every valid grid point is run against the shared close
+matrix, each result matches a full engine run with the same settings, and
+worker processes give the same table as running in-process.
+Run with: python -m pytest test_backtest_sweep.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import BacktestEngine
+from backtest_sweep import build_grid, run_sweep
+from test_backtest_kernel import make_prices
+
+START, END = '2015-01-01', '2017-01-01'
+
+
+@pytest.fixture(scope='module')
+def prices() -> pd.DataFrame:
+    return make_prices(n_tickers=4, n_days=300)
+
+
+@pytest.fixture(scope='module')
+def close_data(prices):
+    closes = prices.reset_index().pivot(index='Date', columns='ticker', values='Close')
+    return pd.DatetimeIndex(closes.index), list(closes.columns), closes.to_numpy(dtype=np.float64)
+
+
+def test_build_grid_skips_invalid_pairs():
+    grid = build_grid(['aapl'], START, END, fast_windows=[10, 50], slow_windows=[20, 50],
+                      allocations=[0.1, 0.2], periods=[(START, '2016-01-01'), ('2016-01-01', END)])
+    assert len(grid) == 2 * 2 * 2  # periods × pairs with fast < slow × allocations
+    assert {(v['fast'], v['slow']) for v in grid} == {(10, 20), (10, 50)}
+    assert grid[0]['tickers'] == ['AAPL']
+
+
+def test_variants_match_engine_runs(prices, close_data):
+    table = run_sweep(close_data[1], START, END, fast_windows=[10, 20], slow_windows=[30, 50],
+                      allocations=[0.2, 0.3], max_workers=1, close_data=close_data)
+    assert len(table) == 8 and table['rank'].tolist() == list(range(1, 9))
+    assert table['sharpe_ratio'].is_monotonic_decreasing
+
+    for _, row in table.iterrows():
+        data = prices.copy()
+        for window in (row['fast'], row['slow']):
+            data[f"sma_{window}"] = data.groupby('ticker')['Close'].transform(lambda c: c.rolling(window).mean())
+        engine = BacktestEngine(fast_window=row['fast'], slow_window=row['slow'], allocation=row['allocation'])
+        engine._simulate_vectorized(data)
+        assert row['final_value'] == pytest.approx(engine.daily_values.values[-1], rel=1e-9)
+        assert row['total_trades'] == sum(1 for t in engine.trades if t['action'] == 'SELL')
+
+
+def test_workers_match_in_process(close_data):
+    kwargs = dict(fast_windows=[10, 20], slow_windows=[30, 50], allocations=[0.2],
+                  ticker_sets=[close_data[1], close_data[1][:2]], rank_by='total_return', close_data=close_data)
+    serial = run_sweep([], START, END, max_workers=1, **kwargs)
+    parallel = run_sweep([], START, END, max_workers=2, **kwargs)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert set(serial['tickers']) == {'T00,T01,T02,T03', 'T00,T01'}
+
+
+def test_unknown_tickers_are_dropped(close_data):
+    table = run_sweep(['NOPE', 'T00'], START, END, fast_windows=[10], slow_windows=[30],
+                      allocations=[0.2], max_workers=1, close_data=close_data)
+    assert table['tickers'].tolist() == ['T00']
+    assert run_sweep(['NOPE'], START, END, max_workers=1, close_data=close_data).empty
@@ -0,0 +1,83 @@
+"""
+Walk-forward backtests: windows tile the period, stitched results match
+trading the windows one after another, and the engine's execution model
+is applied to every window.
+Run with: python -m pytest test_backtest_walkforward.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest_engine
+from backtest_engine import BacktestEngine
+from backtest_walkforward import build_windows, run_walk_forward
+from execution import ExecutionModel
+from test_backtest_kernel import make_prices
+
+
+@pytest.fixture
+def close_data():
+    closes = make_prices(n_tickers=5, n_days=700).reset_index().pivot(index='Date', columns='ticker', values='Close')
+    return pd.DatetimeIndex(closes.index), list(closes.columns), closes.to_numpy(dtype=np.float64)
+
+
+def walk_forward(close_data, **kwargs):
+    return run_walk_forward(close_data[1], '2015-01-01', '2018-01-01', train_days=250, test_days=100,
+                            fast_windows=[10, 20], slow_windows=[50], max_workers=1,
+                            close_data=close_data, **kwargs)
+
+
+def test_build_windows():
+    windows = build_windows(700, 250, 100)
+    assert [(w[0].start, w[1].start, w[1].stop) for w in windows] == [
+        (0, 250, 350), (100, 350, 450), (200, 450, 550), (300, 550, 650), (400, 650, 700)]
+    assert build_windows(250, 250, 100) == []
+
+
+def test_stitched_out_of_sample_curve(close_data):
+    result = walk_forward(close_data)
+    assert len(result['windows']) == 5
+    assert result['dates'][0] == close_data[0][250]
+    assert len(result['dates']) == len(result['values']) == 450
+    assert result['values'][-1] == pytest.approx(100000 * (1 + result['total_return'] / 100))
+    # Every window ends flat, so the trades alternate per ticker and all are closed
+    assert result['total_trades'] * 2 == len(result['trades'])
+
+
+def test_rescaled_windows_match_trading_them_in_order(close_data):
+    # A vanishing flat fee takes the sequential path; slippage alone is rescaled
+    rescaled = walk_forward(close_data, execution=ExecutionModel(slippage_bps=10))
+    chained = walk_forward(close_data, execution=ExecutionModel(slippage_bps=10, commission=1e-9))
+    np.testing.assert_allclose(chained['values'], rescaled['values'], rtol=1e-9)
+    pd.testing.assert_frame_equal(chained['windows'], rescaled['windows'], rtol=1e-6)
+
+
+def test_costs_are_charged(close_data):
+    free = walk_forward(close_data)
+    costly = walk_forward(close_data, execution=ExecutionModel(commission=5.0, slippage_bps=20))
+    assert costly['values'][-1] < free['values'][-1]
+    commissions = costly['trades'].column('commission')
+    assert len(commissions) > 0 and (commissions == 5.0).all()
+
+
+def test_engine_passes_its_execution_model(close_data, monkeypatch):
+    calls = []
+
+    def _run(*args, **kwargs):
+        calls.append(kwargs['execution'])
+        return run_walk_forward(*args, close_data=close_data, **kwargs)
+
+    monkeypatch.setattr(backtest_engine, 'run_walk_forward', _run)
+    model = ExecutionModel(commission=1.0)
+    engine = BacktestEngine(execution=model)
+    metrics = engine.run_backtest_walk_forward(close_data[1], '2015-01-01', '2018-01-01',
+                                               train_days=250, test_days=100, max_workers=1)
+    assert calls == [model]
+    assert 'windows' in metrics and len(engine.trades) > 0
+
+
+@pytest.mark.parametrize("model", [ExecutionModel(fill_at='next_open'), ExecutionModel(max_participation=0.1)])
+def test_models_needing_open_or_volume_are_rejected(close_data, model):
+    with pytest.raises(ValueError):
+        walk_forward(close_data, execution=model)
@@ -0,0 +1,97 @@
+"""
+Benchmarks: return series from the price store, summaries memoized per
+range and data version, and alpha/beta/tracking error/information ratio
+against several benchmarks at once.
+Run with: python -m pytest test_benchmarks.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmarks
+from benchmarks import (EQUAL_WEIGHT, benchmark_returns, benchmark_summary, compare_benchmarks,
+                        compare_return_series, relative_metrics)
+from test_backtest_cache import store  # noqa: F401 (fixture)
+
+START, END = '2021-01-04', '2021-04-01'
+
+
+def stub_returns(start: str = START, end: str = END) -> pd.Series:
+    """Returns of the stub downloader's closes (each bar's day ordinal)."""
+    dates = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+    return pd.Series([d.toordinal() for d in dates], index=dates, dtype=np.float64).pct_change().iloc[1:]
+
+
+def test_benchmark_returns(store):
+    spy = benchmark_returns('spy', START, END)
+    np.testing.assert_allclose(spy.to_numpy(), stub_returns().to_numpy())
+    assert spy.name == 'SPY' and benchmark_returns('SPY', START, END) is spy
+
+    equal = benchmark_returns(EQUAL_WEIGHT, START, END, universe=['aaa', 'BBB'])
+    np.testing.assert_allclose(equal.to_numpy(), spy.to_numpy())
+    assert benchmark_returns(EQUAL_WEIGHT, START, END).empty
+
+
+def test_summary_is_memoized_on_disk(store, monkeypatch):
+    first = benchmark_summary('SPY', START, END)
+    returns = stub_returns().to_numpy()
+    assert first['return'] == pytest.approx((np.prod(1 + returns) - 1) * 100)
+    assert first['max_drawdown'] == 0
+
+    computed = []
+    summarize = benchmarks._summarize_returns
+    monkeypatch.setattr(benchmarks, '_summarize_returns', lambda r: computed.append(1) or summarize(r))
+    benchmarks._series.clear()  # only the on-disk summaries are left
+    assert benchmark_summary('SPY', START, END) == first
+    assert not computed
+    benchmark_summary('SPY', START, '2021-05-03')
+    assert computed == [1]
+
+
+def test_relative_metrics_by_hand():
+    rng = np.random.default_rng(6)
+    dates = pd.bdate_range('2021-01-04', periods=250)
+    bench = pd.DataFrame({'SPY': rng.normal(0.0004, 0.01, 250), 'QQQ': rng.normal(0.0005, 0.013, 250)}, index=dates)
+    strategy = pd.Series(1.5 * bench['SPY'] + rng.normal(0.0002, 0.004, 250), index=dates)
+
+    result = relative_metrics(strategy.iloc[5:], bench)  # aligned on shared dates
+    for symbol in bench:
+        r, b = strategy.iloc[5:].to_numpy(), bench[symbol].iloc[5:].to_numpy()
+        beta = np.cov(r, b, ddof=1)[0, 1] / b.var(ddof=1)
+        rf = 0.02 / 252
+        active = r - b
+        tracking = active.std(ddof=1) * np.sqrt(252)
+        assert result[symbol]['beta'] == pytest.approx(beta)
+        assert result[symbol]['alpha'] == pytest.approx(((r - rf).mean() - beta * (b - rf).mean()) * 252 * 100)
+        assert result[symbol]['tracking_error'] == pytest.approx(tracking * 100)
+        assert result[symbol]['information_ratio'] == pytest.approx(active.mean() * 252 / tracking)
+    assert result['SPY']['beta'] == pytest.approx(1.5, abs=0.1)
+
+    same = relative_metrics(bench['SPY'], bench[['SPY']])['SPY']
+    assert same['beta'] == pytest.approx(1.0) and same['tracking_error'] == 0 and same['information_ratio'] == 0
+    assert relative_metrics(strategy.iloc[:1], bench)['QQQ'] == {
+        'alpha': 0, 'beta': 0, 'tracking_error': 0, 'information_ratio': 0}
+
+
+def test_compare_return_series():
+    dates = pd.bdate_range('2021-01-04', periods=60)
+    values = pd.Series(100_000 * np.linspace(1, 1.1, 60), index=dates)
+    spy = values.pct_change().iloc[1:] * 0.5
+    result = compare_return_series(values, {'SPY': spy, 'QQQ': pd.Series(dtype=np.float64)})
+    assert list(result) == ['SPY']
+    assert result['SPY']['name'] == 'S&P 500' and result['SPY']['beta'] == pytest.approx(2.0)
+    assert result['SPY']['return'] == pytest.approx((np.prod(1 + spy) - 1) * 100)
+
+    given = {'return': 1.0, 'sharpe': 2.0, 'max_drawdown': -3.0}
+    assert compare_return_series(values, {'SPY': spy}, {'SPY': given})['SPY']['sharpe'] == 2.0
+    assert compare_return_series(values, {}) == {}
+
+
+def test_compare_benchmarks(store):
+    dates = stub_returns().index.insert(0, pd.Timestamp(START))
+    values = pd.Series(np.linspace(100, 120, len(dates)), index=dates)
+    result = compare_benchmarks(values, START, END)
+    assert list(result) == ['SPY', 'QQQ']  # no universe: no equal-weight benchmark
+    assert result['SPY'] == {**result['SPY'], **benchmark_summary('SPY', START, END)}
+    assert EQUAL_WEIGHT in compare_benchmarks(values, START, END, universe=['AAA'])
@@ -0,0 +1,93 @@
+"""
+Bootstrap: vectorized metrics give the same distribution as applying the
+metric to each resample in Python, chunking and worker processes do not
+change the result, and block resamples keep runs of consecutive rows.
+Run with: python -m pytest test_bootstrap.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bootstrap
+from backtest_engine import ConfidenceInterval
+from bootstrap import bootstrap_distribution, resample_indices
+
+
+@pytest.fixture(scope='module')
+def returns() -> pd.DataFrame:
+    rng = np.random.default_rng(8)
+    return pd.DataFrame({'returns': rng.normal(0.0005, 0.012, 500), 'volume': rng.integers(1, 100, 500)})
+
+
+def sharpe(sample: pd.DataFrame) -> float:
+    r = sample['returns']
+    return np.sqrt(252) * (r - 0.02 / 252).mean() / r.std()
+
+
+def max_drawdown(r: np.ndarray) -> float:
+    equity = np.concatenate([[1.0], np.cumprod(1 + r)])
+    return ((equity / np.maximum.accumulate(equity) - 1) * 100).min()
+
+
+REFERENCE = {
+    'mean': np.mean,
+    'sharpe': lambda r: np.sqrt(252) * (r - 0.02 / 252).mean() / r.std(ddof=1),
+    'max_drawdown': max_drawdown,
+    'win_rate': lambda r: (r > 0).mean() * 100,
+    'total_return': lambda r: (np.prod(1 + r) - 1) * 100,
+    'annual_volatility': lambda r: r.std(ddof=1) * np.sqrt(252) * 100,
+}
+
+
+@pytest.mark.parametrize('metric', sorted(REFERENCE))
+def test_vector_metrics_match_per_resample(returns, metric):
+    values = returns['returns'].to_numpy()
+    indices = resample_indices(len(values), 200, np.random.default_rng(3))
+    expected = [REFERENCE[metric](values[idx]) for idx in indices]
+    actual = bootstrap_distribution(returns, metric, 200, seed=3)
+    np.testing.assert_allclose(actual, expected, rtol=1e-9)
+
+
+def test_chunking_and_seed(returns, monkeypatch):
+    whole = bootstrap_distribution(returns, 'sharpe', 300, seed=1)
+    monkeypatch.setattr(bootstrap, 'CHUNK_ELEMENTS', 7 * len(returns))
+    np.testing.assert_array_equal(bootstrap_distribution(returns, 'sharpe', 300, seed=1), whole)
+    assert not np.array_equal(bootstrap_distribution(returns, 'sharpe', 300, seed=2), whole)
+
+
+def test_callable_metric_matches_named_metric(returns):
+    named = bootstrap_distribution(returns, 'sharpe', 100, seed=4)
+    np.testing.assert_allclose(bootstrap_distribution(returns, sharpe, 100, seed=4), named, rtol=1e-9)
+    np.testing.assert_allclose(bootstrap_distribution(returns, sharpe, 100, seed=4, n_jobs=2), named, rtol=1e-9)
+
+
+def test_unpicklable_metric_runs_in_process(returns, capsys):
+    result = bootstrap_distribution(returns, lambda s: s['returns'].mean(), 50, seed=4, n_jobs=2)
+    np.testing.assert_allclose(result, bootstrap_distribution(returns, 'mean', 50, seed=4), rtol=1e-9)
+    assert 'running in-process' in capsys.readouterr().out
+
+
+def test_block_resamples_are_circular_runs():
+    indices = resample_indices(10, 50, np.random.default_rng(0), block_size=4)
+    assert indices.shape == (50, 10)
+    for row in indices:
+        for start in (0, 4):
+            assert ((np.diff(row[start:start + 4]) % 10) == 1).all()
+
+
+def test_inputs_are_checked(returns):
+    with pytest.raises(ValueError, match='Unknown metric'):
+        bootstrap_distribution(returns, 'sortino')
+    with pytest.raises(ValueError, match='column='):
+        bootstrap_distribution(returns.rename(columns={'returns': 'r'}), 'mean')
+    assert len(bootstrap_distribution(pd.Series([np.nan, np.nan]), 'mean')) == 0
+
+
+def test_confidence_interval(returns):
+    ci = ConfidenceInterval.bootstrap_confidence_interval(returns, 'mean', 1000, 0.90, seed=0)
+    mean = returns['returns'].mean()
+    assert ci['lower'] < mean < ci['upper']
+    assert ci['mean'] == pytest.approx(mean, abs=returns['returns'].std() / np.sqrt(len(returns)))
+    blocked = ConfidenceInterval.bootstrap_confidence_interval(returns, 'mean', 1000, 0.90, block_size=20, seed=0)
+    assert blocked['lower'] < blocked['upper']
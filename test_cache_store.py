@@ -0,0 +1,101 @@
+"""
+SQLite cache store: per-key TTL, atomic writes from many threads and
+processes, and the one-time import of the legacy single-JSON stock cache.
+Run with: python -m pytest test_cache_store.py
+"""
+
+import json
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+import cache_manager
+from cache_store import CacheStore
+from memory_cache import get_memory_cache
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CacheStore(tmp_path / 'cache.sqlite3', default_ttl=60)
+
+
+def test_round_trip_and_ttl(store):
+    store.set('AAPL', {'price': 187.5, 'name': 'Apple'})
+    assert store.get('AAPL') == {'price': 187.5, 'name': 'Apple'}
+    assert store.get('MSFT') is None
+
+    store.set('OLD', {'price': 1}, ttl=-1)
+    assert store.get('OLD') is None
+    entry = store.get_entry('OLD', include_expired=True)
+    assert entry['data'] == {'price': 1} and entry['expires_at'] < time.time()
+    assert store.purge_expired() == 1
+    assert store.get_entry('OLD', include_expired=True) is None
+
+
+def test_bulk_write_delete_and_clear(store):
+    store.set_many([(f"T{i}", {'i': i}) for i in range(50)])
+    assert len(store) == 50 and store.get('T7') == {'i': 7}
+    store.delete('T7')
+    assert store.get('T7') is None and len(store) == 49
+    store.clear()
+    assert len(store) == 0
+
+
+def test_unserializable_value_is_reported_not_raised(store, capsys):
+    circular = {}
+    circular['self'] = circular
+    store.set('BAD', circular)
+    assert store.get('BAD') is None
+    assert 'Cache write failed for BAD' in capsys.readouterr().out
+
+
+def test_concurrent_threads(store):
+    def _writer(n: int):
+        for i in range(50):
+            store.set(f"{n}:{i}", {'n': n, 'i': i})
+
+    threads = [threading.Thread(target=_writer, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store) == 400
+    assert store.get('5:49') == {'n': 5, 'i': 49}
+
+
+def _process_writer(path: str, n: int):
+    store = CacheStore(path)
+    for i in range(25):
+        store.set(f"p{n}:{i}", i)
+
+
+def test_concurrent_processes(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_process_writer, args=(path, n)) for n in range(3)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+    assert len(CacheStore(path)) == 75
+
+
+def test_legacy_json_cache_is_imported_once(tmp_path, monkeypatch):
+    legacy = tmp_path / 'stock_data_cache.json'
+    now = time.time()
+    legacy.write_text(json.dumps({
+        'AAPL': {'data': {'price': 187.5}, 'cached_at': now - 10},
+        'OLD': {'data': {'price': 1.0}, 'cached_at': now - 10 * cache_manager.CACHE_TTL_SECONDS},
+    }))
+    monkeypatch.setattr(cache_manager, 'CACHE_FILE', legacy)
+    monkeypatch.setattr(cache_manager, 'CACHE_DB', tmp_path / 'stock.sqlite3')
+    monkeypatch.setattr(cache_manager, '_store', None)
+    get_memory_cache().clear()
+
+    assert cache_manager.get_cached_stock('AAPL') == {'price': 187.5}
+    assert cache_manager.get_cached_stock('OLD') is None
+    assert not legacy.exists()
+    get_memory_cache().clear()
@@ -0,0 +1,118 @@
+"""
+Yahoo batch fetch: one history download per chunk, fundamentals reused
+from cached records instead of a per-ticker info call, and expired entries
+served through stale-while-revalidate.
+Run with: python -m pytest test_data_sources.py
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache_manager
+import data_sources
+import multi_provider
+from cache_manager import get_cached_stock, set_cached_stock
+from cache_store import CacheStore
+from memory_cache import get_memory_cache
+from provider_health import ProviderHealth
+
+
+class FakeYahoo:
+    """Stands in for safe_yf_fetch_batch / safe_yf_info and counts the calls."""
+
+    def __init__(self):
+        self.downloads = []
+        self.info_calls = []
+
+    def download(self, tickers):
+        self.downloads.append(list(tickers))
+        dates = pd.bdate_range('2024-01-02', periods=30)
+        close = 100.0 + np.arange(len(dates))
+        return {t: pd.DataFrame({'Close': close, 'Volume': 5000.0}, index=dates) for t in tickers}
+
+    def info(self, ticker):
+        self.info_calls.append(ticker)
+        return {'currentPrice': 129.0, 'longName': f"{ticker} Inc", 'trailingPE': 20.0,
+                'marketCap': 10e9, 'dividendYield': 0.02, 'volume': 5000, 'sector': 'Tech'}
+
+
+@pytest.fixture
+def yahoo(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_manager, '_store', CacheStore(tmp_path / 'stock.sqlite3'))
+    get_memory_cache().clear()
+    fake = FakeYahoo()
+    monkeypatch.setattr(data_sources, 'safe_yf_fetch_batch', fake.download)
+    monkeypatch.setattr(data_sources, 'safe_yf_info', fake.info)
+    monkeypatch.setattr(data_sources, 'get_health', ProviderHealth)
+    fake.refreshes = []
+    monkeypatch.setattr(data_sources, 'schedule_refresh',
+                        lambda key, func: fake.refreshes.append((key, func)) or True)
+    yield fake
+    get_memory_cache().clear()
+
+
+def record(ticker: str, price: float = 100.0, fundamentals_at: float = None) -> dict:
+    return {'success': True, 'ticker': ticker, 'name': f"{ticker} Corp", 'price': price,
+            'change': 0.0, 'pe': 10.0, 'marketCap': 2.0, 'dividend': 3.0, 'rsi': 50.0,
+            'rsi_state': None, 'volume': 1, 'sector': 'Energy',
+            'fundamentals_at': time.time() if fundamentals_at is None else fundamentals_at}
+
+
+def test_new_tickers_share_one_download(yahoo):
+    results = data_sources.get_stocks_batch(['AAA', 'BBB', 'AAA'])
+    assert yahoo.downloads == [['AAA', 'BBB']]
+    assert yahoo.info_calls == ['AAA', 'BBB']  # never seen: fundamentals need info
+    assert results['AAA']['name'] == 'AAA Inc' and results['AAA']['price'] == 129.0
+    assert get_cached_stock('BBB')['sector'] == 'Tech'
+
+
+def test_fresh_hits_make_no_requests(yahoo):
+    set_cached_stock('AAA', record('AAA'))
+    assert data_sources.get_stocks_batch(['AAA'])['AAA']['name'] == 'AAA Corp'
+    assert yahoo.downloads == [] and yahoo.refreshes == []
+
+
+def test_stale_entries_are_served_and_refreshed_in_one_batch(yahoo):
+    set_cached_stock('AAA', record('AAA'), ttl=-1)
+    set_cached_stock('BBB', record('BBB'), ttl=-1)
+    results = data_sources.get_stocks_batch(['AAA', 'BBB'])
+    assert results['AAA']['stale'] and results['BBB']['price'] == 100.0
+    assert yahoo.downloads == []
+    assert len(yahoo.refreshes) == 1
+
+    _, refresh = yahoo.refreshes[0]
+    refresh()
+    assert yahoo.downloads == [['AAA', 'BBB']]
+    assert yahoo.info_calls == []
+    refreshed = get_cached_stock('AAA')
+    assert refreshed['price'] == 129.0 and refreshed['name'] == 'AAA Corp'
+    # Earnings, share count and payout carry over; the ratios follow the price
+    assert refreshed['pe'] == pytest.approx(12.9)
+    assert refreshed['marketCap'] == pytest.approx(2.58)
+    assert refreshed['dividend'] == pytest.approx(3.0 / 1.29)
+    assert refreshed['change'] == pytest.approx((129 / 128 - 1) * 100)
+    assert refreshed['volume'] == 5000 and refreshed['rsi'] == 100.0
+
+
+def test_old_fundamentals_are_refetched(yahoo, monkeypatch):
+    monkeypatch.setattr(data_sources, 'STALE_WHILE_REVALIDATE', False)
+    old = time.time() - data_sources.FUNDAMENTALS_MAX_AGE_SECONDS - 60
+    set_cached_stock('AAA', record('AAA', fundamentals_at=old), ttl=-1)
+    set_cached_stock('BBB', record('BBB'), ttl=-1)
+    results = data_sources.get_stocks_batch(['AAA', 'BBB'])
+    assert yahoo.info_calls == ['AAA']
+    assert results['AAA']['name'] == 'AAA Inc' and results['BBB']['name'] == 'BBB Corp'
+
+
+def test_parallel_multi_prefetch_is_optional(monkeypatch):
+    calls = []
+    monkeypatch.setattr(multi_provider, 'prefetch_batch', calls.append)
+    monkeypatch.setattr(multi_provider, 'USE_ASYNC_CLIENT', False)
+    monkeypatch.setattr(multi_provider, 'fetch_quote_multi_provider', lambda t: {'ticker': t})
+    multi_provider.get_stocks_parallel_multi(['AAA'], prefetch=False)
+    assert calls == []
+    assert multi_provider.get_stocks_parallel_multi(['AAA']) == {'AAA': {'ticker': 'AAA'}}
+    assert calls == [['AAA']]
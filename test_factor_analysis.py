@@ -0,0 +1,75 @@
+"""
+Vectorized factor analysis: factor_statistics matches per-factor scipy
+results, and the Benjamini-Hochberg correction matches its definition.
+Run with: python -m pytest test_factor_analysis.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from quant_engine import FactorAnalysisEngine, benjamini_hochberg, factor_statistics
+
+
+def test_factor_statistics_matches_pearsonr():
+    rng = np.random.default_rng(7)
+    X = rng.normal(size=(800, 30))
+    y = X[:, :5] @ rng.uniform(0.1, 0.5, 5) + rng.normal(size=800)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    X[:, -1] = np.nan
+    X[:2, -1] = 1.0  # fewer than min_obs rows
+
+    result = factor_statistics(X, y)
+    for j in range(X.shape[1] - 1):
+        valid = ~np.isnan(X[:, j])
+        r, p = stats.pearsonr(X[valid, j], y[valid])
+        assert result['correlation'][j] == pytest.approx(r, abs=1e-12)
+        assert result['p_value'][j] == pytest.approx(p, rel=1e-8, abs=1e-300)
+
+        target = y[valid]
+        high = target > np.median(target)
+        factor = X[valid, j]
+        pooled = np.sqrt((factor[high].std(ddof=1) ** 2 + factor[~high].std(ddof=1) ** 2) / 2)
+        assert result['effect_size'][j] == pytest.approx((factor[high].mean() - factor[~high].mean()) / pooled, abs=1e-12)
+
+    assert np.isnan(result['correlation'][-1]) and np.isnan(result['p_value'][-1])
+
+
+def test_benjamini_hochberg_matches_definition():
+    rng = np.random.default_rng(2)
+    p = np.concatenate([rng.uniform(0, 0.01, 5), rng.uniform(0, 1, 45), [np.nan, np.nan]])
+    adjusted = benjamini_hochberg(p)
+
+    tested = p[~np.isnan(p)]
+    m = len(tested)
+    ranked = np.sort(tested)
+    # q_(i) = min over j >= i of p_(j) * m / j
+    expected_sorted = np.array([min(1.0, (ranked[i:] * m / np.arange(i + 1, m + 1)).min()) for i in range(m)])
+    np.testing.assert_allclose(np.sort(adjusted[:m]), expected_sorted, rtol=1e-12)
+    assert np.isnan(adjusted[-2:]).all()
+    assert (adjusted[:m] >= tested * (1 - 1e-12)).all()
+    assert np.isnan(benjamini_hochberg(np.array([np.nan]))).all()
+
+
+def test_factor_engine_flags_real_factors():
+    rng = np.random.default_rng(8)
+    n = 400
+    frame = pd.DataFrame({
+        'price_change': rng.normal(size=n),
+        'rsi': rng.uniform(10, 90, n),
+        'pe': np.where(rng.random(n) < 0.1, 'N/A', rng.lognormal(3, 0.5, n).round(2).astype(str)),
+        'volume': rng.lognormal(14, 1, n),
+    })
+    frame['score'] = 50 + 10 * frame['price_change'] + rng.normal(0, 5, n)
+
+    engine = FactorAnalysisEngine(frame)
+    factors = {f['column']: f for f in engine.analyze_factors()}
+    assert set(factors) == {'price_change', 'rsi', 'pe', 'volume'}
+    assert factors['price_change']['significant'] and factors['price_change']['strength'] == 'LARGE'
+    assert [f['column'] for f in engine.get_significant_factors()] == ['price_change']
+    assert all(f['p_adjusted'] >= f['p_value'] for f in factors.values())
+
+    raw = FactorAnalysisEngine(frame, correction=None).analyze_factors()
+    assert all(f['p_adjusted'] == f['p_value'] for f in raw)
+    assert FactorAnalysisEngine(frame.drop(columns='score')).analyze_factors() == []
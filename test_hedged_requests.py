@@ -0,0 +1,100 @@
+"""
+Hedged quote requests: a slow provider gets a parallel backup after
+HEDGE_AFTER_SECONDS, failures move on at once, providers short on quota are
+never raced, and Alpha Vantage is only a sequential last resort.
+Run with: python -m pytest test_hedged_requests.py
+"""
+
+import time
+
+import pytest
+
+import multi_provider as mp
+import provider_health
+from rate_limiter import RateLimiter
+
+
+class FakeProvider:
+    """Quote fetcher that answers (or fails) after a delay and records its calls."""
+
+    def __init__(self, name: str, delay: float = 0.0, price=None):
+        self.name = name
+        self.delay = delay
+        self.price = price
+        self.calls = []
+
+    def __call__(self, ticker: str):
+        self.calls.append(time.monotonic())
+        time.sleep(self.delay)
+        return {'ticker': ticker, 'current_price': self.price, 'source': self.name} if self.price else None
+
+    @property
+    def entry(self):
+        return (self.name, self.name.title(), self)
+
+
+@pytest.fixture(autouse=True)
+def hedging(monkeypatch):
+    monkeypatch.setattr(mp, 'HEDGE_AFTER_SECONDS', 0.05)
+    monkeypatch.setattr(mp, 'HEDGED_REQUESTS', True)
+    monkeypatch.setattr(mp, '_rate_limiters', {})
+    monkeypatch.setattr(provider_health, '_registry', {})
+
+
+def stats_delta(before):
+    after = mp.get_hedge_stats()
+    return {k: after[k] - before[k] for k in after}
+
+
+def test_slow_provider_is_hedged():
+    slow, fast = FakeProvider('yfinance', delay=0.5, price=1.0), FakeProvider('finnhub', price=2.0)
+    before = mp.get_hedge_stats()
+    started = time.monotonic()
+    result = mp._fetch_quote_hedged('AAPL', [slow.entry, fast.entry])
+    assert result['source'] == 'finnhub'
+    assert time.monotonic() - started < 0.4
+    assert fast.calls[0] - slow.calls[0] >= 0.05
+    assert stats_delta(before) == {'requests': 1, 'hedges_fired': 1, 'hedge_wins': 1, 'quota_skips': 0}
+
+
+def test_failure_moves_on_without_waiting():
+    broken, good = FakeProvider('yfinance'), FakeProvider('finnhub', price=2.0)
+    before = mp.get_hedge_stats()
+    assert mp._fetch_quote_hedged('AAPL', [broken.entry, good.entry])['source'] == 'finnhub'
+    assert good.calls[0] - broken.calls[0] < 0.05
+    assert stats_delta(before)['hedges_fired'] == 0
+
+
+def test_provider_short_on_quota_is_not_raced(monkeypatch):
+    limiter = RateLimiter('finnhub', [(10, 60)], persist=False)
+    for _ in range(9):
+        limiter.try_acquire()
+    monkeypatch.setattr(mp, '_rate_limiters', {'finnhub': limiter})
+    slow, backup = FakeProvider('yfinance', delay=0.2, price=1.0), FakeProvider('finnhub', price=2.0)
+    before = mp.get_hedge_stats()
+    assert mp._fetch_quote_hedged('AAPL', [slow.entry, backup.entry])['source'] == 'yfinance'
+    assert not backup.calls
+    assert stats_delta(before)['quota_skips'] >= 1
+
+
+def test_alpha_vantage_is_a_last_resort():
+    slow = FakeProvider('yfinance', delay=0.2)
+    alpha = FakeProvider('alphavantage', price=3.0)
+    assert mp._fetch_quote_hedged('AAPL', [alpha.entry, slow.entry])['source'] == 'alphavantage'
+    assert alpha.calls[0] - slow.calls[0] >= 0.2  # only after yfinance failed
+
+    answering = FakeProvider('yfinance', delay=0.2, price=1.0)
+    unused = FakeProvider('alphavantage', price=3.0)
+    assert mp._fetch_quote_hedged('AAPL', [answering.entry, unused.entry])['source'] == 'yfinance'
+    assert not unused.calls
+
+
+def test_serial_cascade_when_disabled(monkeypatch):
+    slow, fast = FakeProvider('yfinance', delay=0.2, price=1.0), FakeProvider('finnhub', price=2.0)
+    monkeypatch.setattr(mp, 'HEDGED_REQUESTS', False)
+    monkeypatch.setattr(mp, '_quote_providers', lambda: [slow.entry, fast.entry])
+    assert mp.fetch_quote_multi_provider('AAPL')['source'] == 'yfinance'
+    assert not fast.calls
+
+    monkeypatch.setattr(mp, '_quote_providers', lambda: [FakeProvider('yfinance').entry])
+    assert mp.fetch_quote_multi_provider('AAPL') is None
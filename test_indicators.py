@@ -0,0 +1,118 @@
+"""
+Indicators: batch functions match pandas, streaming classes match the batch
+functions bar by bar, and RSI state survives a JSON round trip.
+Run with: python -m pytest test_indicators.py
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+from indicators import ATR, EMA, MACD, RSI, SMA, Bollinger, RollingStd
+
+
+def make_bars(n: int = 300, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    return high, low, close
+
+
+def stream(indicator, *columns):
+    return np.array([indicator.update(*row) for row in zip(*columns)], dtype=np.float64)
+
+
+def assert_close(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+# ============================================================================
+# BATCH
+# ============================================================================
+
+def test_batch_matches_pandas():
+    _, _, close = make_bars()
+    series = pd.Series(close)
+    assert_close(indicators.sma(close, 20), series.rolling(20).mean())
+    assert_close(indicators.rolling_std(close, 20), series.rolling(20).std())
+    assert_close(indicators.ema(close, 12), series.ewm(span=12, adjust=False).mean())
+
+    delta = series.diff()
+    gain, loss = delta.clip(lower=0).rolling(14).mean(), (-delta).clip(lower=0).rolling(14).mean()
+    assert_close(indicators.rsi(close, smoothing='sma'), 100 - 100 / (1 + gain / loss))
+
+
+def test_wilder_rsi_by_hand():
+    _, _, close = make_bars(60)
+    delta = np.diff(close)
+    gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    avg_gain, avg_loss = gain[:14].mean(), loss[:14].mean()
+    expected = [100 - 100 / (1 + avg_gain / avg_loss)]
+    for g, l in zip(gain[14:], loss[14:]):
+        avg_gain, avg_loss = (avg_gain * 13 + g) / 14, (avg_loss * 13 + l) / 14
+        expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+    result = indicators.rsi(close)
+    assert np.isnan(result[:14]).all()
+    assert_close(result[14:], expected)
+
+
+def test_batch_works_on_matrices():
+    columns = [make_bars(seed=s)[2] for s in range(3)]
+    matrix = np.column_stack(columns)
+    for func in (lambda x: indicators.sma(x, 10), lambda x: indicators.ema(x, 9), indicators.rsi):
+        assert_close(func(matrix), np.column_stack([func(c) for c in columns]))
+
+
+def test_flat_prices_have_no_rsi():
+    assert np.isnan(indicators.rsi(np.full(30, 10.0))).all()
+    assert indicators.rsi(np.arange(30.0))[-1] == 100.0
+
+
+# ============================================================================
+# STREAMING
+# ============================================================================
+
+def test_streaming_matches_batch():
+    high, low, close = make_bars()
+    assert_close(stream(SMA(20), close), indicators.sma(close, 20))
+    assert_close(stream(EMA(12), close), indicators.ema(close, 12))
+    assert_close(stream(RollingStd(20), close), indicators.rolling_std(close, 20))
+    for smoothing in ('wilder', 'sma'):
+        assert_close(stream(RSI(14, smoothing), close), indicators.rsi(close, 14, smoothing))
+    assert_close(stream(ATR(14), high, low, close), indicators.atr(high, low, close, 14))
+    assert_close(stream(MACD(), close).T, np.array(indicators.macd(close)))
+    assert_close(stream(Bollinger(), close).T, np.array(indicators.bollinger(close)))
+
+
+def test_streaming_sma_does_not_drift():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1e6, 1e3, 5000)
+    sma = SMA(50)
+    for x in values:
+        sma.update(x)
+    assert sma.value == pytest.approx(values[-50:].mean(), rel=1e-12)
+
+
+@pytest.mark.parametrize('smoothing', ['wilder', 'sma'])
+def test_rsi_state_round_trip(smoothing):
+    _, _, close = make_bars()
+    live = RSI(14, smoothing)
+    for x in close[:200]:
+        live.update(x)
+
+    restored = RSI.from_dict(json.loads(json.dumps(live.to_dict())))
+    before = live.to_dict()
+    assert live.peek(close[200]) == pytest.approx(restored.update(close[200]))
+    assert live.to_dict() == before  # peek leaves the state alone
+    for x in close[201:-1]:
+        restored.update(x)
+    assert restored.update(close[-1]) == pytest.approx(indicators.rsi(close, 14, smoothing)[-1])
+
+
+def test_unknown_rsi_smoothing():
+    with pytest.raises(ValueError):
+        RSI(14, 'ema')
@@ -0,0 +1,126 @@
+"""
+TradeLedger, EquityCurve and Position: the array-backed records behave
+like the lists of dicts they replaced.
+Run with: python -m pytest test_ledger.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger import EquityCurve, Position, TradeLedger
+
+
+def test_ledger_closed_stats_match_trade_dicts():
+    rng = np.random.default_rng(3)
+    ledger = TradeLedger()
+    trades = []
+    for i in range(500):
+        ticker = f"T{i % 7}"
+        date = pd.Timestamp("2020-01-01") + pd.Timedelta(days=i)
+        if i % 2 == 0:
+            ledger.record(date, ticker, 'BUY', 10.0, 5.0, 50.0)
+            trades.append({'action': 'BUY'})
+        else:
+            pnl = float(rng.normal(0, 5)) if i % 11 else 0.0
+            ledger.record(date, ticker, 'SELL', 10.0, 5.0, 50.0, pnl, pnl / 50 * 100)
+            trades.append({'action': 'SELL', 'pnl': pnl, 'pnl_pct': pnl / 50 * 100})
+
+    closed = [t for t in trades if 'pnl' in t]
+    wins = [t['pnl_pct'] for t in closed if t['pnl'] > 0]
+    losses = [t['pnl_pct'] for t in closed if t['pnl'] < 0]
+    expected = {
+        'total_trades': len(closed),
+        'winning_trades': len(wins),
+        'losing_trades': len(losses),
+        'win_rate': len(wins) / len(closed) * 100,
+        'avg_win': np.mean(wins),
+        'avg_loss': np.mean(losses),
+    }
+    stats_ = ledger.closed_stats()
+    assert stats_.keys() == expected.keys()
+    for key, value in expected.items():
+        assert np.isclose(stats_[key], value, rtol=1e-12), key
+
+    # Round trip through the dict view
+    assert [t['action'] for t in ledger] == [t['action'] for t in trades]
+    assert ledger.scaled(2.0).closed_stats()['avg_win'] == pytest.approx(expected['avg_win'])
+
+
+def test_empty_ledger_stats():
+    assert TradeLedger().closed_stats() == {
+        'total_trades': 0, 'winning_trades': 0, 'losing_trades': 0,
+        'win_rate': 0, 'avg_win': 0, 'avg_loss': 0,
+    }
+
+
+def test_ledger_round_trips_trade_dicts():
+    trades = [
+        {'date': pd.Timestamp('2021-03-01'), 'ticker': 'AAPL', 'action': 'BUY',
+         'price': 120.0, 'shares': 10.0, 'amount': 1200.0, 'commission': 1.0},
+        {'date': pd.Timestamp('2021-04-01'), 'ticker': 'AAPL', 'action': 'SELL',
+         'price': 130.0, 'shares': 10.0, 'amount': 1300.0, 'pnl': 98.0, 'pnl_pct': 98 / 1201 * 100,
+         'commission': 1.0},
+    ]
+    ledger = TradeLedger()
+    for trade in trades:
+        ledger.append(trade)
+    assert list(ledger) == trades
+    assert ledger[-1] == trades[-1]
+    with pytest.raises(IndexError):
+        ledger[2]
+
+    frame = ledger.to_frame()
+    assert list(frame['ticker']) == ['AAPL', 'AAPL']
+    assert list(frame['action']) == ['BUY', 'SELL']
+
+
+def test_ledger_grows_past_initial_capacity():
+    ledger = TradeLedger()
+    for i in range(1000):
+        ledger.record(pd.Timestamp('2020-01-01') + pd.Timedelta(days=i), f"T{i % 3}", 'BUY', 1.0, 1.0, 1.0)
+    assert len(ledger) == 1000
+    assert ledger.tickers == ['T0', 'T1', 'T2']
+    assert ledger[999]['date'] == pd.Timestamp('2020-01-01') + pd.Timedelta(days=999)
+
+    other = TradeLedger()
+    other.extend(ledger)
+    other.extend([ledger[0]])
+    assert len(other) == 1001
+
+
+def test_append_columns_maps_ticker_codes():
+    ledger = TradeLedger(['X'])
+    ledger.append_columns({
+        'date': pd.DatetimeIndex(['2022-01-03', '2022-01-04']).values,
+        'ticker': np.array([1, 0]),
+        'action': np.array([1, -1]),
+        'price': np.array([10.0, 11.0]),
+        'shares': np.array([2.0, 2.0]),
+        'amount': np.array([20.0, 22.0]),
+        'pnl': np.array([np.nan, 2.0]),
+        'pnl_pct': np.array([np.nan, 10.0]),
+        'commission': np.nan,
+    }, ['A', 'B'])
+    assert [t['ticker'] for t in ledger] == ['B', 'A']
+    assert ledger.tickers == ['X', 'A', 'B']
+    assert 'pnl' not in ledger[0] and ledger[1]['pnl'] == 2.0
+
+
+def test_equity_curve():
+    curve = EquityCurve()
+    curve.append('2020-01-02', 100.0)
+    curve.extend(pd.bdate_range('2020-01-03', periods=300), np.arange(300, dtype=float))
+    assert len(curve) == 301
+    series = curve.to_series()
+    assert series.index[0] == pd.Timestamp('2020-01-02') and series.iloc[-1] == 299.0
+    assert next(iter(curve)) == {'date': pd.Timestamp('2020-01-02'), 'value': 100.0}
+    curve.clear()
+    assert len(curve) == 0
+
+
+def test_position_dict_access():
+    position = Position(5.0, 10.0, pd.Timestamp('2020-01-02'), 51.0)
+    assert position['shares'] == 5.0 and position['cost_basis'] == 51.0
+    assert position.to_dict() == {'shares': 5.0, 'buy_price': 10.0,
+                                  'buy_date': pd.Timestamp('2020-01-02'), 'cost_basis': 51.0}
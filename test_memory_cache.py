@@ -0,0 +1,81 @@
+"""
+Memory tier: LRU eviction within the byte budget, per-entry TTL, copies
+that keep callers from mutating cached values, and the provider cache
+reads it serves before touching disk.
+Run with: python -m pytest test_memory_cache.py
+"""
+
+import time
+
+import pytest
+
+import multi_provider as mp
+from memory_cache import MemoryCache, _estimate_size, get_memory_cache
+
+
+def test_hit_miss_and_expiry():
+    cache = MemoryCache()
+    cache.set('a', {'price': 1.0}, ttl=60)
+    cache.set('gone', {'price': 2.0}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('a') == {'price': 1.0}
+    assert cache.get('gone') is None and cache.get('never') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['entries']) == (1, 2, 1, 1)
+
+
+def test_lru_eviction_within_budget():
+    record = {'price': 1.0, 'name': 'x' * 100}
+    size = _estimate_size(record)
+    cache = MemoryCache(max_bytes=size * 3)
+    for key in 'abc':
+        cache.set(key, dict(record), ttl=60)
+    cache.get('a')  # a becomes most recently used
+    cache.set('d', dict(record), ttl=60)
+    assert cache.get('b') is None
+    assert all(cache.get(k) is not None for k in 'acd')
+    assert cache.stats()['bytes'] <= cache.max_bytes and cache.evictions == 1
+
+    cache.set('huge', {'blob': 'x' * size * 4}, ttl=60)  # over the whole budget: not kept
+    assert cache.get('huge') is None and cache.get('a') is not None
+
+
+def test_values_are_copied():
+    cache = MemoryCache()
+    record = {'price': 1.0, 'history': [1, 2]}
+    cache.set('a', record, ttl=60)
+    record['history'].append(3)
+    tagged = cache.get('a')
+    tagged['source'] = 'memory'
+    assert cache.get('a') == {'price': 1.0, 'history': [1, 2]}
+
+
+def test_invalidate_and_prefix():
+    cache = MemoryCache()
+    for key in ('stock:A', 'stock:B', 'other'):
+        cache.set(key, 1, ttl=60)
+    cache.invalidate('stock:A')
+    cache.set('other', 2, ttl=0)  # a non-positive TTL drops the key
+    assert cache.get('stock:A') is None and cache.get('other') is None
+    cache.invalidate_prefix('stock:')
+    assert cache.stats()['entries'] == 0 and cache.stats()['bytes'] == 0
+
+
+@pytest.fixture
+def memory():
+    get_memory_cache().clear()
+    yield get_memory_cache()
+    get_memory_cache().clear()
+
+
+def test_provider_reads_are_served_from_memory(tmp_path, memory):
+    path = tmp_path / 'finnhub_AAPL_quote.json'
+    mp._write_cache(path, {'current_price': 187.5}, 60)
+    path.unlink()  # a hit must not need the file
+    assert mp._read_cache(path, 60) == {'current_price': 187.5}
+
+    mp._write_cache(path, {'current_price': 190.0}, 60)
+    memory.clear()
+    assert mp._read_cache(path, 60) == {'current_price': 190.0}  # promoted from disk
+    path.unlink()
+    assert mp._read_cache(path, 60) == {'current_price': 190.0}
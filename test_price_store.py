@@ -0,0 +1,142 @@
+"""
+Local price store: only uncovered ranges are downloaded, coverage never
+claims dates that were not fetched, bars fetched before their session
+closed are refreshed, and the data version only moves when values change.
+Run with: python -m pytest test_price_store.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import PriceStore, _session_close
+
+
+class StubDownloader:
+    """
+    Business-day bars for any range; every value is a function of the day
+    (Close is its ordinal) so values are checkable and refetches identical.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        dates = pd.bdate_range(start, end - pd.Timedelta(days=1), name='Date')
+        close = np.array([d.toordinal() for d in dates], dtype=np.float64)
+        return {
+            t: pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                             'Volume': close.astype(np.int64) % 1000 + 100}, index=dates)
+            for t in tickers
+        }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(tmp_path / 'prices', downloader=StubDownloader())
+
+
+def bdays(start: str, end: str) -> int:
+    return len(pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1)))
+
+
+def test_disjoint_request_downloads_the_stretch_in_between(store):
+    store.get_history('AAA', '2020-01-01', '2020-06-01')
+    store.get_history('AAA', '2021-01-01', '2021-06-01')
+    # The second request starts past the covered end, so it fetches from there
+    assert store.downloader.calls[-1][1] == pd.Timestamp('2020-06-01')
+
+    calls = len(store.downloader.calls)
+    between = store.get_history('AAA', '2020-07-01', '2020-12-01')
+    assert len(between) == bdays('2020-07-01', '2020-12-01')
+    assert len(store.downloader.calls) == calls
+    assert store.coverage('AAA')['rows'] == bdays('2020-01-01', '2021-06-01')
+
+
+def test_head_and_tail_gaps_only(store):
+    store.get_history('AAA', '2020-03-01', '2020-06-01')
+    store.get_history('AAA', '2020-01-01', '2020-09-01')
+    assert [c[1:] for c in store.downloader.calls] == [
+        (pd.Timestamp('2020-03-01'), pd.Timestamp('2020-06-01')),
+        (pd.Timestamp('2020-01-01'), pd.Timestamp('2020-03-01')),
+        (pd.Timestamp('2020-06-01'), pd.Timestamp('2020-09-01')),
+    ]
+    hist = store.get_history('AAA', '2020-01-01', '2020-09-01')
+    assert hist.index.is_monotonic_increasing and not hist.index.duplicated().any()
+    assert len(store.downloader.calls) == 3
+
+
+def test_tickers_with_the_same_gap_share_a_download(store):
+    histories = store.get_histories(['aaa', 'BBB', 'AAA'], '2020-01-01', '2020-02-01')
+    assert list(histories) == ['AAA', 'BBB']
+    assert store.downloader.calls == [(('AAA', 'BBB'), pd.Timestamp('2020-01-01'), pd.Timestamp('2020-02-01'))]
+    assert store.downloads == 1
+
+
+def test_failed_download_is_not_marked_covered(tmp_path):
+    store = PriceStore(tmp_path / 'prices', downloader=lambda tickers, start, end: {})
+    assert store.get_history('AAA', '2020-01-01', '2020-06-01').empty
+    assert store.coverage('AAA') is None
+
+
+def test_bar_fetched_before_the_close_is_refetched(store):
+    store.get_history('AAA', '2021-01-04', '2021-01-09')
+    entry = store.coverage('AAA')
+    assert entry['last_bar'] == '2021-01-08'
+
+    # Pretend the last bar was an intraday snapshot
+    entry['last_bar_fetched_at'] = _session_close(pd.Timestamp('2021-01-08')) - 3600
+    store.manifest.set('AAA', entry)
+    store.get_history('AAA', '2021-01-04', '2021-01-09')
+    assert store.downloader.calls[-1][1:] == (pd.Timestamp('2021-01-08'), pd.Timestamp('2021-01-09'))
+
+    # The refetch happened after the close, so the bar is final now
+    calls = len(store.downloader.calls)
+    store.get_history('AAA', '2021-01-04', '2021-01-09')
+    assert len(store.downloader.calls) == calls
+
+
+def test_refetching_identical_bars_keeps_the_data_version(store):
+    store.get_history('AAA', '2021-01-04', '2021-01-09')
+    version = store.data_version(['AAA'])['AAA']
+
+    def _force_tail_refetch():
+        entry = store.coverage('AAA')
+        entry['last_bar_fetched_at'] = _session_close(pd.Timestamp('2021-01-08')) - 3600
+        store.manifest.set('AAA', entry)
+
+    _force_tail_refetch()
+    store.get_history('AAA', '2021-01-04', '2021-01-09')
+    assert store.downloader.calls[-1][1] == pd.Timestamp('2021-01-08')
+    assert store.data_version(['AAA'])['AAA'] == version
+
+    # The final print differs from the snapshot: the version moves
+    original = store.downloader.__call__
+    store.downloader = lambda tickers, start, end: {
+        t: frame.assign(Close=frame['Close'] + 0.5) for t, frame in original(tickers, start, end).items()}
+    _force_tail_refetch()
+    hist = store.get_history('AAA', '2021-01-04', '2021-01-09')
+    assert store.data_version(['AAA'])['AAA'] == version + 1
+    assert hist['Close'].iloc[-1] == pd.Timestamp('2021-01-08').toordinal() + 0.5
+
+
+def test_arrays_and_bars_match_history(store):
+    hist = store.get_history('AAA', '2020-01-01', '2020-03-01')
+    arrays = store.get_arrays(['AAA', 'ZZZ'], '2020-01-01', '2020-03-01', tail=5)
+    assert list(arrays) == ['AAA', 'ZZZ']  # the stub has data for any ticker
+    np.testing.assert_array_equal(arrays['AAA']['Close'], hist['Close'].to_numpy()[-5:])
+
+    bars = list(store.iter_bars('AAA', '2020-02-01', '2020-03-01', batch_rows=3))
+    window = hist.loc['2020-02-01':]
+    assert [b[0] for b in bars] == list(window.index)
+    assert [b[4] for b in bars] == window['Close'].tolist()
+
+
+def test_data_version_and_clear(store):
+    assert store.data_version(['AAA']) == {'AAA': 0}
+    store.get_history('AAA', '2020-01-01', '2020-02-01')
+    assert store.data_version(['aaa']) == {'AAA': 1}
+    store.clear('AAA')
+    assert store.coverage('AAA') is None
+    assert store.get_history('AAA', '2020-01-01', '2020-02-01').shape[0] == bdays('2020-01-01', '2020-02-01')
@@ -0,0 +1,94 @@
+"""
+Provider health: breakers open after repeated failures or a 429, let one
+probe through after the cooldown, back off harder when it fails, and
+routing puts healthy providers first.
+Run with: python -m pytest test_provider_health.py
+"""
+
+import pytest
+
+import provider_health
+from provider_health import (BASE_COOLDOWN, CLOSED, FAILURE_THRESHOLD, HALF_OPEN, MIN_SAMPLES, OPEN,
+                             ProviderHealth, get_health, routing_order)
+
+
+class FakeClock:
+    """Stands in for the time module so cooldowns pass instantly."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(provider_health, 'time', clock)
+    monkeypatch.setattr(provider_health, '_registry', {})
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    health = ProviderHealth('finnhub')
+    for _ in range(FAILURE_THRESHOLD - 1):
+        health.record_failure(0.1, 'timeout')
+    assert health.allow_request()
+    health.record_failure(0.1, 'timeout')
+    assert health.state == OPEN and not health.allow_request()
+    snapshot = health.snapshot()
+    assert snapshot['retry_in'] == BASE_COOLDOWN and snapshot['skipped'] == 1
+    assert snapshot['last_error'] == 'timeout'
+
+
+def test_success_resets_the_failure_count(clock):
+    health = ProviderHealth('finnhub')
+    for _ in range(FAILURE_THRESHOLD - 1):
+        health.record_failure(0.1, 'timeout')
+    health.record_success(0.1)
+    health.record_failure(0.1, 'timeout')
+    assert health.state == CLOSED
+
+
+def test_half_open_probe(clock):
+    health = ProviderHealth('finnhub')
+    for _ in range(FAILURE_THRESHOLD):
+        health.record_failure(0.1, 'timeout')
+    clock.now += BASE_COOLDOWN
+    assert health.allow_request()          # the probe
+    assert health.state == HALF_OPEN
+    assert not health.allow_request()      # only one at a time
+
+    health.record_failure(0.1, 'timeout')  # failed probe: doubled cooldown
+    assert health.state == OPEN and health.snapshot()['retry_in'] == 2 * BASE_COOLDOWN
+    clock.now += 2 * BASE_COOLDOWN
+    assert health.allow_request()
+    health.release_probe()                 # no call went out after all
+    assert health.allow_request()
+    health.record_success(0.1)
+    assert health.state == CLOSED and health.cooldown == BASE_COOLDOWN
+
+
+def test_retry_after_opens_immediately(clock):
+    health = ProviderHealth('polygon')
+    health.record_failure(0.1, 'HTTP 429', retry_after=120)
+    assert health.state == OPEN and health.snapshot()['retry_in'] == 120
+    clock.now += 120
+    assert health.is_available()
+
+
+def test_error_rate_opens_the_breaker(clock):
+    health = ProviderHealth('finnhub')
+    for i in range(MIN_SAMPLES):
+        health.record_success(0.1 * (i + 1))
+        health.record_failure(0.1, 'HTTP 500')
+    assert health.state == OPEN
+    assert health.snapshot()['p50_latency'] == pytest.approx(0.1)
+
+
+def test_routing_order(clock):
+    get_health('finnhub').record_failure(0.1, 'HTTP 429', retry_after=60)
+    headroom = {'finnhub': 1.0, 'polygon': 0.05, 'alphavantage': 1.0, 'yahoo': 1.0}
+    order = routing_order(['finnhub', 'polygon', 'alphavantage', 'yahoo'], headroom.get)
+    assert order == ['alphavantage', 'yahoo', 'polygon', 'finnhub']
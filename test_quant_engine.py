@@ -0,0 +1,149 @@
+"""
+Saved anomaly and segmentation models: anomaly forests are reused only for
+the universe they were fit on, and segment labels and names survive saves
+and refits. Advisors on the same data share one fitted analysis context.
+Run with: python -m pytest test_quant_engine.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import quant_engine
+from quant_engine import (AnomalyDetector, FactorAnalysisEngine, MarketSegmentation, QuantitativeAdvisor,
+                          frame_fingerprint, get_analysis_context)
+from test_screener import make_records
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(quant_engine, 'MODEL_DIR', tmp_path / 'models')
+    return tmp_path / 'models'
+
+
+@pytest.fixture
+def universe():
+    frame = pd.DataFrame([r for r in make_records(300) if r['success']]).reset_index(drop=True)
+    frame['score'] = np.random.default_rng(3).uniform(0, 10, len(frame))
+    return frame
+
+
+# ============================================================================
+# ANOMALY DETECTOR
+# ============================================================================
+
+def test_anomaly_model_is_reused_for_the_same_universe(model_dir, universe):
+    first = AnomalyDetector(universe)
+    anomalies = first.detect_anomalies()
+    assert first.refit_reason == 'no model' and not anomalies.empty
+
+    second = AnomalyDetector(universe.sample(frac=1, random_state=0))
+    pd.testing.assert_frame_equal(second.detect_anomalies().sort_index(), anomalies.sort_index())
+    assert second.refit_reason is None
+
+
+def test_anomaly_model_is_not_shared_across_universes(model_dir, universe):
+    AnomalyDetector(universe).detect_anomalies()
+    smaller = AnomalyDetector(universe.iloc[:150])
+    smaller.detect_anomalies()
+    assert smaller.refit_reason == 'no model'  # a shrinking universe gets its own fit
+    assert len(list(model_dir.iterdir())) == 2
+
+    again = AnomalyDetector(universe)
+    again.detect_anomalies()
+    assert again.refit_reason is None
+
+
+def test_fitted_detector_refits_for_another_ticker_set(model_dir, universe):
+    detector = AnomalyDetector(universe.iloc[:150], persist=False)
+    detector.detect_anomalies()
+    other = universe.iloc[150:]
+    detector.data = other
+    X = detector._features(other, detector.feature_cols)
+    assert detector.refit_reason_for(X) == 'ticker set changed'
+
+
+# ============================================================================
+# MARKET SEGMENTATION
+# ============================================================================
+
+def test_segments_are_saved_with_their_names(model_dir, universe):
+    first = MarketSegmentation(universe).perform_clustering()
+    names = first.groupby('cluster')['cluster_name'].first().to_dict()
+    assert len(set(names.values())) == len(names) == 4
+
+    reloaded = MarketSegmentation(universe)
+    assert reloaded.names == names
+    second = reloaded.perform_clustering()
+    assert reloaded.refit_reason is None
+    pd.testing.assert_series_equal(first['cluster_name'], second['cluster_name'])
+
+
+def test_refit_keeps_labels_and_names(model_dir, universe):
+    segmentation = MarketSegmentation(universe)
+    before = segmentation.perform_clustering()
+    names = dict(segmentation.names)
+
+    # Every stock now looks like a rocket ship; existing segments keep their names
+    shifted = universe.assign(score=universe['score'] + 8, change=universe['change'] + 20)
+    later = MarketSegmentation(shifted)
+    after = later.perform_clustering()
+    assert later.refit_reason is not None
+    assert later.names == names
+    assert (after['cluster'] == before['cluster']).all()
+    assert (after['cluster'].map(names) == after['cluster_name']).all()
+
+
+def test_names_are_unique_when_every_cluster_fits_the_same_one(universe):
+    flat = universe.assign(score=5.0, change=0.0)
+    segmentation = MarketSegmentation(flat, persist=False)
+    segmentation.perform_clustering()
+    assert len(set(segmentation.names.values())) == len(segmentation.names) == 4
+    assert "🔷 Value Play" in segmentation.names.values()
+
+
+# ============================================================================
+# ANALYSIS CONTEXT
+# ============================================================================
+
+def test_fingerprint_follows_content(universe):
+    base = frame_fingerprint(universe)
+    assert frame_fingerprint(universe.copy()) == base
+    changed = universe.copy()
+    changed.loc[5, 'score'] += 0.01
+    assert frame_fingerprint(changed) != base
+    assert frame_fingerprint(universe.assign(meta=[{'k': i} for i in range(len(universe))])) != base
+
+
+@pytest.fixture
+def counted(model_dir, monkeypatch):
+    """Clean context cache; counts how often each engine actually runs."""
+    quant_engine.clear_analysis_cache()
+    calls = {'factors': 0, 'anomalies': 0, 'clusters': 0}
+    for cls, method, key in ((FactorAnalysisEngine, '_analyze_factors', 'factors'),
+                             (AnomalyDetector, '_detect_anomalies', 'anomalies'),
+                             (MarketSegmentation, '_perform_clustering', 'clusters')):
+        original = getattr(cls, method)
+
+        def _counted(self, _original=original, _key=key):
+            calls[_key] += 1
+            return _original(self)
+        monkeypatch.setattr(cls, method, _counted)
+    yield calls
+    quant_engine.clear_analysis_cache()
+
+
+def test_advisors_on_the_same_data_share_fitted_models(universe, counted):
+    advisor = QuantitativeAdvisor(universe)
+    tickers = list(universe['ticker'][:20])
+    theses = advisor.generate_all_theses(tickers)
+    assert counted == {'factors': 1, 'anomalies': 1, 'clusters': 1}
+
+    again = QuantitativeAdvisor(universe.copy())
+    assert again.context is advisor.context
+    assert again.generate_investment_thesis(tickers[3]) == theses[tickers[3]]
+    assert counted == {'factors': 1, 'anomalies': 1, 'clusters': 1}
+
+    assert get_analysis_context(universe.head(100)) is not advisor.context
+    assert len(advisor.generate_all_theses()) == universe['ticker'].nunique()
+    assert advisor.generate_investment_thesis('NOPE') == {'error': 'Stock not found'}
@@ -0,0 +1,100 @@
+"""
+Rate limiting: token bucket and sliding windows, and quotas persisted in
+SQLite so limiters sharing a database never jointly exceed a cap.
+Run with: python -m pytest test_rate_limiter.py
+"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, SlidingWindow, TokenBucket, UsageLog
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(capacity=2, rate=10)
+    assert bucket.wait_time() == 0
+    bucket.take()
+    bucket.take()
+    assert 0 < bucket.wait_time() <= 0.1
+    time.sleep(0.12)
+    assert bucket.wait_time() == 0
+
+
+def test_sliding_window_wait():
+    window = SlidingWindow(limit=2, seconds=60)
+    now = 1_000.0
+    assert window.wait_time([now - 10], now) == 0
+    assert window.used([now - 70, now - 10, now - 5], now) == 2
+    assert window.wait_time([now - 70, now - 10, now - 5], now) == pytest.approx(50)
+
+
+def test_in_memory_limiter_rejects_without_sleeping():
+    limiter = RateLimiter('test', [(3, 60)], persist=False)
+    assert all(limiter.try_acquire() for _ in range(3))
+    started = time.monotonic()
+    assert not limiter.acquire(timeout=1)
+    assert time.monotonic() - started < 0.5  # the window frees up in ~60s: give up at once
+    assert limiter.remaining() == {'3/60s': 0} and limiter.headroom() == 0
+    status = limiter.status()
+    assert (status['granted'], status['rejected'], status['min_remaining']) == (3, 1, 0)
+    assert status['wait_seconds'] > 50
+
+
+def test_acquire_waits_for_the_bucket():
+    limiter = RateLimiter('test', [(100, 60)], burst=1, rate=20, persist=False)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.acquire(timeout=1)
+    assert limiter.remaining() == {'100/60s': 98} and limiter.headroom() == pytest.approx(0.98)
+
+
+@pytest.fixture
+def usage_log(tmp_path, monkeypatch):
+    log = UsageLog(tmp_path / 'rate_limits.sqlite3')
+    monkeypatch.setattr(rate_limiter, '_usage_log', log)
+    return log
+
+
+def test_quota_survives_restarts(usage_log):
+    first = RateLimiter('finnhub', [(5, 60)])
+    assert all(first.try_acquire() for _ in range(3))
+    second = RateLimiter('finnhub', [(5, 60)])  # a new process or restart
+    assert second.remaining() == {'5/60s': 2}
+    assert second.try_acquire() and second.try_acquire() and not second.try_acquire()
+    assert not first.try_acquire()
+    assert RateLimiter('other', [(5, 60)]).remaining() == {'5/60s': 5}
+
+
+def test_shared_quota_is_never_exceeded(usage_log):
+    limiters = [RateLimiter('shared', [(20, 60)]) for _ in range(4)]
+    granted = []
+
+    def _worker(limiter):
+        granted.extend(1 for _ in range(10) if limiter.try_acquire())
+
+    threads = [threading.Thread(target=_worker, args=(limiter,)) for limiter in limiters]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(granted) == 20
+    assert len(usage_log.timestamps('shared', 0)) == 20
+
+
+def test_old_rows_are_pruned_and_legacy_state_migrated(tmp_path, monkeypatch):
+    path = tmp_path / 'rate_limits.sqlite3'
+    now = time.time()
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO entries VALUES (?, ?)",
+                     ('ratelimit:finnhub', f"[{now - 3600}, {now - 10}, {now - 5}]"))
+    monkeypatch.setattr(rate_limiter, '_usage_log', UsageLog(path))
+
+    limiter = RateLimiter('finnhub', [(3, 60)])
+    assert limiter.remaining() == {'3/60s': 1}
+    assert limiter.try_acquire()
+    assert len(rate_limiter._usage_log.timestamps('finnhub', 0)) == 3  # the hour-old call was pruned
@@ -0,0 +1,112 @@
+"""
+Stale-while-revalidate: expired entries within the staleness window are
+served at once, tagged with their age, while one background refresh per
+key updates them.
+Run with: python -m pytest test_revalidate.py
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import cache_manager
+import data_sources
+import multi_provider as mp
+import revalidate
+from cache_store import CacheStore
+from memory_cache import get_memory_cache
+from revalidate import get_refresh_stats, mark_stale, schedule_refresh
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_mark_stale_tags_a_copy():
+    data = {'price': 1.0}
+    tagged = mark_stale(data, 42.0)
+    assert tagged == {'price': 1.0, 'stale': True, 'cache_age': 42.0}
+    assert data == {'price': 1.0}
+
+
+def test_refreshes_are_deduplicated_per_key():
+    release = threading.Event()
+    runs = []
+
+    def _refresh():
+        runs.append(1)
+        release.wait(5)
+
+    before = get_refresh_stats()
+    assert schedule_refresh('test:dedup', _refresh)
+    assert not schedule_refresh('test:dedup', _refresh)
+    release.set()
+    wait_until(lambda: get_refresh_stats()['completed'] > before['completed'])
+    assert runs == [1]
+    assert get_refresh_stats()['deduplicated'] == before['deduplicated'] + 1
+
+    # Once done, the key can be refreshed again
+    assert schedule_refresh('test:dedup', lambda: None)
+
+
+def test_failed_refresh_frees_the_key(capsys):
+    before = get_refresh_stats()['failed']
+
+    def _boom():
+        raise RuntimeError('provider down')
+
+    assert schedule_refresh('test:fail', _boom)
+    wait_until(lambda: get_refresh_stats()['failed'] > before)
+    wait_until(lambda: 'test:fail' not in revalidate._in_flight)
+    assert 'Background refresh failed for test:fail' in capsys.readouterr().out
+
+
+@pytest.fixture
+def memory():
+    get_memory_cache().clear()
+    yield
+    get_memory_cache().clear()
+
+
+def write_aged(path, data, age_seconds: float):
+    cached_at = datetime.now() - timedelta(seconds=age_seconds)
+    path.write_text(json.dumps({'cached_at': cached_at.isoformat(), 'data': data}))
+
+
+def test_provider_cache_serves_stale_and_refreshes(tmp_path, monkeypatch, memory):
+    scheduled = []
+    monkeypatch.setattr(mp, 'schedule_refresh', lambda key, func: scheduled.append((key, func)))
+    monkeypatch.setattr(mp, 'STALE_WHILE_REVALIDATE', True)
+    path = tmp_path / 'finnhub_AAPL_quote.json'
+
+    write_aged(path, {'current_price': 187.5}, 600)
+    stale = mp._read_cache(path, 60, refresh=lambda: 'fresh')
+    assert stale['stale'] and stale['current_price'] == 187.5 and stale['cache_age'] >= 600
+    assert [key for key, _ in scheduled] == [str(path)]
+    assert mp._read_cache(path, 60) is None  # callers without a refresh get a miss
+
+    write_aged(path, {'current_price': 187.5}, mp.MAX_STALENESS_SECONDS + 60)
+    assert mp._read_cache(path, 60, refresh=lambda: 'fresh') is None
+    monkeypatch.setattr(mp, 'STALE_WHILE_REVALIDATE', False)
+    write_aged(path, {'current_price': 187.5}, 600)
+    assert mp._read_cache(path, 60, refresh=lambda: 'fresh') is None
+    assert len(scheduled) == 1
+
+
+def test_stock_data_serves_stale_entries(tmp_path, monkeypatch, memory):
+    monkeypatch.setattr(cache_manager, '_store', CacheStore(tmp_path / 'stock.sqlite3'))
+    scheduled = []
+    monkeypatch.setattr(data_sources, 'schedule_refresh', lambda key, func: scheduled.append(key))
+    monkeypatch.setattr(data_sources, 'STALE_WHILE_REVALIDATE', True)
+    monkeypatch.setattr(data_sources, '_fetch_fresh', lambda ticker: pytest.fail('blocking fetch'))
+
+    cache_manager.set_cached_stock('AAPL', {'ticker': 'AAPL', 'price': 187.5}, ttl=-1)
+    result = data_sources.get_stock_data('AAPL')
+    assert result['stale'] and result['price'] == 187.5
+    assert scheduled == ['stock:AAPL']
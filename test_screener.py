@@ -0,0 +1,128 @@
+"""
+Universe screener: vectorized health and AI scores match the per-record
+versions, and the chunked top-K matches ranking the whole universe.
+Run with: python -m pytest test_screener.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import quant_engine
+import screener
+from health_scoring import calculate_health_score, calculate_health_scores
+from price_store import PriceStore
+from scoring import calculate_ai_score, calculate_ai_scores
+from screener import screen_universe
+
+
+def make_records(n: int = 2000, seed: int = 5) -> list:
+    """Stock records like data_sources output, including 'N/A' P/Es and failed fetches."""
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(n):
+        pe = float(rng.lognormal(3, 0.7)) if rng.random() > 0.1 else 'N/A'
+        records.append({
+            'success': bool(rng.random() > 0.05),
+            'ticker': f"S{i:04d}",
+            'price': float(rng.lognormal(4, 1)),
+            'change': float(rng.normal(0, 4)),
+            'pe': pe,
+            'marketCap': float(rng.lognormal(2, 2)),
+            'dividend': float(max(rng.normal(1.5, 1.5), 0)),
+            'rsi': float(rng.uniform(5, 95)),
+            'volume': float(rng.lognormal(14, 1.5)),
+        })
+    return records
+
+
+def test_health_scores_match_scalar():
+    records = make_records()
+    vectorized = calculate_health_scores(pd.DataFrame(records))
+    for i, record in enumerate(records):
+        scalar = calculate_health_score(record)
+        assert vectorized['health_score'].iloc[i] == scalar['score'], record
+        assert vectorized['health_grade'].iloc[i] == scalar['grade'], record
+
+
+def test_ai_scores_match_scalar():
+    records = make_records()
+    frame = pd.DataFrame(records)
+    rng = np.random.default_rng(9)
+    health = rng.integers(0, 101, len(records)).astype(np.float64)
+    sentiment = rng.uniform(-1, 1, len(records))
+
+    with_inputs = calculate_ai_scores(frame, health, sentiment)
+    defaults = calculate_ai_scores(frame)
+    for i, record in enumerate(records):
+        assert with_inputs[i] == calculate_ai_score(record, health_score=int(health[i]), sentiment_score=sentiment[i])
+        assert defaults[i] == calculate_ai_score(record)
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(quant_engine, 'MODEL_DIR', tmp_path / 'models')
+    return tmp_path / 'models'
+
+
+def expected_top(records: list, k: int) -> list:
+    """Tickers of the k best AI scores over the whole universe (earliest first on ties)."""
+    scores = [
+        calculate_ai_score(r, health_score=calculate_health_score(r)['score']) for r in records
+    ]
+    order = sorted(range(len(records)), key=lambda i: (-scores[i], i))
+    return [records[i]['ticker'] for i in order[:k]]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 250, 5000])
+def test_top_k_matches_full_ranking(chunk_size):
+    records = make_records(600)
+    result = screen_universe(records={r['ticker']: r for r in records}, top_k=20,
+                             chunk_size=chunk_size, run_models=False)
+    assert result['screened'] == 600
+    assert list(result['top']['ticker']) == expected_top(records, 20)
+    assert result['top']['score'].is_monotonic_decreasing
+    assert 'recommendation' in result['top'].columns
+
+
+def test_screen_with_models_reuses_saved_state(model_dir):
+    records = {r['ticker']: r for r in make_records(400)}
+    first = screen_universe(records=records, top_k=10)
+    assert {'anomaly_type', 'segment'} <= set(first['top'].columns)
+    assert sum(first['segments'].values()) > 0
+    saved = sorted(p.name for p in model_dir.iterdir())
+    assert any(name.startswith('screener_anomaly') for name in saved)
+    assert any(name.startswith('screener_segmentation') for name in saved)
+
+    second = screen_universe(records=records, top_k=10)
+    pd.testing.assert_frame_equal(first['top'], second['top'])
+    assert first['segments'] == second['segments']
+
+
+def test_price_store_source(tmp_path, monkeypatch):
+    dates = pd.bdate_range('2024-01-02', periods=40, name='Date')
+
+    def downloader(tickers, start, end):
+        frames = {}
+        for i, ticker in enumerate(tickers):
+            close = 100.0 + i + np.arange(len(dates), dtype=np.float64)
+            frames[ticker] = pd.DataFrame({'Open': close, 'High': close, 'Low': close,
+                                           'Close': close, 'Volume': 1000 + i}, index=dates)
+        return frames
+
+    store = PriceStore(tmp_path / 'prices', downloader=downloader)
+    monkeypatch.setattr(screener, 'get_price_store', lambda: store)
+    result = screen_universe(['AAA', 'BBB', 'CCC'], source='price_store', start_date='2024-01-02',
+                             end_date='2024-02-28', top_k=3, run_models=False,
+                             records={'BBB': {'pe': 15.0, 'name': 'Bee'}})
+    top = result['top'].set_index('ticker')
+    assert set(top.index) == {'AAA', 'BBB', 'CCC'}
+    assert top.loc['AAA', 'price'] == 139.0
+    assert top.loc['BBB', 'name'] == 'Bee' and top.loc['AAA', 'pe'] == 'N/A'
+    assert top.loc['CCC', 'rsi'] == 100.0  # only up days
+    assert store.downloads == 1
+
+
+def test_unknown_source_raises():
+    with pytest.raises(ValueError):
+        screen_universe(source='bloomberg', records={})
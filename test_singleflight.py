@@ -0,0 +1,82 @@
+"""
+Single-flight: concurrent calls for the same key run the function once and
+share its result or exception; different keys run independently.
+Run with: python -m pytest test_singleflight.py
+"""
+
+import threading
+
+from singleflight import SingleFlight, get_singleflight_stats
+
+
+def run_concurrently(group: SingleFlight, key, func, n: int):
+    """Start n callers for key while func is held, then release it."""
+    results, errors = [], []
+
+    def _caller():
+        try:
+            results.append(group.do(key, func))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_caller) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def wait_for_waiters(group: SingleFlight, calls: int):
+    while group.stats()['calls'] < calls:
+        threading.Event().wait(0.005)
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight('test-share')
+    release = threading.Event()
+    runs = []
+
+    def _fetch():
+        runs.append(1)
+        release.wait(5)
+        return {'price': 187.5}
+
+    threads, results, errors = run_concurrently(group, ('finnhub', 'AAPL'), _fetch, 8)
+    wait_for_waiters(group, 8)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert runs == [1] and not errors
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert group.stats() == {'calls': 8, 'executions': 1, 'deduplicated': 7, 'in_flight': 0}
+    assert get_singleflight_stats()['test-share'] == group.stats()
+
+
+def test_waiters_receive_the_same_exception():
+    group = SingleFlight('test-error')
+    release = threading.Event()
+
+    def _fetch():
+        release.wait(5)
+        raise ConnectionError('provider down')
+
+    threads, results, errors = run_concurrently(group, 'AAPL', _fetch, 4)
+    wait_for_waiters(group, 4)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert not results and len(errors) == 4
+    assert all(e is errors[0] and isinstance(e, ConnectionError) for e in errors)
+
+    # The failed call is not remembered: the next one runs again
+    assert group.do('AAPL', lambda: 'ok') == 'ok'
+    assert group.stats()['executions'] == 2
+
+
+def test_sequential_and_distinct_keys_are_not_coalesced():
+    group = SingleFlight('test-keys')
+    assert group.do('AAPL', lambda: 1) == 1
+    assert group.do('AAPL', lambda: 2) == 2
+    assert group.do('MSFT', lambda: 3) == 3
+    assert group.stats()['deduplicated'] == 0 and group.stats()['executions'] == 3